@@ -5,11 +5,19 @@ API endpoints for decision management
 from fastapi import APIRouter, HTTPException, status
 from typing import Dict, Any
 
+from app.core import integrity
 from app.models.decision import DecisionTrace, DecisionTraceCreate
 from app.services.decision_service import DecisionService
 
 router = APIRouter()
 
+# Messages for the single-trace verify endpoint, by verification result
+VERIFY_MESSAGES = {
+    integrity.VALID: "Hash verification successful",
+    integrity.MISMATCH: "Hash mismatch - data may be corrupted",
+    integrity.LEGACY: "Trace predates versioned hashes - its hash can't be verified",
+}
+
 
 @router.post("/ingest", response_model=DecisionTrace, status_code=status.HTTP_201_CREATED)
 async def ingest_decision(trace: DecisionTraceCreate):
@@ -64,9 +72,9 @@ async def verify_decision_integrity(decision_id: str):
     Validates that the decision trace has not been tampered with
     by recalculating and comparing the hash.
     """
-    is_valid = await DecisionService.verify_hash(decision_id)
+    result = await DecisionService.verify_hash(decision_id)
     
-    if is_valid is None:
+    if result is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Decision trace {decision_id} not found"
@@ -74,8 +82,10 @@ async def verify_decision_integrity(decision_id: str):
     
     return {
         "decision_id": decision_id,
-        "is_valid": is_valid,
-        "message": "Hash verification successful" if is_valid else "Hash mismatch - data may be corrupted"
+        # None when the trace predates versioned hashes and can't be checked
+        "is_valid": None if result == integrity.LEGACY else result == integrity.VALID,
+        "status": result,
+        "message": VERIFY_MESSAGES[result]
     }
 
 
@@ -88,6 +98,7 @@ async def get_statistics() -> Dict[str, Any]:
     - Total decisions
     - Breakdown by risk level
     - Breakdown by source system
+    - rebuilding: true, with empty counts, while the counters are first built
     """
     try:
         stats = await DecisionService.get_statistics()
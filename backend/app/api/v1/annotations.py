@@ -2,23 +2,35 @@
 API endpoints for annotations and reviews
 """
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Query, Request, status
+from typing import Optional
+from datetime import datetime, timedelta
 
-from app.models.decision import AnnotationCreate, DecisionTrace
+from app.api.v1.dependencies import not_modified
+from app.core.background import spawn
+from app.core.config import settings
+from app.core.serialization import TraceJSONResponse
+from app.core.trace_cache import etag_matches, make_etag
+from app.models.decision import AnnotationCreate, AnnotationPage, AnnotationResult, BulkAnnotateRequest
+from app.services.annotation_service import AnnotationService, decode_annotation_cursor
+from app.services.bulk_annotation_service import BulkAnnotationService
 from app.services.decision_service import DecisionService
 
 router = APIRouter()
 
 
-@router.put("/annotate/{decision_id}", response_model=DecisionTrace)
+@router.put("/annotate/{decision_id}", response_model=AnnotationResult)
 async def add_annotation(decision_id: str, annotation: AnnotationCreate):
     """
     Add a review note/annotation to a decision trace
     
     Allows reviewers to add notes, tags, and comments to decisions
     for audit and compliance purposes.
+    
+    Returns the stored annotation and the trace's updated
+    annotation summary.
     """
-    result = await DecisionService.add_annotation(
+    result = await AnnotationService.add_annotation(
         decision_id=decision_id,
         reviewer=annotation.reviewer,
         note=annotation.note,
@@ -34,12 +46,123 @@ async def add_annotation(decision_id: str, annotation: AnnotationCreate):
     return result
 
 
-@router.get("/annotations/{decision_id}")
-async def get_annotations(decision_id: str):
+@router.post("/annotate/bulk", status_code=status.HTTP_202_ACCEPTED)
+async def start_bulk_annotation(request: BulkAnnotateRequest):
+    """
+    Start a bulk annotation job
+    
+    Adds the same note and tags to every trace matching the filters
+    (source_system, risk_level, rule_id, start_date, end_date) or
+    listed in decision_ids; when both are given, traces must match
+    both. Runs in the background; poll GET /annotate/bulk/{job_id}
+    for progress.
+    """
+    filters = request.dict(exclude={"reviewer", "note", "tags"})
+    if request.risk_level:
+        filters["risk_level"] = request.risk_level.value
+    
+    if not any(value is not None for value in filters.values()):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide decision_ids or at least one filter"
+        )
+    if request.decision_ids is not None and len(request.decision_ids) > settings.ANNOTATE_BULK_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"{len(request.decision_ids)} decision IDs exceeds limit of {settings.ANNOTATE_BULK_MAX_IDS}"
+        )
+    
+    job = await BulkAnnotationService.create_job(
+        filters, {"reviewer": request.reviewer, "note": request.note, "tags": request.tags}
+    )
+    spawn(
+        BulkAnnotationService.run_job(job["_id"], settings.ANNOTATE_BULK_BATCH_SIZE),
+        name=f"annotate-{job['_id']}"
+    )
+    
+    return {"job_id": job["_id"], "status": job["status"], "total": job["total"]}
+
+
+@router.get("/annotate/bulk/{job_id}")
+async def get_bulk_annotation(job_id: str):
+    """
+    Get progress of a bulk annotation job
+    
+    Returns status, traces annotated so far, throughput and the
+    number of search index writes that failed.
+    """
+    job = await BulkAnnotationService.get_job(job_id)
+    
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Annotation job {job_id} not found"
+        )
+    
+    return job
+
+
+@router.post("/annotate/bulk/{job_id}/resume", status_code=status.HTTP_202_ACCEPTED)
+async def resume_bulk_annotation(job_id: str):
     """
-    Retrieve all annotations for a decision trace
+    Resume an interrupted or failed bulk annotation job from its last checkpoint
     """
-    trace = await DecisionService.get_decision_trace(decision_id)
+    job = await BulkAnnotationService.get_job(job_id)
+    
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Annotation job {job_id} not found"
+        )
+    # A running job that stopped checkpointing belonged to a worker that died
+    stale = job["updated_at"] < datetime.utcnow() - timedelta(minutes=5)
+    if job["status"] == "completed" or (job["status"] == "running" and not stale):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Annotation job {job_id} is {job['status']}"
+        )
+    
+    spawn(
+        BulkAnnotationService.run_job(job_id, settings.ANNOTATE_BULK_BATCH_SIZE),
+        name=f"annotate-{job_id}"
+    )
+    
+    return {"job_id": job_id, "status": "running"}
+
+
+@router.get("/annotations/{decision_id}", response_model=AnnotationPage)
+async def get_annotations(
+    decision_id: str,
+    request: Request,
+    limit: int = Query(50, ge=1, le=200, description="Number of annotations to return"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page")
+):
+    """
+    Retrieve annotations for a decision trace, newest first
+    
+    - Pagination: pass next_cursor back as cursor= for the next page
+    - count is the trace's total number of annotations
+    
+    Responses carry an ETag; send it back in If-None-Match to get a
+    304 when no annotation has been added since.
+    """
+    after = None
+    if cursor:
+        try:
+            after = decode_annotation_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    variant = f"annotations:{limit}:{cursor or ''}"
+    if_none_match = request.headers.get("if-none-match")
+    
+    # Answer revalidations of cached traces without reading the full trace
+    if if_none_match:
+        version = await DecisionService.get_cached_version(decision_id)
+        if version and etag_matches(if_none_match, make_etag(version, variant)):
+            return not_modified(make_etag(version, variant))
+    
+    trace = await AnnotationService.get_trace_summary(decision_id)
     
     if not trace:
         raise HTTPException(
@@ -47,8 +170,20 @@ async def get_annotations(decision_id: str):
             detail=f"Decision trace {decision_id} not found"
         )
     
-    return {
-        "decision_id": decision_id,
-        "annotations": trace.review_notes,
-        "count": len(trace.review_notes)
-    }
\ No newline at end of file
+    summary, version = trace
+    etag = make_etag(version, variant)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    
+    annotations, next_cursor = await AnnotationService.get_annotations(decision_id, limit, after)
+    
+    return TraceJSONResponse(
+        {
+            "decision_id": decision_id,
+            "annotations": annotations,
+            "count": summary.get("count", 0),
+            "has_more": next_cursor is not None,
+            "next_cursor": next_cursor
+        },
+        headers={"ETag": etag, "Cache-Control": "no-cache"}
+    )
@@ -2,14 +2,41 @@
 API endpoints for decision management
 """
 
-from fastapi import APIRouter, HTTPException, status
-from typing import Dict, Any
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from typing import Dict, Any, List, Optional
+from datetime import datetime, timedelta
+import tempfile
 
-from app.models.decision import DecisionTrace, DecisionTraceCreate
+from app.core import integrity
+from app.core.config import settings
+from app.api.v1.dependencies import fieldset_params, not_modified
+from app.core.background import spawn
+from app.core.projection import FieldSet
+from app.core.serialization import TraceJSONResponse
+from app.core.trace_cache import etag_matches, fieldset_variant, make_etag
+from app.models.decision import (
+    BatchIngestResponse,
+    BatchItemResult,
+    BulkVerifyRequest,
+    DecisionTrace,
+    DecisionTraceCreate,
+    StreamIngestResponse,
+    TraceBatchRequest
+)
 from app.services.decision_service import DecisionService
+from app.services.seal_service import SealService
+from app.services.verification_service import VerificationService
 
 router = APIRouter()
 
+# Messages for the single-trace verify endpoint, by verification result
+VERIFY_MESSAGES = {
+    integrity.VALID: "Hash verification successful",
+    integrity.MISMATCH: "Hash mismatch - data may be corrupted",
+    integrity.LEGACY: "Trace predates versioned hashes - its hash can't be verified",
+}
+
 
 @router.post("/ingest", response_model=DecisionTrace, status_code=status.HTTP_201_CREATED)
 async def ingest_decision(trace: DecisionTraceCreate):
@@ -33,8 +60,141 @@ async def ingest_decision(trace: DecisionTraceCreate):
         )
 
 
+@router.post("/ingest/batch", response_model=BatchIngestResponse)
+async def ingest_decision_batch(traces: List[Dict[str, Any]] = Body(...)):
+    """
+    Ingest many decision traces in one request
+    
+    Accepts a JSON array of decision traces. Each item is validated,
+    hashed and assigned an ID; the batch is then written with a single
+    database round trip and a single search bulk request.
+    
+    Results are reported per item, in request order, so one invalid
+    record does not reject the rest of the batch.
+    """
+    if len(traces) > settings.INGEST_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batch size {len(traces)} exceeds limit of {settings.INGEST_BATCH_MAX_SIZE}"
+        )
+    
+    try:
+        return await DecisionService.create_decision_traces_batch(traces)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to ingest batch: {str(e)}"
+        )
+
+
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/ndjson")
+
+
+@router.post("/ingest/stream", response_model=StreamIngestResponse)
+async def ingest_decision_stream(
+    request: Request,
+    report: str = Query("summary", regex="^(summary|lines)$", description="Return a summary or one result per line")
+):
+    """
+    Ingest a newline-delimited JSON stream of decision traces
+    
+    The request body is read incrementally and written in rolling
+    batches, so memory use stays flat regardless of upload size.
+    
+    - report=summary: counts plus the first failed lines
+    - report=lines: an NDJSON response with one result per input line
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type not in NDJSON_MEDIA_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Expected an application/x-ndjson request body"
+        )
+    
+    errors: List[BatchItemResult] = []
+    # Per-line results spill to disk past 1 MB instead of accumulating in memory
+    spool = tempfile.SpooledTemporaryFile(max_size=1024 * 1024, mode="w+b")
+    
+    async def on_result(result: BatchItemResult):
+        if report == "lines":
+            spool.write(result.json().encode() + b"\n")
+        elif result.status != "created" and len(errors) < settings.INGEST_STREAM_MAX_REPORTED_ERRORS:
+            errors.append(result)
+    
+    try:
+        summary = await DecisionService.ingest_ndjson(
+            request.stream(),
+            batch_size=settings.INGEST_STREAM_BATCH_SIZE,
+            max_line_bytes=settings.INGEST_STREAM_MAX_LINE_BYTES,
+            on_result=on_result
+        )
+    except Exception as e:
+        spool.close()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to ingest stream: {str(e)}"
+        )
+    
+    if report == "summary":
+        spool.close()
+        return StreamIngestResponse(errors=errors, **summary)
+    
+    def iter_results():
+        try:
+            spool.seek(0)
+            for line in spool:
+                yield line
+        finally:
+            spool.close()
+    
+    return StreamingResponse(
+        iter_results(),
+        media_type="application/x-ndjson",
+        headers={f"X-Ingest-{key.capitalize()}": str(value) for key, value in summary.items()}
+    )
+
+
+@router.post("/trace/batch")
+async def get_decision_traces_batch(
+    request: TraceBatchRequest,
+    fieldset: Optional[FieldSet] = Depends(fieldset_params)
+):
+    """
+    Retrieve many decision traces in one request
+    
+    Accepts up to TRACE_BATCH_MAX_SIZE decision IDs. Results are
+    returned in request order, one per ID, with found=false for IDs
+    that don't exist. Supports fields= and exclude= like /trace/{id}.
+    """
+    if len(request.decision_ids) > settings.TRACE_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batch size {len(request.decision_ids)} exceeds limit of {settings.TRACE_BATCH_MAX_SIZE}"
+        )
+    
+    traces = await DecisionService.get_decision_documents(request.decision_ids, fieldset)
+    
+    results = []
+    for decision_id in request.decision_ids:
+        trace = traces.get(decision_id)
+        if trace is None:
+            results.append({"decision_id": decision_id, "found": False, "trace": None})
+        else:
+            results.append({"decision_id": decision_id, "found": True, "trace": trace})
+    
+    return TraceJSONResponse({
+        "results": results,
+        "found": sum(1 for item in results if item["found"]),
+        "missing": sum(1 for item in results if not item["found"])
+    })
+
+
 @router.get("/trace/{decision_id}", response_model=DecisionTrace)
-async def get_decision_trace(decision_id: str):
+async def get_decision_trace(
+    decision_id: str,
+    request: Request,
+    fieldset: Optional[FieldSet] = Depends(fieldset_params)
+):
     """
     Retrieve full decision trace by ID
     
@@ -44,16 +204,106 @@ async def get_decision_trace(decision_id: str):
     - Decision output
     - All review notes
     - Hash verification data
+    
+    Use fields= or exclude= to return only part of the trace.
+    Responses carry an ETag; send it back in If-None-Match to get a
+    304 when the trace hasn't changed.
     """
-    trace = await DecisionService.get_decision_trace(decision_id)
+    variant = fieldset_variant(fieldset)
+    if_none_match = request.headers.get("if-none-match")
     
-    if not trace:
+    # Answer revalidations of cached traces without reading the full trace
+    if if_none_match:
+        version = await DecisionService.get_cached_version(decision_id)
+        if version and etag_matches(if_none_match, make_etag(version, variant)):
+            return not_modified(make_etag(version, variant))
+    
+    result = await DecisionService.get_versioned_document(decision_id, fieldset)
+    
+    if not result:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Decision trace {decision_id} not found"
         )
     
-    return trace
+    trace, version = result
+    etag = make_etag(version, variant)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    
+    # Stored documents are already valid; skip response_model re-validation
+    return TraceJSONResponse(trace, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+
+@router.post("/verify/bulk", status_code=status.HTTP_202_ACCEPTED)
+async def start_bulk_verification(request: BulkVerifyRequest):
+    """
+    Start a bulk integrity verification job
+    
+    Verifies every trace matching the filters in the background.
+    Poll GET /verify/bulk/{job_id} for progress, throughput and
+    mismatched decision IDs. Traces stored before hashes were versioned
+    can't be verified; they are counted as legacy, not as mismatches.
+    """
+    filters = request.dict()
+    if request.risk_level:
+        filters["risk_level"] = request.risk_level.value
+    
+    job = await VerificationService.create_job(filters)
+    spawn(
+        VerificationService.run_job(job["_id"], settings.VERIFY_BATCH_SIZE, settings.VERIFY_MAX_IN_FLIGHT),
+        name=f"verify-{job['_id']}"
+    )
+    
+    return {"job_id": job["_id"], "status": job["status"], "total": job["total"]}
+
+
+@router.get("/verify/bulk/{job_id}")
+async def get_bulk_verification(job_id: str, mismatch_limit: int = Query(100, ge=0, le=10000)):
+    """
+    Get progress of a bulk verification job
+    
+    Returns status, documents checked, mismatched and legacy
+    (unverifiable) counts, throughput and the first mismatched
+    decision IDs.
+    """
+    job = await VerificationService.get_job(job_id, mismatch_limit=mismatch_limit)
+    
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Verification job {job_id} not found"
+        )
+    
+    return job
+
+
+@router.post("/verify/bulk/{job_id}/resume", status_code=status.HTTP_202_ACCEPTED)
+async def resume_bulk_verification(job_id: str):
+    """
+    Resume an interrupted or failed bulk verification job from its last checkpoint
+    """
+    job = await VerificationService.get_job(job_id, mismatch_limit=0)
+    
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Verification job {job_id} not found"
+        )
+    # A running job that stopped checkpointing belonged to a worker that died
+    stale = job["updated_at"] < datetime.utcnow() - timedelta(minutes=5)
+    if job["status"] == "completed" or (job["status"] == "running" and not stale):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Verification job {job_id} is {job['status']}"
+        )
+    
+    spawn(
+        VerificationService.run_job(job_id, settings.VERIFY_BATCH_SIZE, settings.VERIFY_MAX_IN_FLIGHT),
+        name=f"verify-{job_id}"
+    )
+    
+    return {"job_id": job_id, "status": "running"}
 
 
 @router.get("/verify/{decision_id}")
@@ -64,9 +314,9 @@ async def verify_decision_integrity(decision_id: str):
     Validates that the decision trace has not been tampered with
     by recalculating and comparing the hash.
     """
-    is_valid = await DecisionService.verify_hash(decision_id)
+    result = await DecisionService.verify_hash(decision_id)
     
-    if is_valid is None:
+    if result is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Decision trace {decision_id} not found"
@@ -74,11 +324,35 @@ async def verify_decision_integrity(decision_id: str):
     
     return {
         "decision_id": decision_id,
-        "is_valid": is_valid,
-        "message": "Hash verification successful" if is_valid else "Hash mismatch - data may be corrupted"
+        # None when the trace predates versioned hashes and can't be checked
+        "is_valid": None if result == integrity.LEGACY else result == integrity.VALID,
+        "status": result,
+        "message": VERIFY_MESSAGES[result]
     }
 
 
+@router.get("/verify/{decision_id}/proof")
+async def get_inclusion_proof(decision_id: str):
+    """
+    Get a Merkle inclusion proof for a sealed decision trace
+    
+    Proves the trace's hash is part of its time window's sealed root
+    with O(log n) sibling hashes. The proof can be verified offline:
+    hash the leaf as SHA-256(0x00 || trace_hash), then for each step
+    combine with the sibling as SHA-256(0x01 || left || right), and
+    compare the result with the root.
+    """
+    proof = await SealService.get_inclusion_proof(decision_id)
+    
+    if proof is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Decision trace {decision_id} not found or not yet sealed"
+        )
+    
+    return proof
+
+
 @router.get("/statistics")
 async def get_statistics() -> Dict[str, Any]:
     """
@@ -88,6 +362,7 @@ async def get_statistics() -> Dict[str, Any]:
     - Total decisions
     - Breakdown by risk level
     - Breakdown by source system
+    - rebuilding: true, with empty counts, while the counters are first built
     """
     try:
         stats = await DecisionService.get_statistics()
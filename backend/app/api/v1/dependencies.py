@@ -0,0 +1,31 @@
+"""
+Shared API dependencies
+"""
+
+from fastapi import HTTPException, Query, Response, status
+from typing import Optional
+
+from app.core.projection import FieldSet, parse_fieldset
+
+
+def fieldset_params(
+    fields: Optional[str] = Query(
+        None, description="Comma-separated fields to return, e.g. decision_id,risk_level,timestamp"
+    ),
+    exclude: Optional[str] = Query(
+        None, description="Comma-separated fields to leave out, e.g. input_payload,output"
+    )
+) -> Optional[FieldSet]:
+    """Parse sparse fieldset parameters"""
+    try:
+        return parse_fieldset(fields, exclude)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+def not_modified(etag: str) -> Response:
+    """Empty 304 answer to a conditional GET whose ETag matched"""
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": "no-cache"}
+    )
@@ -2,11 +2,19 @@
 API endpoints for search and analytics
 """
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from typing import Optional
 from datetime import datetime
 
-from app.models.decision import SearchResponse, RiskLevel
+from app.api.v1.dependencies import fieldset_params
+from app.core.export_formats import WRITERS, export_columns
+from app.core.pagination import decode_cursor
+from app.core.projection import FieldSet
+from app.core.serialization import TraceJSONResponse
+from app.models.decision import ExportFormat, SearchResponse, RiskLevel, TotalMode
+from app.services.export_service import ExportService
+from app.services.rollup_service import RollupService
 from app.services.search_service import SearchService
 
 router = APIRouter()
@@ -20,7 +28,10 @@ async def search_decisions(
     end_date: Optional[datetime] = Query(None, description="Filter by end date"),
     search_text: Optional[str] = Query(None, description="Full-text search query"),
     limit: int = Query(20, ge=1, le=100, description="Number of results to return"),
-    offset: int = Query(0, ge=0, description="Offset for pagination")
+    offset: int = Query(0, ge=0, description="Offset for pagination"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    total_mode: TotalMode = Query(TotalMode.exact, description="exact, estimate or none"),
+    fieldset: Optional[FieldSet] = Depends(fieldset_params)
 ):
     """
     Search decision traces with filters
@@ -30,8 +41,28 @@ async def search_decisions(
     - Risk level filtering
     - Date range filtering
     - Full-text search
-    - Pagination
+    - Pagination: pass next_cursor back as cursor= for constant-cost
+      deep paging; offset= remains for shallow pages
+    - total_mode=estimate or none to skip exact counting on large
+      result sets; total_relation is "eq", "gte" or "approx"
+    - Sparse fieldsets via fields= or exclude=
+    
+    engine tells which store served the results: "elasticsearch", or
+    "mongodb" while search is unavailable. MongoDB full-text search
+    covers rule names, the decision and MONGO_TEXT_PAYLOAD_FIELDS.
     """
+    after = None
+    if cursor:
+        if offset:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Use either cursor or offset, not both"
+            )
+        try:
+            after = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
     results = await SearchService.search_decisions(
         source_system=source_system,
         risk_level=risk_level,
@@ -39,10 +70,61 @@ async def search_decisions(
         end_date=end_date,
         search_text=search_text,
         limit=limit,
-        offset=offset
+        offset=offset,
+        fieldset=fieldset,
+        after=after,
+        total_mode=total_mode
     )
     
-    return results
+    # Stored documents are already valid; skip response_model re-validation
+    return TraceJSONResponse(results)
+
+
+@router.get("/export")
+async def export_decisions(
+    format: ExportFormat = Query(ExportFormat.ndjson, description="File format"),
+    source_system: Optional[str] = Query(None, description="Filter by source system"),
+    risk_level: Optional[RiskLevel] = Query(None, description="Filter by risk level"),
+    start_date: Optional[datetime] = Query(None, description="Filter by start date"),
+    end_date: Optional[datetime] = Query(None, description="Filter by end date"),
+    search_text: Optional[str] = Query(None, description="Full-text search query"),
+    fieldset: Optional[FieldSet] = Depends(fieldset_params)
+):
+    """
+    Export every decision trace matching the search filters
+    
+    Takes the same filters as /search and streams all matches with
+    chunked transfer encoding:
+    - ndjson: one trace per line
+    - csv: one row per trace; nested fields as JSON strings
+    - parquet: one row group per page (requires pyarrow on the server)
+    - Sparse fieldsets via fields= or exclude=
+    
+    Results come from an Elasticsearch point-in-time snapshot, or from
+    MongoDB when Elasticsearch is unavailable.
+    """
+    try:
+        writer = WRITERS[format.value](export_columns(fieldset))
+    except ImportError:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=f"{format.value} export is not available on this server"
+        )
+    
+    filename = f"decision_traces_{datetime.utcnow():%Y%m%dT%H%M%SZ}.{writer.extension}"
+    return StreamingResponse(
+        ExportService.stream_export(
+            writer,
+            source_system=source_system,
+            risk_level=risk_level,
+            start_date=start_date,
+            end_date=end_date,
+            search_text=search_text,
+            fieldset=fieldset
+        ),
+        media_type=writer.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
 
 
 @router.get("/analytics/risk-distribution")
@@ -71,12 +153,65 @@ async def get_system_distribution():
     return {"system_distribution": distribution}
 
 
+@router.get("/analytics/timeseries")
+async def get_timeseries(
+    start_date: datetime = Query(..., description="Range start (inclusive)"),
+    end_date: datetime = Query(..., description="Range end (exclusive)"),
+    interval: str = Query("1h", description="Point size, e.g. 1m, 15m, 1h, 1d, 7d"),
+    source_system: Optional[str] = Query(None, description="Filter by source system"),
+    risk_level: Optional[RiskLevel] = Query(None, description="Filter by risk level"),
+    group_by: Optional[str] = Query(None, regex="^(source_system|risk_level)$", description="Split points by source_system or risk_level")
+):
+    """
+    Get decision trends over time
+    
+    Returns one point per interval with:
+    - Decision count
+    - Average, minimum and maximum confidence
+    - Counts per output decision
+    
+    Served from minute, hour and day rollups maintained at ingest.
+    Minute rollups are kept for a limited time. Only decisions in
+    [start_date, end_date) are counted; points whose interval is cut
+    by either bound are marked partial.
+    """
+    if end_date <= start_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end_date must be after start_date"
+        )
+    
+    try:
+        step = RollupService.parse_interval(interval)
+        series = await RollupService.timeseries(
+            start_date,
+            end_date,
+            step,
+            source_system=source_system,
+            risk_level=risk_level.value if risk_level else None,
+            group_by=group_by
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        "interval": interval,
+        "series": series
+    }
+
+
 @router.get("/analytics/high-risk-recent")
-async def get_recent_high_risk(limit: int = Query(10, ge=1, le=50)):
+async def get_recent_high_risk(
+    limit: int = Query(10, ge=1, le=50),
+    fieldset: Optional[FieldSet] = Depends(fieldset_params)
+):
     """
     Get recent high-risk decisions
     
-    Returns most recent decisions with risk level 'high' or 'critical'
+    Returns most recent decisions with risk level 'high' or 'critical'.
+    Supports sparse fieldsets via fields= or exclude=.
     """
-    decisions = await SearchService.get_recent_high_risk(limit=limit)
-    return {"high_risk_decisions": decisions, "count": len(decisions)}
\ No newline at end of file
+    decisions = await SearchService.get_recent_high_risk(limit=limit, fieldset=fieldset)
+    return TraceJSONResponse({"high_risk_decisions": decisions, "count": len(decisions)})
\ No newline at end of file
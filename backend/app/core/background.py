@@ -0,0 +1,59 @@
+"""
+Background job and process pool management
+"""
+
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Coroutine, Optional, Set
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Strong references keep running jobs from being garbage collected
+_tasks: Set[asyncio.Task] = set()
+
+# Global process pool for CPU-bound work
+process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def spawn(coro: Coroutine, name: str) -> asyncio.Task:
+    """Run a coroutine as a tracked background job"""
+    task = asyncio.create_task(coro, name=name)
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return task
+
+
+async def cancel_all():
+    """Cancel running background jobs and wait for them to record their state"""
+    for task in list(_tasks):
+        task.cancel()
+    if _tasks:
+        await asyncio.gather(*_tasks, return_exceptions=True)
+        logger.info("Cancelled background jobs")
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Get the shared process pool, creating it on first use"""
+    global process_pool
+
+    if process_pool is None:
+        # spawn avoids forking a process that holds database client threads
+        process_pool = ProcessPoolExecutor(
+            max_workers=settings.PROCESS_POOL_WORKERS or None,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return process_pool
+
+
+def shutdown_process_pool():
+    """Shut down the shared process pool"""
+    global process_pool
+
+    if process_pool:
+        process_pool.shutdown(cancel_futures=True)
+        process_pool = None
+        logger.info("Shut down process pool")
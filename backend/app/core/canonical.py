@@ -0,0 +1,62 @@
+"""
+Canonical encodings of trace data for hashing
+
+Each encoding is versioned and frozen once released: the version used is
+stored next to every hash so traces keep verifying after a newer
+encoding becomes the default. Traces stored before versioning have no
+hash_version and can't be verified; see integrity.verify_document.
+
+Version 1: json.dumps(sort_keys=True, default=str). Datetimes stringify
+    as "YYYY-MM-DD HH:MM:SS[.ffffff]".
+Version 2: compact JSON with sorted keys, encoded by orjson. Naive
+    datetimes are treated as UTC and written as RFC 3339 with a "Z"
+    suffix, at millisecond precision for top-level fields (the precision
+    MongoDB stores). Floats use the shortest round-trip representation.
+    Values JSON cannot represent fall back to str().
+"""
+
+import json
+from datetime import datetime
+from typing import Any, Dict
+
+import orjson
+
+CURRENT_VERSION = 2
+
+_ORJSON_OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z
+
+
+def _fallback(value: Any) -> str:
+    return str(value)
+
+
+def _truncate_millis(value: Any) -> Any:
+    if isinstance(value, datetime) and value.microsecond % 1000:
+        return value.replace(microsecond=value.microsecond // 1000 * 1000)
+    return value
+
+
+def encode_v1(data: Dict[str, Any]) -> bytes:
+    """Legacy encoding"""
+    return json.dumps(data, sort_keys=True, default=str).encode()
+
+
+def encode_v2(data: Dict[str, Any]) -> bytes:
+    """Deterministic orjson encoding"""
+    data = {key: _truncate_millis(value) for key, value in data.items()}
+    return orjson.dumps(data, default=_fallback, option=_ORJSON_OPTIONS)
+
+
+ENCODERS = {
+    1: encode_v1,
+    2: encode_v2,
+}
+
+
+def encode(data: Dict[str, Any], version: int = CURRENT_VERSION) -> bytes:
+    """Encode trace data with a given canonical encoding version"""
+    try:
+        encoder = ENCODERS[version]
+    except KeyError:
+        raise ValueError(f"Unknown canonical encoding version: {version}")
+    return encoder(data)
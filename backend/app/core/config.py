@@ -2,15 +2,73 @@
 Application configuration
 """
 from pydantic import BaseSettings
-from typing import List
+from typing import Dict, List, Optional
 
 
 class Settings(BaseSettings):
     """Application settings"""
     MONGODB_URL: str = "mongodb://localhost:27017"
     DATABASE_NAME: str = "decision_audit"
+    MONGODB_MIN_POOL_SIZE: int = 10
+    MONGODB_MAX_POOL_SIZE: int = 100
+    ELASTICSEARCH_URL: str = "http://localhost:9200"
+    ELASTICSEARCH_INDEX: str = "decision_traces"
     SECRET_KEY: str = "your-secret-key"
     CORS_ORIGINS: List[str] = ["*"]
+    INGEST_BATCH_MAX_SIZE: int = 5000
+    INGEST_STREAM_BATCH_SIZE: int = 1000
+    INGEST_STREAM_MAX_LINE_BYTES: int = 10 * 1024 * 1024
+    INGEST_STREAM_MAX_REPORTED_ERRORS: int = 100
+    ES_INDEXER_QUEUE_SIZE: int = 10000
+    ES_INDEXER_BATCH_SIZE: int = 500
+    ES_INDEXER_FLUSH_INTERVAL: float = 1.0
+    ES_INDEXER_MAX_RETRIES: int = 5
+    ES_INDEXER_BACKOFF_BASE: float = 0.5
+    KAFKA_BOOTSTRAP_SERVERS: str = "localhost:9092"
+    KAFKA_INGEST_TOPIC: str = "decision-traces"
+    KAFKA_CONSUMER_GROUP: str = "decision-audit-ingest"
+    KAFKA_BATCH_SIZE: int = 500
+    KAFKA_BATCH_TIMEOUT: float = 1.0
+    KAFKA_MAX_ATTEMPTS: int = 5
+    SEAL_WINDOW_HOURS: int = 24
+    SEAL_GRACE_MINUTES: int = 10
+    PROCESS_POOL_WORKERS: int = 0
+    VERIFY_BATCH_SIZE: int = 2000
+    VERIFY_MAX_IN_FLIGHT: int = 8
+    EXPORT_PAGE_SIZE: int = 1000
+    EXPORT_PIT_KEEP_ALIVE: str = "2m"
+    SEARCH_TOTAL_ESTIMATE_THRESHOLD: int = 10000
+    SEARCH_COUNT_CACHE_TTL: float = 30.0
+    SEARCH_COUNT_CACHE_SIZE: int = 1024
+    ROLLUP_MINUTE_RETENTION_DAYS: int = 14
+    ROLLUP_MAX_BUCKETS: int = 100000
+    REDIS_URL: Optional[str] = None
+    REDIS_SOCKET_TIMEOUT: float = 0.5
+    SEARCH_CACHE_ENABLED: bool = True
+    SEARCH_CACHE_TTL: float = 30.0
+    SEARCH_CACHE_SIZE: int = 512
+    TRACE_CACHE_TTL: float = 300.0
+    TRACE_CACHE_SIZE: int = 10000
+    TRACE_BATCH_MAX_SIZE: int = 1000
+    ANNOTATE_BULK_BATCH_SIZE: int = 500
+    ANNOTATE_BULK_MAX_IDS: int = 100000
+    ES_PARTITION_INTERVAL: str = "monthly"
+    ES_PARTITION_SHARDS: int = 1
+    ES_PARTITION_REPLICAS: int = 1
+    ES_ROUTING_MAX_INDICES: int = 60
+    ES_PARTITION_READ_ONLY_AFTER: int = 3
+    ES_LEGACY_CHECK_INTERVAL: float = 30.0
+    ES_PAYLOAD_MAPPING: str = "dynamic"
+    ES_PROMOTED_FIELDS: Dict[str, Dict[str, str]] = {}
+    REINDEX_SLICES: int = 8
+    REINDEX_CONCURRENCY: int = 8
+    REINDEX_BATCH_SIZE: int = 2000
+    MONGO_TEXT_PAYLOAD_FIELDS: List[str] = [
+        "output.reason",
+        "output.flags",
+        "input_payload.merchant",
+        "input_payload.location"
+    ]
     
     class Config:
         env_file = ".env"
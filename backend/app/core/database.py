@@ -3,7 +3,7 @@ MongoDB database connection and utilities
 """
 
 from motor.motor_asyncio import AsyncIOMotorClient
-from typing import Optional
+from typing import List, Optional
 import logging
 
 from app.core.config import settings
@@ -65,12 +65,83 @@ async def create_indexes():
     await traces.create_index("risk_level")
     await traces.create_index("timestamp")
     await traces.create_index("hash")
-    await traces.create_index([("source_system", 1), ("timestamp", -1)])
-    await traces.create_index([("risk_level", 1), ("timestamp", -1)])
+    
+    # Stream ingest stores each record once, however often it is delivered
+    await traces.create_index(
+        "ingest_key", unique=True, partialFilterExpression={"ingest_key": {"$exists": True}}
+    )
+    
+    # Keyset pagination sorts on (timestamp, decision_id)
+    await traces.create_index([("timestamp", -1), ("decision_id", -1)])
+    await traces.create_index([("source_system", 1), ("timestamp", -1), ("decision_id", -1)])
+    await traces.create_index([("risk_level", 1), ("timestamp", -1), ("decision_id", -1)])
+    
+    # Full-text search when Elasticsearch is unavailable
+    await ensure_text_index(db)
+    
+    # Merkle seal indexes
+    await db.merkle_nodes.create_index(
+        [("window_id", 1), ("level", 1), ("index", 1)], unique=True
+    )
+    await db.merkle_nodes.create_index("decision_id", sparse=True)
+    
+    # Rollup indexes; only minute buckets carry expires_at
+    await db.decision_rollups.create_index(
+        [("granularity", 1), ("bucket", 1), ("source_system", 1), ("risk_level", 1)], unique=True
+    )
+    await db.decision_rollups.create_index("expires_at", expireAfterSeconds=0)
+    
+    # Annotation indexes; pages are read newest first per trace
+    await db.decision_annotations.create_index(
+        [("decision_id", 1), ("timestamp", -1), ("_id", -1)]
+    )
+    await db.decision_annotations.create_index(
+        [("job_id", 1), ("decision_id", 1)], sparse=True
+    )
     
     logger.info("Database indexes created successfully")
 
 
+TEXT_INDEX_NAME = "trace_text"
+
+
+def text_index_fields() -> List[str]:
+    """Trace fields covered by the text index"""
+    return ["rules_triggered.rule_name", "output.decision", *settings.MONGO_TEXT_PAYLOAD_FIELDS]
+
+
+async def ensure_text_index(db, rebuild: bool = False):
+    """
+    Create the decision_traces text index
+
+    A collection has at most one text index, so when
+    MONGO_TEXT_PAYLOAD_FIELDS changes the old one has to be dropped and
+    the new one built in its place. That blocks on large collections,
+    so it only happens with rebuild (scripts/init_db.py); otherwise the
+    mismatch is logged and the old index kept.
+    """
+    traces = db.decision_traces
+    fields = text_index_fields()
+    
+    for name, info in (await traces.index_information()).items():
+        if "weights" in info and set(info["weights"]) != set(fields):
+            if not rebuild:
+                logger.warning(
+                    f"Text index {name} does not cover {', '.join(fields)}; "
+                    f"run scripts/init_db.py to rebuild it"
+                )
+                return
+            logger.warning(f"Rebuilding text index {name} over {', '.join(fields)}")
+            await traces.drop_index(name)
+    
+    # No stemming or stop words, like the search index's standard analyzer
+    await traces.create_index(
+        [(field, "text") for field in fields],
+        name=TEXT_INDEX_NAME,
+        default_language="none"
+    )
+
+
 async def get_next_sequence(name: str) -> int:
     """Get next sequence number for ID generation"""
     db = get_database()
@@ -3,10 +3,23 @@ Elasticsearch client and utilities
 """
 
 from elasticsearch import AsyncElasticsearch
+from datetime import datetime
 from typing import Optional
+import asyncio
 import logging
 
+from app.core.background import spawn
 from app.core.config import settings
+from app.core.payload_mapping import payload_properties
+from app.core.search_indices import (
+    INTERVALS,
+    index_pattern,
+    legacy_index,
+    partition_name,
+    read_alias,
+    use_legacy_index,
+    write_alias
+)
 
 logger = logging.getLogger(__name__)
 
@@ -29,8 +42,12 @@ async def connect_elasticsearch():
         info = await es_client.info()
         logger.info(f"Connected to Elasticsearch version {info['version']['number']}")
         
-        # Create index if not exists
+        # Create indices if not exists
         await create_index()
+        await create_annotations_index()
+        
+        if legacy_index():
+            spawn(watch_legacy_index(settings.ES_LEGACY_CHECK_INTERVAL), "watch-legacy-index")
         
     except Exception as e:
         logger.error(f"Failed to connect to Elasticsearch: {e}")
@@ -53,56 +70,169 @@ def get_es_client():
     return es_client
 
 
+# Mapping shared by every trace index, apart from the payload fields
+TRACES_MAPPING = {
+    "properties": {
+        "decision_id": {"type": "keyword"},
+        "source_system": {"type": "keyword"},
+        "rules_triggered": {
+            "type": "nested",
+            "properties": {
+                "rule_id": {"type": "keyword"},
+                "rule_name": {"type": "text"},
+                "condition": {"type": "text"},
+                "result": {"type": "boolean"}
+            }
+        },
+        "confidence": {"type": "float"},
+        "risk_level": {"type": "keyword"},
+        "timestamp": {"type": "date"},
+        "hash": {"type": "keyword"},
+        "hash_version": {"type": "integer"},
+        "annotation_summary": {
+            "properties": {
+                "count": {"type": "integer"},
+                "last_note": {
+                    "properties": {
+                        "reviewer": {"type": "keyword"},
+                        "note": {"type": "text"},
+                        "timestamp": {"type": "date"},
+                        "tags": {"type": "keyword"}
+                    }
+                }
+            }
+        },
+        "created_at": {"type": "date"},
+        "updated_at": {"type": "date"}
+    }
+}
+
+
+def trace_mappings(payload_mapping: Optional[str] = None) -> dict:
+    """Trace index mappings with the configured (or given) payload mapping"""
+    return {"properties": {**TRACES_MAPPING["properties"], **payload_properties(payload_mapping)}}
+
+
+def trace_index_settings() -> dict:
+    return {
+        "number_of_shards": settings.ES_PARTITION_SHARDS,
+        "number_of_replicas": settings.ES_PARTITION_REPLICAS,
+        "refresh_interval": "5s"
+    }
+
+
 async def create_index():
     """Create Elasticsearch index with mapping"""
-    client = get_es_client()
+    await ensure_trace_indices(get_es_client())
+
+
+async def ensure_trace_indices(client: AsyncElasticsearch) -> str:
+    """
+    Set up trace indices; returns the index or partition now written to
+    
+    Partitioned: installs the index template and points the write alias
+    at the current partition. Unpartitioned: creates the single index.
+    """
     index_name = settings.ELASTICSEARCH_INDEX
     
-    # Check if index exists
-    exists = await client.indices.exists(index=index_name)
+    if settings.ES_PARTITION_INTERVAL not in INTERVALS:
+        if not await client.indices.exists(index=index_name):
+            await client.indices.create(
+                index=index_name, mappings=trace_mappings(), settings=trace_index_settings()
+            )
+            logger.info(f"Created Elasticsearch index: {index_name}")
+        else:
+            logger.info(f"Elasticsearch index already exists: {index_name}")
+        return index_name
     
-    if not exists:
-        # Index mapping
-        mapping = {
-            "mappings": {
-                "properties": {
-                    "decision_id": {"type": "keyword"},
-                    "source_system": {"type": "keyword"},
-                    "input_payload": {"type": "object", "enabled": True},
-                    "rules_triggered": {
-                        "type": "nested",
-                        "properties": {
-                            "rule_id": {"type": "keyword"},
-                            "rule_name": {"type": "text"},
-                            "condition": {"type": "text"},
-                            "result": {"type": "boolean"}
-                        }
-                    },
-                    "output": {"type": "object", "enabled": True},
-                    "confidence": {"type": "float"},
-                    "risk_level": {"type": "keyword"},
-                    "timestamp": {"type": "date"},
-                    "hash": {"type": "keyword"},
-                    "review_notes": {
-                        "type": "nested",
-                        "properties": {
-                            "reviewer": {"type": "keyword"},
-                            "note": {"type": "text"},
-                            "timestamp": {"type": "date"},
-                            "tags": {"type": "keyword"}
-                        }
-                    },
-                    "created_at": {"type": "date"},
-                    "updated_at": {"type": "date"}
-                }
-            },
-            "settings": {
-                "number_of_shards": 3,
-                "number_of_replicas": 1
-            }
+    # A concrete index from before partitioning holds the alias name
+    if await client.indices.exists(index=index_name) and not await client.indices.exists_alias(name=index_name):
+        use_legacy_index()
+        logger.warning(
+            f"Elasticsearch index {index_name} is not partitioned; "
+            f"writing to it until scripts/reindex_search.py migrates it to partitions"
+        )
+        return index_name
+    
+    use_legacy_index(False)
+    await client.indices.put_index_template(
+        name=index_name,
+        index_patterns=[index_pattern()],
+        priority=100,
+        template={
+            "settings": trace_index_settings(),
+            "mappings": trace_mappings(),
+            "aliases": {read_alias(): {}}
         }
-        
-        await client.indices.create(index=index_name, body=mapping)
+    )
+    return await roll_write_alias(client)
+
+
+async def watch_legacy_index(interval: float):
+    """
+    Route writes to partitions once the legacy index has been migrated
+
+    scripts/reindex_search.py turns the legacy index's name into the
+    read alias while processes are still writing to it. Polling for that
+    switches this process to trace_index routing without a restart.
+    """
+    index_name = settings.ELASTICSEARCH_INDEX
+    while legacy_index():
+        await asyncio.sleep(interval)
+        try:
+            if es_client is not None and await es_client.indices.exists_alias(name=index_name):
+                use_legacy_index(False)
+                logger.info(f"Elasticsearch index {index_name} is now partitioned; writing to partitions")
+        except Exception as e:
+            logger.warning(f"Failed to check the layout of Elasticsearch index {index_name}: {e}")
+
+
+async def roll_write_alias(client: AsyncElasticsearch, now: Optional[datetime] = None) -> str:
+    """Create the current partition if needed and move the write alias onto it"""
+    current = partition_name(now or datetime.utcnow())
+    
+    # Another worker may create it first
+    if not await client.indices.exists(index=current):
+        await client.options(ignore_status=400).indices.create(index=current)
+        logger.info(f"Created Elasticsearch index: {current}")
+    
+    alias = write_alias()
+    holders = []
+    if await client.indices.exists_alias(name=alias):
+        holders = list((await client.indices.get_alias(name=alias)).body)
+    
+    if holders != [current]:
+        actions = [{"remove": {"index": index, "alias": alias}} for index in holders if index != current]
+        actions.append({"add": {"index": current, "alias": alias, "is_write_index": True}})
+        await client.indices.update_aliases(actions=actions)
+        logger.info(f"Moved alias {alias} to {current}")
+    
+    return current
+
+
+# Annotations are stored one document per note
+ANNOTATIONS_MAPPING = {
+    "mappings": {
+        "properties": {
+            "decision_id": {"type": "keyword"},
+            "reviewer": {"type": "keyword"},
+            "note": {"type": "text"},
+            "tags": {"type": "keyword"},
+            "timestamp": {"type": "date"}
+        }
+    },
+    "settings": {
+        "number_of_shards": 1,
+        "number_of_replicas": 1
+    }
+}
+
+
+async def create_annotations_index():
+    """Create the annotations index if it doesn't exist"""
+    client = get_es_client()
+    index_name = "decision_annotations"
+    
+    if not await client.indices.exists(index=index_name):
+        await client.indices.create(index=index_name, body=ANNOTATIONS_MAPPING)
         logger.info(f"Created Elasticsearch index: {index_name}")
-    else:
-        logger.info(f"Elasticsearch index already exists: {index_name}")
\ No newline at end of file
@@ -0,0 +1,203 @@
+"""
+Write-behind Elasticsearch indexer
+
+Owns a bounded asyncio queue of pending search writes and flushes them as
+size- or time-bounded bulk requests, so ingest latency no longer includes
+Elasticsearch latency.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from prometheus_client import Counter, Gauge
+
+from app.core.config import settings
+from app.core.elasticsearch_client import get_es_client
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+QUEUE_DEPTH = Gauge('es_indexer_queue_depth', 'Search writes waiting to be flushed')
+INDEX_LAG = Gauge('es_indexer_lag_seconds', 'Age of the oldest write in the last flushed batch')
+FLUSHED = Counter('es_indexer_flushed_total', 'Search writes flushed to Elasticsearch')
+DROPPED = Counter('es_indexer_dropped_total', 'Search writes dropped after exhausting retries')
+
+# Bulk item statuses worth retrying
+RETRYABLE_STATUSES = {429, 502, 503, 504}
+
+
+class IndexOperation(NamedTuple):
+    """A pending search write"""
+    action: str
+    index: str
+    doc_id: str
+    body: Dict[str, Any]
+    enqueued_at: float
+
+
+class ESIndexer:
+    """Background bulk indexer for Elasticsearch"""
+
+    def __init__(
+        self,
+        max_queue_size: int,
+        batch_size: int,
+        flush_interval: float,
+        max_retries: int,
+        backoff_base: float
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Start the flush loop"""
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Drain pending writes and stop the flush loop"""
+        if self._task is None:
+            return
+
+        # The sentinel is queued behind every pending write, so they all flush first
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+    async def index(self, index: str, doc_id: str, document: Dict[str, Any]):
+        """Queue a full document write"""
+        await self._enqueue(IndexOperation("index", index, doc_id, document, time.monotonic()))
+
+    async def update(self, index: str, doc_id: str, doc: Dict[str, Any]):
+        """Queue a partial document update"""
+        await self._enqueue(IndexOperation("update", index, doc_id, {"doc": doc}, time.monotonic()))
+
+    async def _enqueue(self, operation: IndexOperation):
+        # Blocks while the queue is full, applying backpressure to producers
+        await self._queue.put(operation)
+        QUEUE_DEPTH.set(self._queue.qsize())
+
+    async def _run(self):
+        """Collect batches from the queue and flush them"""
+        loop = asyncio.get_running_loop()
+        stopping = False
+
+        while not stopping:
+            operation = await self._queue.get()
+            if operation is None:
+                break
+
+            batch = [operation]
+            deadline = loop.time() + self.flush_interval
+
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    operation = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if operation is None:
+                    stopping = True
+                    break
+                batch.append(operation)
+
+            QUEUE_DEPTH.set(self._queue.qsize())
+
+            try:
+                await self._flush(batch)
+            except Exception as e:
+                logger.error(f"Unexpected error flushing {len(batch)} search writes: {e}", exc_info=True)
+
+            INDEX_LAG.set(time.monotonic() - batch[0].enqueued_at)
+
+    async def _flush(self, batch: List[IndexOperation]):
+        """Send a batch as one bulk request, retrying failed items with backoff"""
+        es_client = get_es_client()
+        pending = batch
+
+        for attempt in range(self.max_retries + 1):
+            operations = []
+            for operation in pending:
+                operations.append({operation.action: {"_index": operation.index, "_id": operation.doc_id}})
+                operations.append(operation.body)
+
+            try:
+                response = await es_client.bulk(operations=operations)
+            except Exception as e:
+                logger.warning(f"Bulk request of {len(pending)} search writes failed: {e}")
+                failed = pending
+            else:
+                failed = []
+                # Documents with a retried write; their later writes are retried
+                # behind it, since an update may have failed only because the
+                # document's index write hadn't landed yet
+                retried = set()
+                for operation, item in zip(pending, response["items"]):
+                    result = item[operation.action]
+                    key = (operation.index, operation.doc_id)
+                    if key in retried:
+                        failed.append(operation)
+                        continue
+                    if not result.get("error"):
+                        continue
+                    if result.get("status") in RETRYABLE_STATUSES:
+                        failed.append(operation)
+                        retried.add(key)
+                    else:
+                        DROPPED.inc()
+                        logger.error(
+                            f"Search write {operation.action} {operation.doc_id} rejected: {result['error']}"
+                        )
+
+            FLUSHED.inc(len(pending) - len(failed))
+            if not failed:
+                return
+
+            # Retry only the failed items, in order, before taking the next batch
+            pending = failed
+            if attempt < self.max_retries:
+                await asyncio.sleep(self.backoff_base * (2 ** attempt))
+
+        DROPPED.inc(len(pending))
+        logger.error(f"Dropped {len(pending)} search writes after {self.max_retries} retries")
+
+
+# Global indexer, one per worker process
+indexer: Optional[ESIndexer] = None
+
+
+async def start_indexer():
+    """Start the write-behind indexer"""
+    global indexer
+
+    indexer = ESIndexer(
+        max_queue_size=settings.ES_INDEXER_QUEUE_SIZE,
+        batch_size=settings.ES_INDEXER_BATCH_SIZE,
+        flush_interval=settings.ES_INDEXER_FLUSH_INTERVAL,
+        max_retries=settings.ES_INDEXER_MAX_RETRIES,
+        backoff_base=settings.ES_INDEXER_BACKOFF_BASE
+    )
+    await indexer.start()
+    logger.info("Started write-behind Elasticsearch indexer")
+
+
+async def stop_indexer():
+    """Drain and stop the write-behind indexer"""
+    global indexer
+
+    if indexer:
+        await indexer.stop()
+        indexer = None
+        logger.info("Stopped write-behind Elasticsearch indexer")
+
+
+def get_indexer() -> Optional[ESIndexer]:
+    """Get the running indexer, or None when writes should go straight to Elasticsearch"""
+    return indexer
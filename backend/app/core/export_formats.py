@@ -0,0 +1,183 @@
+"""
+Incremental file writers for trace exports
+
+Each writer turns pages of response-shaped trace documents into bytes
+as they arrive, so an export never holds more than one page in memory.
+Nested fields (input_payload, output, rules_triggered, ...) are written
+as JSON strings in the tabular formats.
+"""
+
+import csv
+import io
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence
+
+import orjson
+
+from app.core.serialization import TRACE_FIELDS
+
+if TYPE_CHECKING:
+    from app.core.projection import FieldSet
+
+TIMESTAMP_FIELDS = {"timestamp", "created_at", "updated_at"}
+
+
+def export_columns(fieldset: Optional["FieldSet"] = None) -> List[str]:
+    """Top-level trace fields an export with this fieldset contains, in schema order"""
+    if fieldset is None:
+        return list(TRACE_FIELDS)
+    roots = fieldset.roots()
+    if roots is not None:
+        return [name for name in TRACE_FIELDS if name in roots]
+    excluded = fieldset.excluded_roots()
+    return [name for name in TRACE_FIELDS if name not in excluded]
+
+
+def _to_datetime(value: Any) -> Optional[datetime]:
+    # Elasticsearch sources hold isoformat strings, MongoDB documents datetimes
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
+
+
+def _to_text(value: Any) -> Any:
+    if isinstance(value, (dict, list)):
+        return orjson.dumps(value, default=str).decode()
+    return value
+
+
+class NDJSONWriter:
+    """One JSON document per line"""
+    media_type = "application/x-ndjson"
+    extension = "ndjson"
+
+    def __init__(self, columns: Sequence[str]):
+        self.columns = columns
+
+    def start(self) -> bytes:
+        return b""
+
+    def write(self, rows: List[Dict[str, Any]]) -> bytes:
+        return b"".join(orjson.dumps(row, default=str) + b"\n" for row in rows)
+
+    def finish(self) -> bytes:
+        return b""
+
+
+class CSVWriter:
+    """Header row plus one row per trace"""
+    media_type = "text/csv"
+    extension = "csv"
+
+    def __init__(self, columns: Sequence[str]):
+        self.columns = columns
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+
+    def _drain(self) -> bytes:
+        data = self._buffer.getvalue().encode()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+    def start(self) -> bytes:
+        self._writer.writerow(self.columns)
+        return self._drain()
+
+    def write(self, rows: List[Dict[str, Any]]) -> bytes:
+        for row in rows:
+            cells = []
+            for name in self.columns:
+                value = row.get(name)
+                if isinstance(value, datetime):
+                    value = value.isoformat()
+                cells.append("" if value is None else _to_text(value))
+            self._writer.writerow(cells)
+        return self._drain()
+
+    def finish(self) -> bytes:
+        return b""
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands back whatever was written since the last drain"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class ParquetWriter:
+    """
+    Parquet with one row group per page
+
+    pyarrow is optional; constructing this writer raises ImportError
+    when it isn't installed. Rows are written as each page arrives and
+    the footer is sent last, so the file streams like the other formats.
+    """
+    media_type = "application/vnd.apache.parquet"
+    extension = "parquet"
+
+    def __init__(self, columns: Sequence[str]):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self.columns = columns
+        types = {
+            "confidence": pa.float64(),
+            "hash_version": pa.int64(),
+        }
+        self._schema = pa.schema([
+            (name, pa.timestamp("ms") if name in TIMESTAMP_FIELDS else types.get(name, pa.string()))
+            for name in columns
+        ])
+        self._sink = _ChunkSink()
+        self._writer = pq.ParquetWriter(self._sink, self._schema, compression="snappy")
+
+    def start(self) -> bytes:
+        return self._sink.drain()
+
+    def write(self, rows: List[Dict[str, Any]]) -> bytes:
+        arrays = []
+        for name in self.columns:
+            values = [row.get(name) for row in rows]
+            if name in TIMESTAMP_FIELDS:
+                values = [_to_datetime(value) for value in values]
+            else:
+                values = [_to_text(value) for value in values]
+            arrays.append(values)
+        table = self._pa.Table.from_arrays(
+            [self._pa.array(values, type=field.type) for values, field in zip(arrays, self._schema)],
+            schema=self._schema
+        )
+        self._writer.write_table(table)
+        return self._sink.drain()
+
+    def finish(self) -> bytes:
+        self._writer.close()
+        return self._sink.drain()
+
+
+WRITERS = {
+    "ndjson": NDJSONWriter,
+    "csv": CSVWriter,
+    "parquet": ParquetWriter,
+}
@@ -0,0 +1,102 @@
+"""
+Coordination-free, time-sortable decision ID generation
+
+IDs look like DEC_20240115_01HMA6Z8QK7XGZ3V9N2C4B8RTE. The suffix is a
+128-bit value in Crockford base32 (the ULID alphabet):
+
+    48 bits  Unix time in milliseconds
+    32 bits  node, random per process and re-drawn after fork
+    48 bits  sequence, randomly seeded each millisecond and incremented
+             for every ID within it
+
+IDs from one process are strictly increasing. IDs from different
+workers only collide if they draw the same node, so gunicorn workers
+need no shared counter. Because the time comes first, IDs sort in
+creation order, which keeps B-tree and search index inserts
+append-friendly.
+"""
+
+import base64
+import os
+import secrets
+import threading
+import time
+from datetime import datetime
+from typing import List
+
+CROCKFORD_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+
+NODE_BITS = 32
+SEQUENCE_BITS = 48
+SEQUENCE_MAX = (1 << SEQUENCE_BITS) - 1
+
+# Leave headroom so a freshly seeded sequence can't overflow within a millisecond
+SEED_BITS = SEQUENCE_BITS - 1
+
+
+# RFC 4648 base32 maps 5-bit groups in the same order, only with a different alphabet
+_TO_CROCKFORD = bytes.maketrans(b"ABCDEFGHIJKLMNOPQRSTUVWXYZ234567", CROCKFORD_ALPHABET.encode())
+
+
+def encode_base32(value: int) -> str:
+    """Encode a 128-bit integer as 26 characters of Crockford base32"""
+    # 20 bytes encode to exactly 32 characters; the last 26 cover the low 130 bits
+    encoded = base64.b32encode(value.to_bytes(20, "big"))[6:]
+    return encoded.translate(_TO_CROCKFORD).decode()
+
+
+class DecisionIdGenerator:
+    """Monotonic per-process generator of sortable decision IDs"""
+
+    def __init__(self, prefix: str = "DEC"):
+        self.prefix = prefix
+        self._reseed()
+
+    def _reseed(self):
+        # A fresh lock too: another thread may have held it at fork time
+        self._lock = threading.Lock()
+        self._node = secrets.randbits(NODE_BITS)
+        self._last_ms = 0
+        self._sequence = 0
+
+    def next_id(self) -> str:
+        """Generate one ID"""
+        return self.next_ids(1)[0]
+
+    def next_ids(self, count: int) -> List[str]:
+        """Generate count increasing IDs under a single lock acquisition"""
+        with self._lock:
+            now_ms = time.time_ns() // 1_000_000
+            if now_ms > self._last_ms:
+                self._last_ms = now_ms
+                self._sequence = secrets.randbits(SEED_BITS)
+
+            ids = []
+            day_ms = None
+            for _ in range(count):
+                # Borrow the next millisecond rather than overflow or repeat;
+                # this also keeps IDs increasing if the clock steps backwards
+                if self._sequence >= SEQUENCE_MAX:
+                    self._last_ms += 1
+                    self._sequence = secrets.randbits(SEED_BITS)
+                else:
+                    self._sequence += 1
+
+                value = (
+                    (self._last_ms << (NODE_BITS + SEQUENCE_BITS))
+                    | (self._node << SEQUENCE_BITS)
+                    | self._sequence
+                )
+                if self._last_ms != day_ms:
+                    day_ms = self._last_ms
+                    day = datetime.utcfromtimestamp(day_ms / 1000).strftime("%Y%m%d")
+                ids.append(f"{self.prefix}_{day}_{encode_base32(value)}")
+
+            return ids
+
+
+id_generator = DecisionIdGenerator()
+
+# Forked workers must not share the parent's node or sequence
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=id_generator._reseed)
@@ -0,0 +1,90 @@
+"""
+Trace hashing and integrity checks
+
+Kept free of database and web dependencies so it can run in worker
+processes for bulk verification.
+"""
+
+import hashlib
+from typing import Any, Dict, List, Tuple
+
+import bson
+
+from app.core import canonical
+
+# Trace fields covered by the hash; review notes and updated_at change after ingest
+HASHED_FIELDS = (
+    "decision_id",
+    "source_system",
+    "input_payload",
+    "rules_triggered",
+    "output",
+    "confidence",
+    "risk_level",
+    "timestamp",
+    "created_at",
+    "metadata",
+)
+
+
+def calculate_hash(trace_data: Dict[str, Any], version: int = canonical.CURRENT_VERSION) -> str:
+    """Calculate SHA-256 hash for immutability"""
+    return hashlib.sha256(canonical.encode(trace_data, version)).hexdigest()
+
+
+def hash_input(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Select the hashed fields of a stored trace"""
+    data = {field: doc.get(field) for field in HASHED_FIELDS}
+    data["metadata"] = data["metadata"] or {}
+    data["rules_triggered"] = [
+        {"metadata": None, **rule} for rule in data["rules_triggered"] or []
+    ]
+    return data
+
+
+# Outcomes of verify_document
+VALID = "valid"
+MISMATCH = "mismatch"
+LEGACY = "legacy"
+
+
+def verify_document(doc: Dict[str, Any]) -> str:
+    """
+    Check a stored trace against its stored hash, using the encoding it was hashed with
+
+    Traces stored before hashes were versioned have no hash_version.
+    Their hashes covered review_notes and updated_at, which have changed
+    since, and microsecond timestamps that MongoDB truncated, so the
+    hashed input can't be rebuilt. They are reported as LEGACY
+    (unverifiable) rather than as mismatches.
+    """
+    if "hash_version" not in doc:
+        return LEGACY
+    if doc.get("hash") == calculate_hash(hash_input(doc), doc["hash_version"]):
+        return VALID
+    return MISMATCH
+
+
+def verify_raw_batch(raw_documents: List[bytes]) -> Tuple[List[str], int, Any, int]:
+    """
+    Verify a batch of raw BSON trace documents
+
+    Returns the decision IDs that failed, the number of legacy traces
+    that couldn't be verified, the last _id in the batch and the number
+    of documents checked. Decoding happens here so the work can be
+    fanned out across processes.
+    """
+    mismatched = []
+    legacy = 0
+    last_id = None
+
+    for raw in raw_documents:
+        doc = bson.decode(raw)
+        last_id = doc["_id"]
+        result = verify_document(doc)
+        if result == MISMATCH:
+            mismatched.append(doc.get("decision_id"))
+        elif result == LEGACY:
+            legacy += 1
+
+    return mismatched, legacy, last_id, len(raw_documents)
@@ -0,0 +1,135 @@
+"""
+Merkle tree utilities for sealing decision hashes
+
+Leaves are the per-trace SHA-256 hashes. Hashing follows RFC 6962:
+leaves are prefixed with 0x00 and interior nodes with 0x01, so a leaf can
+never be passed off as an interior node. A node without a sibling is
+promoted unchanged to the next level instead of being duplicated.
+"""
+
+import hashlib
+from typing import Dict, List, Optional, Tuple
+
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+
+
+def leaf_hash(trace_hash: str) -> bytes:
+    """Hash a trace's hex SHA-256 into a leaf"""
+    return hashlib.sha256(LEAF_PREFIX + bytes.fromhex(trace_hash)).digest()
+
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    """Hash two child nodes into their parent"""
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+
+def build_levels(trace_hashes: List[str]) -> List[List[bytes]]:
+    """Build every level of the tree, leaves first and root last"""
+    level = [leaf_hash(h) for h in trace_hashes]
+    levels = [level]
+
+    while len(level) > 1:
+        parent = [
+            node_hash(level[i], level[i + 1]) if i + 1 < len(level) else level[i]
+            for i in range(0, len(level), 2)
+        ]
+        levels.append(parent)
+        level = parent
+
+    return levels
+
+
+class TreeBuilder:
+    """
+    Build the same tree as build_levels one leaf at a time
+
+    Only the unpaired node of each level is held, so memory stays
+    O(log n). add_leaf and finish return the nodes completed by the
+    call as (level, index, hash), in no particular level order.
+    """
+
+    def __init__(self):
+        self._pending: List[Optional[bytes]] = []
+        self._counts: List[int] = []
+
+    @property
+    def leaf_count(self) -> int:
+        return self._counts[0] if self._counts else 0
+
+    def add_leaf(self, trace_hash: str) -> List[Tuple[int, int, bytes]]:
+        completed = []
+        self._push(0, leaf_hash(trace_hash), completed)
+        return completed
+
+    def finish(self) -> Tuple[bytes, int, List[Tuple[int, int, bytes]]]:
+        """Promote the last unpaired nodes; returns (root, depth, completed nodes)"""
+        if not self._counts:
+            raise ValueError("Cannot build a tree without leaves")
+        completed = []
+        level = 0
+        while level < len(self._counts) - 1 or self._counts[level] > 1:
+            node = self._pending[level]
+            if node is not None:
+                # A node without a sibling moves up unchanged
+                self._pending[level] = None
+                self._push(level + 1, node, completed)
+            level += 1
+        return self._pending[level], level, completed
+
+    def _push(self, level: int, node: bytes, completed: List[Tuple[int, int, bytes]]):
+        while True:
+            if level == len(self._counts):
+                self._counts.append(0)
+                self._pending.append(None)
+            completed.append((level, self._counts[level], node))
+            self._counts[level] += 1
+
+            left = self._pending[level]
+            if left is None:
+                self._pending[level] = node
+                return
+            self._pending[level] = None
+            node = node_hash(left, node)
+            level += 1
+
+
+def level_sizes(leaf_count: int) -> List[int]:
+    """Number of nodes on each level of a tree with leaf_count leaves"""
+    sizes = [leaf_count]
+    while sizes[-1] > 1:
+        sizes.append((sizes[-1] + 1) // 2)
+    return sizes
+
+
+def sibling_positions(leaf_index: int, leaf_count: int) -> List[Dict[str, int]]:
+    """(level, index) of each sibling on the path from a leaf to the root"""
+    positions = []
+    index = leaf_index
+
+    for level, size in enumerate(level_sizes(leaf_count)[:-1]):
+        sibling = index ^ 1
+        if sibling < size:
+            positions.append({"level": level, "index": sibling})
+        index //= 2
+
+    return positions
+
+
+def verify_proof(trace_hash: str, proof: List[Dict[str, str]], root: str) -> bool:
+    """
+    Verify an inclusion proof offline
+
+    proof is ordered from the leaf upwards; each step gives the sibling's
+    hex hash and whether it sits to the "left" or "right" of the path.
+    """
+    current = leaf_hash(trace_hash)
+
+    for step in proof:
+        sibling = bytes.fromhex(step["hash"])
+        if step["position"] == "left":
+            current = node_hash(sibling, current)
+        else:
+            current = node_hash(current, sibling)
+
+    return current.hex() == root
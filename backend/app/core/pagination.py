@@ -0,0 +1,42 @@
+"""
+Opaque keyset pagination cursors
+
+A cursor records the sort key of the last item on a page, here a
+millisecond timestamp plus a unique tie-breaker. The next page starts
+strictly after that key, so page N costs the same as page 1.
+"""
+
+import base64
+from datetime import datetime, timedelta
+from typing import Any, Tuple
+
+import orjson
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def to_millis(value: datetime) -> int:
+    """Naive UTC datetime to epoch milliseconds"""
+    return (value - EPOCH) // timedelta(milliseconds=1)
+
+
+def from_millis(value: int) -> datetime:
+    """Epoch milliseconds to naive UTC datetime"""
+    return EPOCH + timedelta(milliseconds=value)
+
+
+def encode_cursor(timestamp_ms: int, tie_breaker: Any) -> str:
+    """Encode a (timestamp, tie-breaker) sort key as an opaque cursor"""
+    return base64.urlsafe_b64encode(orjson.dumps([timestamp_ms, tie_breaker])).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[int, Any]:
+    """Decode a cursor; raises ValueError if it is malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp_ms, tie_breaker = orjson.loads(base64.urlsafe_b64decode(padded))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(timestamp_ms, int):
+        raise ValueError("Invalid cursor")
+    return timestamp_ms, tie_breaker
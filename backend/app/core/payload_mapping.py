@@ -0,0 +1,109 @@
+"""
+Search mapping of input_payload and output
+
+Payloads are free-form and differ per source system. Mapped as dynamic
+objects ("dynamic", the original mapping), every distinct key becomes
+a field of the index, so mappings grow with every new payload shape
+and text search has to fan out over all of them. ES_PAYLOAD_MAPPING=
+"flattened" maps each blob as a single flattened field instead, which
+indexes every leaf as a keyword without adding fields.
+
+Full-text search then runs against payload_text, one text field
+holding every leaf value. flattened fields can't copy_to, so it is
+built here when the search document is prepared. It stays in _source,
+which partial updates rebuild documents from, and reads filter it out
+(DERIVED_FIELDS).
+
+ES_PROMOTED_FIELDS declares hot payload fields per source system, for
+example {"fraud_detection": {"input_payload.amount": "double"}}. Their
+values are also indexed as typed columns under
+promoted.<source_system>, for range queries, sorting and aggregations.
+
+The mapping is part of the index template, so changing it affects
+partitions created afterwards; scripts/migrate_payload_mapping.py
+rebuilds existing ones.
+"""
+
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.core.config import settings
+
+PAYLOAD_MAPPINGS = ("dynamic", "flattened")
+
+PAYLOAD_FIELDS = ("input_payload", "output")
+
+# Search-only fields added to every trace document; never returned by reads
+DERIVED_FIELDS = ("payload_text", "promoted")
+
+# Promoted column types that can skip a malformed value instead of rejecting the trace
+_LENIENT_TYPES = {"long", "integer", "short", "byte", "double", "float", "half_float", "date", "ip"}
+
+
+def _column(type_: str) -> Dict[str, Any]:
+    if type_ in _LENIENT_TYPES:
+        return {"type": type_, "ignore_malformed": True}
+    return {"type": type_}
+
+
+def payload_properties(mode: Optional[str] = None) -> Dict[str, Any]:
+    """Mapping properties for the payload fields, payload_text and promoted columns"""
+    mode = mode or settings.ES_PAYLOAD_MAPPING
+    if mode == "flattened":
+        properties = {field: {"type": "flattened"} for field in PAYLOAD_FIELDS}
+    else:
+        properties = {field: {"type": "object", "enabled": True} for field in PAYLOAD_FIELDS}
+
+    properties["payload_text"] = {"type": "text"}
+    properties["promoted"] = {
+        "dynamic": False,
+        "properties": {
+            source_system: {"properties": {path: _column(type_) for path, type_ in fields.items()}}
+            for source_system, fields in settings.ES_PROMOTED_FIELDS.items()
+        }
+    }
+    return properties
+
+
+def payload_search_fields(mode: Optional[str] = None) -> List[str]:
+    """Fields the search_text multi_match runs against"""
+    if (mode or settings.ES_PAYLOAD_MAPPING) == "flattened":
+        return ["payload_text"]
+    return ["output.*", "input_payload.*"]
+
+
+def _leaf_values(value: Any) -> Iterator[str]:
+    if isinstance(value, dict):
+        for item in value.values():
+            yield from _leaf_values(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _leaf_values(item)
+    elif isinstance(value, bool):
+        yield "true" if value else "false"
+    elif value is not None:
+        yield str(value)
+
+
+def payload_text(trace: Dict[str, Any]) -> str:
+    """Every leaf value of a trace's payloads, space separated"""
+    return " ".join(value for field in PAYLOAD_FIELDS for value in _leaf_values(trace.get(field)))
+
+
+def _get_path(doc: Dict[str, Any], path: str) -> Any:
+    for key in path.split("."):
+        if not isinstance(doc, dict):
+            return None
+        doc = doc.get(key)
+    return doc
+
+
+def promoted_values(trace: Dict[str, Any]) -> Dict[str, Any]:
+    """Values of the trace's source system's promoted fields, keyed by path"""
+    fields = settings.ES_PROMOTED_FIELDS.get(trace.get("source_system"), {})
+    values = {}
+    for path in fields:
+        value = _get_path(trace, path)
+        # Objects can't go in a typed column; skip rather than fail the whole document
+        if value is not None and not isinstance(value, (dict, list)):
+            values[path] = value
+    return values
@@ -0,0 +1,103 @@
+"""
+Sparse fieldsets for trace reads
+
+A fieldset selects which trace fields a read returns. It maps to a
+MongoDB projection and to Elasticsearch _source filtering, so large
+sub-documents such as input_payload and output are never fetched,
+decoded or serialized when they aren't asked for.
+"""
+
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+from app.core.payload_mapping import DERIVED_FIELDS
+from app.core.serialization import TRACE_FIELDS
+
+# Returned even when not requested, so results can always be identified
+ALWAYS_INCLUDED = ("decision_id",)
+
+
+class FieldSet(NamedTuple):
+    """Fields to include, or fields to exclude, as top-level or dotted paths"""
+    include: Optional[Tuple[str, ...]] = None
+    exclude: Optional[Tuple[str, ...]] = None
+
+    def roots(self) -> Optional[set]:
+        """Top-level fields an include fieldset returns; None for exclude fieldsets"""
+        if self.include is None:
+            return None
+        return {path.split(".", 1)[0] for path in self.include}
+
+    def excluded_roots(self) -> set:
+        """Top-level fields removed entirely by an exclude fieldset"""
+        return {path for path in self.exclude or () if "." not in path}
+
+    def mongo_projection(self, keep: Tuple[str, ...] = ()) -> Dict[str, int]:
+        """MongoDB projection for this fieldset
+
+        keep lists fields the caller needs internally (e.g. sort keys)
+        even if the fieldset wouldn't return them.
+        """
+        if self.include is not None:
+            projection = {path: 1 for path in _collapse(self.include + keep)}
+        else:
+            projection = {path: 0 for path in self.exclude if path not in keep}
+        projection["_id"] = 0
+        return projection
+
+    def es_source(self) -> Dict[str, Any]:
+        """Elasticsearch _source filter for this fieldset"""
+        if self.include is not None:
+            return {"includes": list(self.include)}
+        return {"excludes": list(self.exclude + DERIVED_FIELDS)}
+
+
+def es_source(fieldset: Optional[FieldSet]) -> Dict[str, Any]:
+    """Elasticsearch _source filter for a trace read, with or without a fieldset"""
+    if fieldset is None:
+        return {"excludes": list(DERIVED_FIELDS)}
+    return fieldset.es_source()
+
+
+def _collapse(paths: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Drop duplicates and paths inside another listed path
+
+    MongoDB rejects a projection naming both a field and one of its
+    subfields ("output" and "output.decision") as a path collision.
+    """
+    paths = tuple(dict.fromkeys(paths))
+    listed = set(paths)
+    return tuple(
+        path for path in paths
+        if not any(path[:i] in listed for i, char in enumerate(path) if char == ".")
+    )
+
+
+def _split(value: str) -> Tuple[str, ...]:
+    paths = _collapse(tuple(path.strip() for path in value.split(",") if path.strip()))
+    for path in paths:
+        if path.split(".", 1)[0] not in TRACE_FIELDS:
+            raise ValueError(f"Unknown field: {path}")
+    return paths
+
+
+def parse_fieldset(fields: Optional[str], exclude: Optional[str]) -> Optional[FieldSet]:
+    """
+    Parse comma-separated fields= / exclude= parameters
+
+    Returns None when neither is given, so callers keep the full shape.
+    Raises ValueError for unknown fields or when both are given.
+    """
+    if fields and exclude:
+        raise ValueError("Use either fields or exclude, not both")
+
+    if fields:
+        include = _split(fields)
+        return FieldSet(include=_collapse(ALWAYS_INCLUDED + include))
+
+    if exclude:
+        paths = _split(exclude)
+        if any(path in ALWAYS_INCLUDED for path in paths):
+            raise ValueError(f"Cannot exclude {', '.join(ALWAYS_INCLUDED)}")
+        return FieldSet(exclude=paths)
+
+    return None
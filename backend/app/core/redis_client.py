@@ -0,0 +1,134 @@
+"""
+Optional Redis client for shared caches
+
+Redis is used only when REDIS_URL is set. "memory://" selects an
+in-process fake with the same async interface, for tests and single
+process development.
+"""
+
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Global Redis client
+redis_client: Optional[Any] = None
+
+
+class InMemoryRedis:
+    """Async, in-process stand-in for the subset of redis.asyncio.Redis the caches use"""
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[bytes, Optional[float]]] = {}
+
+    def _live(self, key: str) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    @staticmethod
+    def _encode(value: Any) -> bytes:
+        if isinstance(value, bytes):
+            return value
+        return str(value).encode()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self._live(key)
+
+    async def mget(self, *keys: str) -> List[Optional[bytes]]:
+        return [self._live(key) for key in keys]
+
+    async def set(self, key: str, value: Any, ex: Optional[float] = None):
+        self._data[key] = (self._encode(value), time.monotonic() + ex if ex else None)
+        return True
+
+    async def incr(self, key: str) -> int:
+        value = int(self._live(key) or 0) + 1
+        expires_at = self._data[key][1] if key in self._data else None
+        self._data[key] = (self._encode(value), expires_at)
+        return value
+
+    async def delete(self, *keys: str) -> int:
+        return sum(self._data.pop(key, None) is not None for key in keys)
+
+    def pipeline(self, transaction: bool = True) -> "InMemoryPipeline":
+        return InMemoryPipeline(self)
+
+    async def ping(self) -> bool:
+        return True
+
+    async def close(self):
+        self._data.clear()
+
+
+class InMemoryPipeline:
+    """Queues commands and runs them on execute(), like redis.asyncio pipelines"""
+
+    def __init__(self, client: InMemoryRedis):
+        self._client = client
+        self._commands: List[Tuple[str, tuple, dict]] = []
+
+    async def __aenter__(self) -> "InMemoryPipeline":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._commands.clear()
+
+    def set(self, key: str, value: Any, ex: Optional[float] = None) -> "InMemoryPipeline":
+        self._commands.append(("set", (key, value), {"ex": ex}))
+        return self
+
+    async def execute(self) -> List[Any]:
+        commands, self._commands = self._commands, []
+        return [await getattr(self._client, name)(*args, **kwargs) for name, args, kwargs in commands]
+
+
+async def connect_redis():
+    """Connect to Redis if configured; shared cache tiers are disabled otherwise"""
+    global redis_client
+
+    if not settings.REDIS_URL:
+        return
+
+    if settings.REDIS_URL == "memory://":
+        redis_client = InMemoryRedis()
+        logger.info("Using in-memory Redis")
+        return
+
+    try:
+        import redis.asyncio as redis
+    except ImportError:
+        logger.warning("REDIS_URL is set but the redis package is not installed; shared caching disabled")
+        return
+
+    try:
+        client = redis.from_url(settings.REDIS_URL, socket_timeout=settings.REDIS_SOCKET_TIMEOUT)
+        await client.ping()
+        redis_client = client
+        logger.info(f"Connected to Redis at {settings.REDIS_URL}")
+    except Exception as e:
+        # Caching is an optimization; run without the shared tier
+        logger.warning(f"Failed to connect to Redis, shared caching disabled: {e}")
+
+
+async def close_redis():
+    """Close Redis connection"""
+    global redis_client
+
+    if redis_client:
+        await redis_client.close()
+        redis_client = None
+        logger.info("Closed Redis connection")
+
+
+def get_redis() -> Optional[Any]:
+    """Get the Redis client, or None when no shared cache is configured"""
+    return redis_client
@@ -0,0 +1,122 @@
+"""
+Search result cache with generation-based invalidation
+
+Results are cached per normalized search request in an in-process LRU
+and, when Redis is configured, in a shared tier. Cache keys embed a
+write generation: one per source system plus a global one. Writes bump
+the generations they affect, so later searches miss instead of serving
+results from before the write.
+
+Staleness is bounded by SEARCH_CACHE_TTL: without Redis each process
+only sees its own bumps, and search indexing is write-behind, so a
+search racing a write can cache a result that predates it.
+"""
+
+import hashlib
+import logging
+from typing import Any, Dict, Iterable, Optional
+
+import orjson
+from prometheus_client import Counter
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+CACHE_HITS = Counter('search_cache_hits_total', 'Search results served from cache', ['tier'])
+CACHE_MISSES = Counter('search_cache_misses_total', 'Searches not found in any cache tier')
+
+GLOBAL_SCOPE = "*"
+KEY_PREFIX = "search"
+
+
+class SearchCache:
+    """Two-tier cache of search responses"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.ttl = ttl
+        self._local = TTLCache(maxsize, ttl)
+        # Used when there is no shared tier to hold generations
+        self._generations: Dict[str, int] = {}
+
+    @staticmethod
+    def _generation_key(scope: str) -> str:
+        return f"{KEY_PREFIX}:gen:{scope}"
+
+    @staticmethod
+    def fingerprint(params: Dict[str, Any]) -> str:
+        """Stable digest of normalized search parameters"""
+        return hashlib.sha1(orjson.dumps(params, option=orjson.OPT_SORT_KEYS, default=str)).hexdigest()
+
+    async def _generation(self, scope: str) -> int:
+        redis = get_redis()
+        if redis is not None:
+            try:
+                return int(await redis.get(self._generation_key(scope)) or 0)
+            except Exception as e:
+                logger.warning(f"Search cache generation read failed: {e}")
+        return self._generations.get(scope, 0)
+
+    async def key_for(self, params: Dict[str, Any]) -> str:
+        """Cache key for a search, valid until the next write in its scope"""
+        scope = params.get("source_system") or GLOBAL_SCOPE
+        generation = await self._generation(scope)
+        return f"{KEY_PREFIX}:{scope}:{generation}:{self.fingerprint(params)}"
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached response, or None"""
+        result = self._local.get(key)
+        if result is not None:
+            CACHE_HITS.labels(tier="local").inc()
+            return result
+
+        redis = get_redis()
+        if redis is not None:
+            try:
+                data = await redis.get(key)
+            except Exception as e:
+                logger.warning(f"Search cache read failed: {e}")
+                data = None
+            if data is not None:
+                result = orjson.loads(data)
+                self._local.set(key, result)
+                CACHE_HITS.labels(tier="shared").inc()
+                return result
+
+        CACHE_MISSES.inc()
+        return None
+
+    async def set(self, key: str, result: Dict[str, Any]):
+        """Store a response in both tiers"""
+        self._local.set(key, result)
+
+        redis = get_redis()
+        if redis is not None:
+            try:
+                await redis.set(key, orjson.dumps(result, default=str), ex=int(self.ttl) or 1)
+            except Exception as e:
+                logger.warning(f"Search cache write failed: {e}")
+
+    async def invalidate(self, source_systems: Iterable[str]):
+        """Bump the generations of the given source systems and the global one"""
+        scopes = set(source_systems)
+        if not scopes:
+            return
+        scopes.add(GLOBAL_SCOPE)
+
+        for scope in scopes:
+            self._generations[scope] = self._generations.get(scope, 0) + 1
+
+        redis = get_redis()
+        if redis is not None:
+            try:
+                for scope in scopes:
+                    await redis.incr(self._generation_key(scope))
+            except Exception as e:
+                logger.warning(f"Search cache invalidation failed: {e}")
+
+
+search_cache = SearchCache(settings.SEARCH_CACHE_SIZE, settings.SEARCH_CACHE_TTL)
@@ -0,0 +1,147 @@
+"""
+Time-partitioned search indices for decision traces
+
+Traces are indexed into one index per month (decision_traces-2024.05)
+or per day (decision_traces-2024.05.17), chosen from the trace's own
+timestamp. Partitions are created on first write from an index
+template that also adds them to the decision_traces read alias, so
+unbounded searches still see every trace. Searches with a date range
+name only the partitions overlapping it.
+
+ES_PARTITION_INTERVAL=none keeps the single unpartitioned index.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, List, Optional
+
+from app.core.config import settings
+
+# strftime suffix of a partition's name per interval
+INTERVALS = {
+    "monthly": "%Y.%m",
+    "daily": "%Y.%m.%d",
+}
+
+# Set when a concrete index already holds the alias name; see use_legacy_index
+_legacy_index = False
+
+
+def partitioned() -> bool:
+    """Whether traces are written to time partitions"""
+    return settings.ES_PARTITION_INTERVAL in INTERVALS and not _legacy_index
+
+
+def use_legacy_index(legacy: bool = True):
+    """
+    Keep using a pre-partitioning decision_traces index
+
+    An existing concrete index can't share its name with the read
+    alias, so until it is migrated everything keeps going to it.
+    """
+    global _legacy_index
+    _legacy_index = legacy
+
+
+def legacy_index() -> bool:
+    """Whether writes still go to a pre-partitioning index"""
+    return _legacy_index
+
+
+def read_alias() -> str:
+    """Alias over every trace partition"""
+    return settings.ELASTICSEARCH_INDEX
+
+
+def write_alias() -> str:
+    """Alias for the current partition; outside index_pattern so the template doesn't add it"""
+    return f"{settings.ELASTICSEARCH_INDEX}_write"
+
+
+def index_pattern() -> str:
+    return f"{settings.ELASTICSEARCH_INDEX}-*"
+
+
+def _as_datetime(value: Any) -> datetime:
+    """Naive UTC datetime from a stored or search-document timestamp"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def period_start(timestamp: Any) -> datetime:
+    """Start of the partition period containing timestamp"""
+    timestamp = _as_datetime(timestamp)
+    if settings.ES_PARTITION_INTERVAL == "daily":
+        return datetime(timestamp.year, timestamp.month, timestamp.day)
+    return datetime(timestamp.year, timestamp.month, 1)
+
+
+def next_period(start: datetime) -> datetime:
+    """Start of the period after the one starting at start"""
+    if settings.ES_PARTITION_INTERVAL == "daily":
+        return start + timedelta(days=1)
+    if start.month == 12:
+        return datetime(start.year + 1, 1, 1)
+    return datetime(start.year, start.month + 1, 1)
+
+
+def previous_period(start: datetime) -> datetime:
+    """Start of the period before the one starting at start"""
+    return period_start(start - timedelta(days=1))
+
+
+def partition_name(timestamp: Any) -> str:
+    """Name of the partition holding traces at timestamp"""
+    suffix = period_start(timestamp).strftime(INTERVALS[settings.ES_PARTITION_INTERVAL])
+    return f"{settings.ELASTICSEARCH_INDEX}-{suffix}"
+
+
+def partition_start(name: str) -> Optional[datetime]:
+    """Start of the period a partition covers, or None if name isn't a partition"""
+    prefix = f"{settings.ELASTICSEARCH_INDEX}-"
+    if not name.startswith(prefix):
+        return None
+    try:
+        return datetime.strptime(name[len(prefix):], INTERVALS[settings.ES_PARTITION_INTERVAL])
+    except ValueError:
+        return None
+
+
+def trace_index(timestamp: Any) -> str:
+    """
+    Concrete index a trace is written to and updated in
+
+    Routing by the trace's timestamp rather than the write alias keeps
+    late arrivals and backfills in the partition date-range searches
+    will look in.
+    """
+    if not partitioned():
+        return settings.ELASTICSEARCH_INDEX
+    return partition_name(timestamp)
+
+
+def search_indices(start: Optional[datetime] = None, end: Optional[datetime] = None) -> str:
+    """
+    Indices a search for traces in [start, end] needs to touch
+
+    Unbounded ranges, and ranges spanning more than
+    ES_ROUTING_MAX_INDICES partitions, go to the read alias. Searches
+    naming partitions must pass ignore_unavailable, since periods
+    without traces have no index.
+    """
+    if not partitioned() or start is None:
+        return read_alias()
+
+    period = period_start(start)
+    last = period_start(end if end is not None else datetime.utcnow())
+
+    indices: List[str] = []
+    while period <= last:
+        if len(indices) == settings.ES_ROUTING_MAX_INDICES:
+            return read_alias()
+        indices.append(partition_name(period))
+        period = next_period(period)
+
+    return ",".join(indices) or read_alias()
@@ -0,0 +1,70 @@
+"""
+Fast serialization of stored decision traces
+
+Traces are validated once at ingest, so reads can encode stored
+documents straight to JSON bytes instead of building DecisionTrace
+models and having FastAPI validate them again through response_model.
+The output matches the DecisionTrace schema field for field.
+"""
+
+import copy
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from app.models.decision import DecisionTrace
+
+if TYPE_CHECKING:
+    from app.core.projection import FieldSet
+
+TRACE_FIELDS = tuple(DecisionTrace.__fields__)
+
+_TRACE_DEFAULTS = {
+    name: field.default.dict() if isinstance(field.default, BaseModel) else field.default
+    for name, field in DecisionTrace.__fields__.items()
+    if not field.required
+}
+
+
+def trace_document(doc: Dict[str, Any], fieldset: Optional["FieldSet"] = None) -> Dict[str, Any]:
+    """
+    Shape a stored trace (MongoDB or Elasticsearch source) like DecisionTrace
+
+    Keeps schema fields only, in schema order, and fills defaults for
+    fields older documents don't have. With a fieldset, only the
+    selected fields are returned.
+    """
+    names = TRACE_FIELDS
+    if fieldset is not None:
+        roots = fieldset.roots()
+        if roots is not None:
+            names = [name for name in TRACE_FIELDS if name in roots]
+        else:
+            excluded = fieldset.excluded_roots()
+            names = [name for name in TRACE_FIELDS if name not in excluded]
+
+    result = {}
+    for name in names:
+        if name in doc:
+            result[name] = doc[name]
+        elif name in _TRACE_DEFAULTS:
+            result[name] = copy.deepcopy(_TRACE_DEFAULTS[name])
+
+    rules = result.get("rules_triggered")
+    if fieldset is None and rules and any("metadata" not in rule for rule in rules):
+        result["rules_triggered"] = [{"metadata": None, **rule} for rule in rules]
+
+    return result
+
+
+class TraceJSONResponse(JSONResponse):
+    """JSON response rendered with orjson
+
+    Naive datetimes render as isoformat(), the same as pydantic, so
+    responses match the response_model output.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=str, option=orjson.OPT_NON_STR_KEYS)
@@ -0,0 +1,152 @@
+"""
+Read-through cache of individual traces, with ETags
+
+A trace's content only changes when review notes are added, which also
+moves updated_at, so hash plus updated_at identifies a version. Full
+response-shaped traces are cached in process, keyed by decision ID,
+along with that version tag. Conditional GETs can then be answered
+from the cache without reading the full trace.
+
+add_annotation invalidates the local entry. When Redis is configured
+it also records the new version there, and other processes drop their
+copy on the next read. Without Redis (or when it can't be read) there
+is no shared invalidation, so cached versions are checked against
+MongoDB with a projected read of the version fields before use.
+"""
+
+import hashlib
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.database import get_database
+from app.core.pagination import to_millis
+from app.core.projection import FieldSet
+from app.core.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Stored fields an ETag is derived from
+ETAG_FIELDS = ("hash", "updated_at", "created_at")
+
+KEY_PREFIX = "trace:version"
+
+
+def trace_version(doc: Dict[str, Any]) -> str:
+    """Version tag of a stored trace: its hash plus updated_at in epoch ms"""
+    changed = doc.get("updated_at") or doc.get("created_at")
+    if isinstance(changed, str):
+        changed = datetime.fromisoformat(changed)
+    return f"{doc.get('hash')}-{to_millis(changed) if changed else 0}"
+
+
+def make_etag(version: str, variant: Optional[str] = None) -> str:
+    """
+    Strong ETag for one representation of a trace version
+
+    variant distinguishes representations of the same version, such as
+    sparse fieldsets or the annotations view.
+    """
+    if variant:
+        return f'"{version}-{hashlib.sha1(variant.encode()).hexdigest()[:12]}"'
+    return f'"{version}"'
+
+
+def fieldset_variant(fieldset: Optional[FieldSet]) -> Optional[str]:
+    if fieldset is None:
+        return None
+    if fieldset.include is not None:
+        return "fields=" + ",".join(fieldset.include)
+    return "exclude=" + ",".join(fieldset.exclude)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches etag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # If-None-Match uses weak comparison
+    return etag in candidates or f"W/{etag}" in candidates
+
+
+class TraceCache:
+    """Bounded LRU of full traces and their version tags"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.ttl = ttl
+        self._local = TTLCache(maxsize, ttl)
+
+    async def get(self, decision_id: str) -> Optional[Tuple[Dict[str, Any], str]]:
+        """(document, version) if cached and current"""
+        return (await self.get_many([decision_id])).get(decision_id)
+
+    async def get_many(self, decision_ids: List[str]) -> Dict[str, Tuple[Dict[str, Any], str]]:
+        """(document, version) for every cached and current trace, keyed by decision ID
+
+        Versions are checked against Redis with a single MGET, or
+        against MongoDB with a single projected $in query without Redis.
+        """
+        entries = {}
+        for decision_id in decision_ids:
+            entry = self._local.get(decision_id)
+            if entry is not None:
+                entries[decision_id] = entry
+        if not entries:
+            return entries
+
+        redis = get_redis()
+        if redis is not None:
+            try:
+                latest = await redis.mget(*(f"{KEY_PREFIX}:{decision_id}" for decision_id in entries))
+            except Exception as e:
+                logger.warning(f"Trace cache version read failed: {e}")
+            else:
+                for (decision_id, entry), version in zip(list(entries.items()), latest):
+                    if version is not None and version.decode() != entry[1]:
+                        self._local.pop(decision_id)
+                        del entries[decision_id]
+                return entries
+
+        # No shared invalidation: another process may have changed the trace
+        current = {}
+        cursor = get_database().decision_traces.find(
+            {"decision_id": {"$in": list(entries)}},
+            {"_id": 0, "decision_id": 1, **{field: 1 for field in ETAG_FIELDS}}
+        )
+        async for doc in cursor:
+            current[doc["decision_id"]] = trace_version(doc)
+        for decision_id, entry in list(entries.items()):
+            if current.get(decision_id) != entry[1]:
+                self._local.pop(decision_id)
+                del entries[decision_id]
+
+        return entries
+
+    def set(self, decision_id: str, document: Dict[str, Any], version: str):
+        self._local.set(decision_id, (document, version))
+
+    async def invalidate(self, decision_id: str, version: str):
+        """Drop a trace after it changed; version is its new version tag"""
+        await self.invalidate_many({decision_id: version})
+
+    async def invalidate_many(self, versions: Dict[str, str]):
+        """Drop changed traces, given their new version tags by decision ID, in one Redis round trip"""
+        for decision_id in versions:
+            self._local.pop(decision_id)
+
+        redis = get_redis()
+        if redis is not None and versions:
+            try:
+                async with redis.pipeline(transaction=False) as pipe:
+                    for decision_id, version in versions.items():
+                        pipe.set(f"{KEY_PREFIX}:{decision_id}", version, ex=int(self.ttl) or 1)
+                    await pipe.execute()
+            except Exception as e:
+                logger.warning(f"Trace cache invalidation failed: {e}")
+
+
+trace_cache = TraceCache(settings.TRACE_CACHE_SIZE, settings.TRACE_CACHE_TTL)
@@ -14,6 +14,9 @@ from prometheus_client import Counter, Histogram, generate_latest
 from app.core.config import settings
 from app.core.database import connect_db, close_db
 from app.core.elasticsearch_client import connect_elasticsearch, close_elasticsearch
+from app.core.es_indexer import start_indexer, stop_indexer
+from app.core.redis_client import connect_redis, close_redis
+from app.core.background import cancel_all, shutdown_process_pool
 from app.api.v1 import decisions, search, annotations, health
 
 # Configure logging
@@ -36,6 +39,10 @@ async def lifespan(app: FastAPI):
     # Connect to databases
     await connect_db()
     await connect_elasticsearch()
+    await connect_redis()
+    
+    # Start background search indexing
+    await start_indexer()
     
     logger.info("All services connected successfully")
     
@@ -43,8 +50,12 @@ async def lifespan(app: FastAPI):
     
     # Cleanup
     logger.info("Shutting down...")
+    await cancel_all()
+    shutdown_process_pool()
+    await stop_indexer()
     await close_db()
     await close_elasticsearch()
+    await close_redis()
 
 
 # Create FastAPI app
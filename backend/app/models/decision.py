@@ -12,6 +12,20 @@ class RiskLevel(str, Enum):
     critical = "critical"
 
 
+class ExportFormat(str, Enum):
+    """Bulk export file format"""
+    ndjson = "ndjson"
+    csv = "csv"
+    parquet = "parquet"
+
+
+class TotalMode(str, Enum):
+    """How a search computes its total"""
+    exact = "exact"
+    estimate = "estimate"
+    none = "none"
+
+
 class RuleTriggered(BaseModel):
     """Rule that was triggered in decision"""
     rule_id: str
@@ -29,6 +43,33 @@ class ReviewNote(BaseModel):
     tags: List[str] = []
 
 
+class Annotation(ReviewNote):
+    """Review note stored in the annotations collection"""
+    annotation_id: str
+    decision_id: str
+
+
+class AnnotationSummary(BaseModel):
+    """Annotation count and latest note embedded in a trace"""
+    count: int = 0
+    last_note: Optional[ReviewNote] = None
+
+
+class AnnotationResult(BaseModel):
+    """Result of adding an annotation"""
+    annotation: Annotation
+    annotation_summary: AnnotationSummary
+
+
+class AnnotationPage(BaseModel):
+    """One page of a trace's annotations, newest first"""
+    decision_id: str
+    annotations: List[Annotation]
+    count: int
+    has_more: bool
+    next_cursor: Optional[str] = None
+
+
 class DecisionTraceCreate(BaseModel):
     """Schema for creating a decision trace"""
     source_system: str
@@ -51,12 +92,53 @@ class DecisionTrace(BaseModel):
     risk_level: str
     timestamp: datetime
     hash: str
-    review_notes: List[ReviewNote] = []
+    # None for traces stored before hashes were versioned
+    hash_version: Optional[int] = None
+    annotation_summary: AnnotationSummary = AnnotationSummary()
     created_at: datetime
     updated_at: datetime
     metadata: Dict[str, Any] = {}
 
 
+class BatchItemResult(BaseModel):
+    """Outcome of a single item in a batch ingest"""
+    index: int
+    status: str
+    decision_id: Optional[str] = None
+    error: Optional[str] = None
+    # Set on failed writes; True when the same item may succeed if sent again
+    retryable: Optional[bool] = None
+
+
+class BatchIngestResponse(BaseModel):
+    """Batch ingest response"""
+    total: int
+    succeeded: int
+    failed: int
+    results: List[BatchItemResult]
+
+
+class StreamIngestResponse(BaseModel):
+    """Summary of a streaming NDJSON ingest"""
+    lines: int
+    succeeded: int
+    failed: int
+    errors: List[BatchItemResult]
+
+
+class TraceBatchRequest(BaseModel):
+    """Decision IDs to fetch in one request"""
+    decision_ids: List[str]
+
+
+class BulkVerifyRequest(BaseModel):
+    """Filters selecting the traces for a bulk verification job"""
+    source_system: Optional[str] = None
+    risk_level: Optional[RiskLevel] = None
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+
+
 class AnnotationCreate(BaseModel):
     """Schema for creating an annotation"""
     reviewer: str
@@ -64,6 +146,16 @@ class AnnotationCreate(BaseModel):
     tags: List[str] = []
 
 
+class BulkAnnotateRequest(AnnotationCreate):
+    """Annotation to apply to every trace matching filters or listed by ID"""
+    decision_ids: Optional[List[str]] = None
+    source_system: Optional[str] = None
+    risk_level: Optional[RiskLevel] = None
+    rule_id: Optional[str] = None
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+
+
 class SearchQuery(BaseModel):
     """Search query parameters"""
     source_system: Optional[str] = None
@@ -77,11 +169,14 @@ class SearchQuery(BaseModel):
 
 class SearchResponse(BaseModel):
     """Search response"""
-    total: int
+    total: Optional[int]
+    total_relation: Optional[str] = "eq"
     results: List[DecisionTrace]
     limit: int
     offset: int
     has_more: bool
+    next_cursor: Optional[str] = None
+    engine: Optional[str] = None
 
 
 class HealthResponse(BaseModel):
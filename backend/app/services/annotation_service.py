@@ -0,0 +1,186 @@
+"""
+Append-only annotation storage
+
+Review notes live in decision_annotations, one document per note, and
+in the decision_annotations search index. The trace itself only keeps
+an annotation_summary (count and latest note), so adding a note is a
+constant-size write however many notes a trace has.
+"""
+
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+from app.core.database import get_database
+from app.core.elasticsearch_client import get_es_client
+from app.core.es_indexer import get_indexer
+from app.core.pagination import decode_cursor, encode_cursor, from_millis, to_millis
+from app.core.search_cache import search_cache
+from app.core.search_indices import trace_index
+from app.core.trace_cache import ETAG_FIELDS, trace_cache, trace_version
+from app.models.decision import ReviewNote
+
+logger = logging.getLogger(__name__)
+
+ANNOTATIONS_INDEX = "decision_annotations"
+
+# Trace fields read when annotating: enough for invalidation, never the payload
+SUMMARY_PROJECTION = {
+    "_id": 0,
+    "source_system": 1,
+    "timestamp": 1,
+    "annotation_summary": 1,
+    **{field: 1 for field in ETAG_FIELDS}
+}
+
+
+def annotation_document(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Shape a stored annotation like the Annotation model"""
+    return {
+        "annotation_id": str(doc["_id"]),
+        "decision_id": doc["decision_id"],
+        "reviewer": doc["reviewer"],
+        "note": doc["note"],
+        "timestamp": doc["timestamp"],
+        "tags": doc.get("tags", []),
+    }
+
+
+def annotation_es_document(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Search index document for a stored annotation"""
+    es_doc = annotation_document(doc)
+    es_doc.pop("annotation_id")
+    es_doc["timestamp"] = es_doc["timestamp"].isoformat()
+    return es_doc
+
+
+def summary_es_document(summary: Dict[str, Any]) -> Dict[str, Any]:
+    """Search index form of an annotation_summary"""
+    last_note = summary.get("last_note")
+    if last_note and isinstance(last_note.get("timestamp"), datetime):
+        last_note = {**last_note, "timestamp": last_note["timestamp"].isoformat()}
+    return {"count": summary.get("count", 0), "last_note": last_note}
+
+
+def decode_annotation_cursor(cursor: str) -> Tuple[int, ObjectId]:
+    """Decode an annotations page cursor; raises ValueError if it is malformed"""
+    timestamp_ms, annotation_id = decode_cursor(cursor)
+    try:
+        return timestamp_ms, ObjectId(annotation_id)
+    except (InvalidId, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+class AnnotationService:
+    """Service for trace annotations"""
+
+    @staticmethod
+    async def add_annotation(
+        decision_id: str,
+        reviewer: str,
+        note: str,
+        tags: List[str]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Append a review note to a decision trace
+
+        Returns the stored annotation and the trace's new summary, or None
+        if the trace doesn't exist.
+        """
+        db = get_database()
+
+        # MongoDB stores milliseconds; truncate so page cursors match stored values
+        now = datetime.utcnow()
+        now = now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+        review_note = ReviewNote(reviewer=reviewer, note=note, tags=tags, timestamp=now).dict()
+        stored = {"decision_id": decision_id, **review_note}
+        await db.decision_annotations.insert_one(stored)
+
+        trace = await db.decision_traces.find_one_and_update(
+            {"decision_id": decision_id},
+            {
+                "$inc": {"annotation_summary.count": 1},
+                "$set": {"annotation_summary.last_note": review_note, "updated_at": now}
+            },
+            projection=SUMMARY_PROJECTION,
+            return_document=True
+        )
+
+        if not trace:
+            await db.decision_annotations.delete_one({"_id": stored["_id"]})
+            return None
+
+        await search_cache.invalidate([trace["source_system"]])
+        await trace_cache.invalidate(decision_id, trace_version(trace))
+
+        # Index in Elasticsearch; the trace update is queued behind its own index write
+        summary = trace["annotation_summary"]
+        trace_update = {"annotation_summary": summary_es_document(summary), "updated_at": now.isoformat()}
+        indexer = get_indexer()
+        if indexer:
+            await indexer.index(ANNOTATIONS_INDEX, str(stored["_id"]), annotation_es_document(stored))
+            await indexer.update(trace_index(trace["timestamp"]), decision_id, trace_update)
+        else:
+            # The note is already committed in MongoDB, so search failures (including
+            # write-blocked partitions) are logged; reconciliation re-pushes the
+            # trace once its index accepts writes
+            es_client = get_es_client()
+            try:
+                await es_client.index(
+                    index=ANNOTATIONS_INDEX,
+                    id=str(stored["_id"]),
+                    document=annotation_es_document(stored)
+                )
+                await es_client.update(index=trace_index(trace["timestamp"]), id=decision_id, doc=trace_update)
+            except Exception as e:
+                logger.error(f"Search indexing failed for annotation on {decision_id}: {e}")
+
+        return {"annotation": annotation_document(stored), "annotation_summary": summary}
+
+    @staticmethod
+    async def get_trace_summary(decision_id: str) -> Optional[Tuple[Dict[str, Any], str]]:
+        """A trace's annotation summary and version tag, or None if it doesn't exist"""
+        trace = await get_database().decision_traces.find_one(
+            {"decision_id": decision_id}, SUMMARY_PROJECTION
+        )
+        if not trace:
+            return None
+        return trace.get("annotation_summary") or {"count": 0, "last_note": None}, trace_version(trace)
+
+    @staticmethod
+    async def get_annotations(
+        decision_id: str,
+        limit: int = 50,
+        after: Optional[Tuple[int, ObjectId]] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        One page of a trace's annotations, newest first
+
+        Pages are keyed on (timestamp, _id), so each costs the same
+        whatever its depth. Returns the annotations and the cursor of the
+        next page, if any.
+        """
+        query: Dict[str, Any] = {"decision_id": decision_id}
+        if after:
+            timestamp = from_millis(after[0])
+            query["$or"] = [
+                {"timestamp": {"$lt": timestamp}},
+                {"timestamp": timestamp, "_id": {"$lt": after[1]}}
+            ]
+
+        # One extra row tells whether another page exists
+        cursor = get_database().decision_annotations.find(query).sort(
+            [("timestamp", -1), ("_id", -1)]
+        ).limit(limit + 1)
+        docs = await cursor.to_list(None)
+
+        next_cursor = None
+        if len(docs) > limit:
+            docs = docs[:limit]
+            next_cursor = encode_cursor(to_millis(docs[-1]["timestamp"]), str(docs[-1]["_id"]))
+
+        return [annotation_document(doc) for doc in docs], next_cursor
@@ -0,0 +1,263 @@
+"""
+Query-based bulk annotation jobs
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.core.database import get_database
+from app.core.elasticsearch_client import get_es_client
+from app.core.search_cache import search_cache
+from app.core.search_indices import trace_index
+from app.core.trace_cache import trace_cache, trace_version
+from app.services.annotation_service import (
+    ANNOTATIONS_INDEX,
+    annotation_es_document,
+    summary_es_document
+)
+
+logger = logging.getLogger(__name__)
+
+# Same change as AnnotationService.add_annotation makes to a trace's summary, except
+# that an older note or updated_at never replaces a newer one. Timestamps are naive
+# ISO strings, which order the same as the times they hold.
+SUMMARY_SCRIPT = """
+if (ctx._source.annotation_summary == null) {
+    ctx._source.annotation_summary = ['count': 0];
+}
+ctx._source.annotation_summary.count += 1;
+def last = ctx._source.annotation_summary.last_note;
+if (last == null || last.timestamp == null || last.timestamp.compareTo(params.note.timestamp) < 0) {
+    ctx._source.annotation_summary.last_note = params.note;
+}
+if (ctx._source.updated_at == null || ctx._source.updated_at.compareTo(params.updated_at) < 0) {
+    ctx._source.updated_at = params.updated_at;
+}
+"""
+
+
+class BulkAnnotationService:
+    """Service for resumable bulk annotation jobs"""
+
+    @staticmethod
+    def build_filter(
+        decision_ids: Optional[List[str]] = None,
+        source_system: Optional[str] = None,
+        risk_level: Optional[str] = None,
+        rule_id: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """Build the MongoDB filter for a bulk annotation job"""
+        query = {}
+        if decision_ids is not None:
+            query["decision_id"] = {"$in": decision_ids}
+        if source_system:
+            query["source_system"] = source_system
+        if risk_level:
+            query["risk_level"] = risk_level
+        if rule_id:
+            query["rules_triggered.rule_id"] = rule_id
+        if start_date or end_date:
+            query["timestamp"] = {}
+            if start_date:
+                query["timestamp"]["$gte"] = start_date
+            if end_date:
+                query["timestamp"]["$lte"] = end_date
+        return query
+
+    @staticmethod
+    async def create_job(filters: Dict[str, Any], annotation: Dict[str, Any]) -> Dict[str, Any]:
+        """Record a new bulk annotation job"""
+        db = get_database()
+        now = datetime.utcnow()
+        # Every note in the job shares one timestamp, truncated like MongoDB stores it
+        annotation = {
+            **annotation,
+            "timestamp": now.replace(microsecond=now.microsecond // 1000 * 1000)
+        }
+
+        job = {
+            "_id": uuid.uuid4().hex,
+            "filter": filters,
+            "annotation": annotation,
+            "status": "pending",
+            "total": await db.decision_traces.count_documents(BulkAnnotationService.build_filter(**filters)),
+            "annotated": 0,
+            "search_failures": 0,
+            "last_decision_id": None,
+            "docs_per_second": None,
+            "created_at": now,
+            "updated_at": now,
+            "completed_at": None,
+            "error": None
+        }
+        await db.annotation_jobs.insert_one(job)
+        return job
+
+    @staticmethod
+    async def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job's progress"""
+        # ID lists can be long; leave them out of progress reports
+        job = await get_database().annotation_jobs.find_one(
+            {"_id": job_id}, {"filter.decision_ids": 0, "last_decision_id": 0}
+        )
+        if not job:
+            return None
+        job["job_id"] = job.pop("_id")
+        return job
+
+    @staticmethod
+    async def run_job(job_id: str, batch_size: int):
+        """
+        Run or resume a bulk annotation job
+
+        Walks matching traces in decision_id order. Each batch is one
+        insert_many of annotations, two update_many calls for the traces'
+        summaries and one search _bulk request, then a checkpoint.
+        Traces that already hold this job's note are skipped on resume,
+        so a crash between the insert and the summary update leaves at
+        most that batch's summary counts one short.
+        """
+        db = get_database()
+        job = await db.annotation_jobs.find_one({"_id": job_id})
+        if not job or job["status"] == "completed":
+            return
+
+        query = BulkAnnotationService.build_filter(**job["filter"])
+        if job["last_decision_id"] is not None:
+            query = {"$and": [query, {"decision_id": {"$gt": job["last_decision_id"]}}]}
+
+        await BulkAnnotationService._update(job_id, {"status": "running", "error": None})
+
+        annotated = 0
+        started = time.monotonic()
+
+        try:
+            cursor = db.decision_traces.find(
+                query, {
+                    "_id": 0, "decision_id": 1, "source_system": 1, "timestamp": 1,
+                    "hash": 1, "created_at": 1, "updated_at": 1
+                }
+            ).sort("decision_id", 1).batch_size(batch_size)
+
+            while True:
+                traces = await cursor.to_list(batch_size)
+                if not traces:
+                    break
+
+                count, search_failures = await BulkAnnotationService._apply_batch(
+                    job_id, job["annotation"], traces
+                )
+                annotated += count
+                elapsed = time.monotonic() - started
+                await db.annotation_jobs.update_one(
+                    {"_id": job_id},
+                    {
+                        "$inc": {"annotated": count, "search_failures": search_failures},
+                        "$set": {
+                            "last_decision_id": traces[-1]["decision_id"],
+                            "docs_per_second": round(annotated / elapsed, 1) if elapsed else None,
+                            "updated_at": datetime.utcnow()
+                        }
+                    }
+                )
+
+            await BulkAnnotationService._update(
+                job_id, {"status": "completed", "completed_at": datetime.utcnow()}
+            )
+            logger.info(f"Annotation job {job_id} completed: {annotated} traces annotated")
+
+        except asyncio.CancelledError:
+            await BulkAnnotationService._update(job_id, {"status": "interrupted"})
+            raise
+        except Exception as e:
+            logger.error(f"Annotation job {job_id} failed: {e}", exc_info=True)
+            await BulkAnnotationService._update(job_id, {"status": "failed", "error": str(e)})
+
+    @staticmethod
+    async def _apply_batch(job_id: str, annotation: Dict[str, Any], traces: List[Dict[str, Any]]):
+        """Annotate one batch of traces; returns (annotated, search index failures)"""
+        db = get_database()
+        decision_ids = [trace["decision_id"] for trace in traces]
+
+        done = set(await db.decision_annotations.distinct(
+            "decision_id", {"job_id": job_id, "decision_id": {"$in": decision_ids}}
+        ))
+        traces = [trace for trace in traces if trace["decision_id"] not in done]
+        if not traces:
+            return 0, 0
+        decision_ids = [trace["decision_id"] for trace in traces]
+
+        notes = [{"decision_id": decision_id, "job_id": job_id, **annotation} for decision_id in decision_ids]
+        await db.decision_annotations.insert_many(notes, ordered=False)
+
+        # A resumed job runs long after its notes' timestamp, so traces may hold
+        # newer notes by now: updated_at only moves forward and last_note is
+        # only replaced by a newer note
+        now = datetime.utcnow()
+        updated_at = now.replace(microsecond=now.microsecond // 1000 * 1000)
+        await db.decision_traces.update_many(
+            {"decision_id": {"$in": decision_ids}},
+            {"$inc": {"annotation_summary.count": 1}, "$max": {"updated_at": updated_at}}
+        )
+        await db.decision_traces.update_many(
+            {
+                "decision_id": {"$in": decision_ids},
+                "$or": [
+                    {"annotation_summary.last_note": None},
+                    {"annotation_summary.last_note.timestamp": {"$lt": annotation["timestamp"]}}
+                ]
+            },
+            {"$set": {"annotation_summary.last_note": annotation}}
+        )
+
+        await search_cache.invalidate({trace["source_system"] for trace in traces})
+        await trace_cache.invalidate_many({
+            trace["decision_id"]: trace_version(
+                {**trace, "updated_at": max(updated_at, trace.get("updated_at") or updated_at)}
+            )
+            for trace in traces
+        })
+
+        indices = {trace["decision_id"]: trace_index(trace["timestamp"]) for trace in traces}
+        return len(traces), await BulkAnnotationService._index_batch(notes, indices, updated_at)
+
+    @staticmethod
+    async def _index_batch(notes: List[Dict[str, Any]], indices: Dict[str, str], updated_at: datetime) -> int:
+        """Index the batch's annotations and summaries with one _bulk request; returns failures"""
+        last_note = summary_es_document({"last_note": {
+            key: value for key, value in notes[0].items() if key in ("reviewer", "note", "timestamp", "tags")
+        }})["last_note"]
+
+        operations = []
+        for note in notes:
+            operations.append({"index": {"_index": ANNOTATIONS_INDEX, "_id": str(note["_id"])}})
+            operations.append(annotation_es_document(note))
+            operations.append({"update": {"_index": indices[note["decision_id"]], "_id": note["decision_id"]}})
+            operations.append({"script": {
+                "source": SUMMARY_SCRIPT,
+                "params": {"note": last_note, "updated_at": updated_at.isoformat()}
+            }})
+
+        try:
+            response = await get_es_client().bulk(operations=operations)
+        except Exception as e:
+            logger.warning(f"Bulk annotation indexing failed: {e}")
+            return len(notes)
+
+        if not response.get("errors"):
+            return 0
+        return sum(1 for item in response["items"] if next(iter(item.values())).get("error"))
+
+    @staticmethod
+    async def _update(job_id: str, fields: Dict[str, Any]):
+        db = get_database()
+        await db.annotation_jobs.update_one(
+            {"_id": job_id},
+            {"$set": {**fields, "updated_at": datetime.utcnow()}}
+        )
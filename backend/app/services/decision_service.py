@@ -2,20 +2,43 @@
 Business logic for decision traces
 """
 
-import hashlib
 import json
+import logging
 from datetime import datetime
-from typing import List, Optional, Dict, Any
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
 
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError
+
+from app.core import canonical, integrity
 from app.core.database import get_database, get_next_sequence
 from app.core.elasticsearch_client import get_es_client
+from app.core.ids import id_generator
+from app.core.payload_mapping import payload_text, promoted_values
+from app.core.projection import FieldSet
+from app.core.search_cache import search_cache
+from app.core.search_indices import trace_index
+from app.core.trace_cache import ETAG_FIELDS, trace_cache, trace_version
+from app.core.serialization import trace_document
+from app.core.es_indexer import get_indexer
+from app.services.rollup_service import RollupService
+from app.services.statistics_service import StatisticsService
 from app.models.decision import (
+    BatchIngestResponse,
+    BatchItemResult,
     DecisionTrace,
     DecisionTraceCreate,
-    ReviewNote,
     RiskLevel
 )
 
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY = 11000
+
+# MongoDB write errors that fail the same way however often the write is sent:
+# BadValue, DocumentValidationFailure, BSONObjectTooLarge, KeyTooLong
+PERMANENT_WRITE_ERRORS = {2, 121, 10334, 17280}
+
 
 class DecisionService:
     """Service for managing decision traces"""
@@ -23,26 +46,28 @@ class DecisionService:
     @staticmethod
     def generate_decision_id() -> str:
         """Generate unique decision ID"""
-        timestamp = datetime.utcnow().strftime("%Y%m%d")
-        return f"DEC_{timestamp}_{int(datetime.utcnow().timestamp() * 1000000)}"
+        return id_generator.next_id()
     
     @staticmethod
-    def calculate_hash(trace_data: Dict[str, Any]) -> str:
+    def calculate_hash(trace_data: Dict[str, Any], version: int = canonical.CURRENT_VERSION) -> str:
         """Calculate SHA-256 hash for immutability"""
-        # Create deterministic JSON string
-        json_str = json.dumps(trace_data, sort_keys=True, default=str)
-        return hashlib.sha256(json_str.encode()).hexdigest()
+        return integrity.calculate_hash(trace_data, version)
     
     @staticmethod
-    async def create_decision_trace(trace_create: DecisionTraceCreate) -> DecisionTrace:
-        """Create a new decision trace"""
-        db = get_database()
-        es_client = get_es_client()
-        
-        # Generate decision ID
-        decision_id = DecisionService.generate_decision_id()
+    def generate_decision_ids(count: int) -> List[str]:
+        """Generate unique, increasing decision IDs for a batch"""
+        return id_generator.next_ids(count)
+    
+    @staticmethod
+    def build_trace_data(
+        trace_create: DecisionTraceCreate,
+        decision_id: str,
+        now: datetime
+    ) -> Dict[str, Any]:
+        """Build the stored document for a trace, including its hash"""
+        # MongoDB stores milliseconds; truncate so the hashed value survives a round trip
+        now = now.replace(microsecond=now.microsecond // 1000 * 1000)
         
-        # Prepare trace data
         trace_data = {
             "decision_id": decision_id,
             "source_system": trace_create.source_system,
@@ -51,138 +76,421 @@ class DecisionService:
             "output": trace_create.output,
             "confidence": trace_create.confidence,
             "risk_level": trace_create.risk_level.value,
-            "timestamp": datetime.utcnow(),
-            "review_notes": [],
-            "created_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow(),
+            "timestamp": now,
+            "annotation_summary": {"count": 0, "last_note": None},
+            "created_at": now,
+            "updated_at": now,
             "metadata": trace_create.metadata or {}
         }
         
-        # Calculate hash for immutability
-        trace_data["hash"] = DecisionService.calculate_hash(trace_data)
-        
-        # Store in MongoDB
-        await db.decision_traces.insert_one(trace_data)
+        # Calculate hash for immutability over the fields that never change
+        trace_data["hash"] = DecisionService.calculate_hash(integrity.hash_input(trace_data))
+        trace_data["hash_version"] = canonical.CURRENT_VERSION
         
-        # Prepare data for Elasticsearch (remove MongoDB _id and convert datetime)
+        return trace_data
+    
+    @staticmethod
+    def to_es_document(trace_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Prepare a stored trace for Elasticsearch"""
+        # Remove MongoDB _id
         es_data = trace_data.copy()
         es_data.pop("_id", None)
+        es_data.pop("ingest_key", None)
         
         # Convert datetime objects to ISO format strings for Elasticsearch
         for key in ["timestamp", "created_at", "updated_at"]:
             if key in es_data and isinstance(es_data[key], datetime):
                 es_data[key] = es_data[key].isoformat()
         
-        # Index in Elasticsearch for search
-        await es_client.index(
-            index="decision_traces",
-            id=decision_id,
-            document=es_data
+        # Derived search fields; see app.core.payload_mapping
+        es_data["payload_text"] = payload_text(trace_data)
+        promoted = promoted_values(trace_data)
+        if promoted:
+            es_data["promoted"] = {trace_data["source_system"]: promoted}
+        
+        return es_data
+    
+    @staticmethod
+    async def create_decision_trace(trace_create: DecisionTraceCreate) -> DecisionTrace:
+        """Create a new decision trace"""
+        db = get_database()
+        
+        # Generate decision ID
+        decision_id = DecisionService.generate_decision_id()
+        
+        # Prepare trace data
+        trace_data = DecisionService.build_trace_data(
+            trace_create, decision_id, datetime.utcnow()
         )
         
+        # Store in MongoDB
+        await db.decision_traces.insert_one(trace_data)
+        await StatisticsService.record([trace_data])
+        await RollupService.record([trace_data])
+        await search_cache.invalidate([trace_data["source_system"]])
+        
+        # Index in Elasticsearch for search
+        indexer = get_indexer()
+        if indexer:
+            await indexer.index(
+                trace_index(trace_data["timestamp"]), decision_id, DecisionService.to_es_document(trace_data)
+            )
+        else:
+            await get_es_client().index(
+                index=trace_index(trace_data["timestamp"]),
+                id=decision_id,
+                document=DecisionService.to_es_document(trace_data)
+            )
+        
         # Remove _id from trace_data before returning
         trace_data.pop("_id", None)
         
         return DecisionTrace(**trace_data)
     
     @staticmethod
-    async def get_decision_trace(decision_id: str) -> Optional[DecisionTrace]:
-        """Retrieve a decision trace by ID"""
-        db = get_database()
+    async def create_decision_traces_batch(items: List[Dict[str, Any]]) -> BatchIngestResponse:
+        """
+        Create many decision traces at once
         
-        trace_data = await db.decision_traces.find_one({"decision_id": decision_id})
+        Items are validated individually, written with a single unordered
+        insert_many and handed to search indexing together. A failing item
+        is reported in its result slot without rejecting the rest.
+        """
+        response, stored = await DecisionService.store_decision_traces_batch(items)
         
-        if trace_data:
-            trace_data.pop("_id", None)
-            return DecisionTrace(**trace_data)
+        # Index in Elasticsearch
+        if stored:
+            await DecisionService.index_documents(stored)
         
-        return None
+        return response
     
     @staticmethod
-    async def add_annotation(
-        decision_id: str,
-        reviewer: str,
-        note: str,
-        tags: List[str]
-    ) -> Optional[DecisionTrace]:
-        """Add a review note to a decision trace"""
+    async def store_decision_traces_batch(
+        items: List[Dict[str, Any]],
+        ingest_keys: Optional[List[str]] = None
+    ) -> Tuple[BatchIngestResponse, List[Dict[str, Any]]]:
+        """
+        Validate and store a batch in MongoDB; returns the response and stored documents
+        
+        ingest_keys, one per item, identify where each item came from,
+        such as a Kafka topic, partition and offset. They are stored under
+        a unique index, so storing the same items again returns the traces
+        stored the first time instead of duplicating them.
+        """
         db = get_database()
-        es_client = get_es_client()
         
-        # Create review note
-        review_note = ReviewNote(
-            reviewer=reviewer,
-            note=note,
-            tags=tags,
-            timestamp=datetime.utcnow()
-        )
+        results: List[Optional[BatchItemResult]] = [None] * len(items)
+        
+        # Validate each item on its own so one bad record doesn't fail the batch
+        valid = []
+        for index, item in enumerate(items):
+            try:
+                valid.append((index, DecisionTraceCreate.parse_obj(item)))
+            except ValidationError as e:
+                results[index] = BatchItemResult(index=index, status="failed", error=str(e))
+        
+        # Build documents with one timestamp and one ID allocation for the batch
+        now = datetime.utcnow()
+        decision_ids = DecisionService.generate_decision_ids(len(valid))
+        documents = [
+            DecisionService.build_trace_data(trace_create, decision_id, now)
+            for (_, trace_create), decision_id in zip(valid, decision_ids)
+        ]
+        if ingest_keys is not None:
+            for (index, _), document in zip(valid, documents):
+                document["ingest_key"] = ingest_keys[index]
+        
+        # Store in MongoDB; unordered so every valid document is attempted
+        write_errors: Dict[int, Dict[str, Any]] = {}
+        duplicates: Dict[int, str] = {}
+        if documents:
+            try:
+                await db.decision_traces.insert_many(documents, ordered=False)
+            except BulkWriteError as e:
+                for error in e.details.get("writeErrors", []):
+                    if error.get("code") == DUPLICATE_KEY and "ingest_key" in error.get("keyPattern", {}):
+                        duplicates[error["index"]] = documents[error["index"]]["ingest_key"]
+                    else:
+                        write_errors[error["index"]] = error
         
-        # Update in MongoDB
-        result = await db.decision_traces.find_one_and_update(
-            {"decision_id": decision_id},
-            {
-                "$push": {"review_notes": review_note.dict()},
-                "$set": {"updated_at": datetime.utcnow()}
-            },
-            return_document=True
+        # Items stored by an earlier attempt resolve to the trace stored then
+        existing = {}
+        if duplicates:
+            cursor = db.decision_traces.find({"ingest_key": {"$in": list(duplicates.values())}})
+            async for doc in cursor:
+                existing[doc["ingest_key"]] = doc
+        
+        stored = []
+        inserted = []
+        for position, ((index, _), document) in enumerate(zip(valid, documents)):
+            if position in duplicates:
+                document = existing.get(duplicates[position])
+                if document is None:
+                    # Deleted since the duplicate key error; store it on the next attempt
+                    write_errors[position] = {"errmsg": "stored trace disappeared"}
+            if position in write_errors:
+                error = write_errors[position]
+                results[index] = BatchItemResult(
+                    index=index,
+                    status="failed",
+                    error=error.get("errmsg", "write failed"),
+                    retryable=error.get("code") not in PERMANENT_WRITE_ERRORS
+                )
+                continue
+            if position not in duplicates:
+                inserted.append(document)
+            stored.append(document)
+            results[index] = BatchItemResult(
+                index=index, status="created", decision_id=document["decision_id"]
+            )
+        
+        # Traces stored by an earlier attempt were already counted
+        await StatisticsService.record(inserted)
+        await RollupService.record(inserted)
+        await search_cache.invalidate({doc["source_system"] for doc in inserted})
+        
+        succeeded = len(stored)
+        response = BatchIngestResponse(
+            total=len(items),
+            succeeded=succeeded,
+            failed=len(items) - succeeded,
+            results=results
         )
+        return response, stored
+    
+    @staticmethod
+    async def ingest_ndjson(
+        chunks: AsyncIterator[bytes],
+        batch_size: int,
+        max_line_bytes: int,
+        on_result: Callable[[BatchItemResult], Awaitable[None]]
+    ) -> Dict[str, int]:
+        """
+        Ingest a newline-delimited JSON stream in rolling batches
+        
+        Lines are parsed as chunks arrive and written once batch_size
+        lines are pending, so memory use is bounded by the batch and the
+        longest line rather than the size of the stream. on_result is
+        called with every line's outcome; BatchItemResult.index holds the
+        1-based line number.
+        """
+        summary = {"lines": 0, "succeeded": 0, "failed": 0}
+        pending: List[Tuple[int, Any]] = []
         
-        if result:
-            result.pop("_id", None)
+        async def record(result: BatchItemResult):
+            summary["succeeded" if result.status == "created" else "failed"] += 1
+            await on_result(result)
+        
+        async def flush():
+            items = [item for _, item in pending]
+            response = await DecisionService.create_decision_traces_batch(items)
+            for (line_number, _), result in zip(pending, response.results):
+                result.index = line_number
+                await record(result)
+            pending.clear()
+        
+        # Physical lines read, blank ones included, so reported numbers match the input
+        line_count = 0
+        
+        async def handle_line(line: bytes):
+            nonlocal line_count
+            line_count += 1
+            line_number = line_count
+            if not line.strip():
+                return
+            summary["lines"] += 1
+            try:
+                item = json.loads(line)
+            except ValueError as e:
+                await record(BatchItemResult(index=line_number, status="failed", error=f"Invalid JSON: {e}"))
+                return
+            pending.append((line_number, item))
+            if len(pending) >= batch_size:
+                await flush()
+        
+        buffer = bytearray()
+        oversized = False
+        async for chunk in chunks:
+            buffer.extend(chunk)
+            while True:
+                newline = buffer.find(b"\n")
+                if newline < 0:
+                    break
+                if oversized:
+                    # Discard the remainder of a line that already exceeded the limit
+                    oversized = False
+                else:
+                    await handle_line(bytes(buffer[:newline]))
+                del buffer[:newline + 1]
             
-            # Update in Elasticsearch
-            await es_client.update(
-                index="decision_traces",
-                id=decision_id,
-                doc={"review_notes": result["review_notes"]}
+            if len(buffer) > max_line_bytes:
+                if not oversized:
+                    line_count += 1
+                    summary["lines"] += 1
+                    await record(BatchItemResult(
+                        index=line_count,
+                        status="failed",
+                        error=f"Line exceeds {max_line_bytes} bytes"
+                    ))
+                    oversized = True
+                buffer.clear()
+        
+        if buffer and not oversized:
+            await handle_line(bytes(buffer))
+        if pending:
+            await flush()
+        
+        return summary
+    
+    @staticmethod
+    async def index_documents(documents: List[Dict[str, Any]]) -> None:
+        """Queue stored traces for search indexing, or bulk index them directly"""
+        indexer = get_indexer()
+        if indexer is None:
+            # MongoDB is the system of record, so search indexing failures
+            # are logged rather than reported as failed items
+            failed = await DecisionService.bulk_index(documents)
+            if failed:
+                logger.error(f"Bulk indexing failed for {len(failed)} traces")
+            return
+        
+        for document in documents:
+            await indexer.index(
+                trace_index(document["timestamp"]),
+                document["decision_id"],
+                DecisionService.to_es_document(document)
             )
-            
-            return DecisionTrace(**result)
+    
+    @staticmethod
+    async def bulk_index(documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Index stored traces in Elasticsearch with one _bulk call; returns the documents that failed"""
+        es_client = get_es_client()
+        
+        operations = []
+        for document in documents:
+            operations.append({"index": {"_index": trace_index(document["timestamp"]), "_id": document["decision_id"]}})
+            operations.append(DecisionService.to_es_document(document))
+        
+        try:
+            response = await es_client.bulk(operations=operations)
+        except Exception as e:
+            logger.warning(f"Bulk indexing of {len(documents)} traces failed: {e}")
+            return documents
+        
+        if not response.get("errors"):
+            return []
+        
+        return [
+            document for document, item in zip(documents, response["items"])
+            if item["index"].get("error")
+        ]
+    
+    @staticmethod
+    async def get_decision_trace(decision_id: str) -> Optional[DecisionTrace]:
+        """Retrieve a decision trace by ID"""
+        trace_data = await DecisionService.get_decision_document(decision_id)
+        
+        if trace_data:
+            return DecisionTrace(**trace_data)
         
         return None
     
     @staticmethod
-    async def verify_hash(decision_id: str) -> bool:
-        """Verify decision trace integrity via hash"""
-        trace = await DecisionService.get_decision_trace(decision_id)
+    async def get_decision_document(
+        decision_id: str,
+        fieldset: Optional[FieldSet] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Retrieve a decision trace by ID as a response-shaped document, without model validation"""
+        result = await DecisionService.get_versioned_document(decision_id, fieldset)
+        return result[0] if result else None
+    
+    @staticmethod
+    async def get_versioned_document(
+        decision_id: str,
+        fieldset: Optional[FieldSet] = None
+    ) -> Optional[Tuple[Dict[str, Any], str]]:
+        """
+        Retrieve a response-shaped trace and its version tag
         
-        if not trace:
-            return False
+        Full traces are read through the trace cache. Cached documents
+        are shared, so callers must not modify them.
+        """
+        if fieldset is None:
+            cached = await trace_cache.get(decision_id)
+            if cached:
+                return cached
         
-        # Recalculate hash
-        trace_data = trace.dict()
-        stored_hash = trace_data.pop("hash")
-        trace_data.pop("review_notes", None)
-        trace_data.pop("updated_at", None)
+        db = get_database()
+        projection = fieldset.mongo_projection(keep=ETAG_FIELDS) if fieldset else None
+        trace_data = await db.decision_traces.find_one({"decision_id": decision_id}, projection)
         
-        calculated_hash = DecisionService.calculate_hash(trace_data)
+        if not trace_data:
+            return None
         
-        return stored_hash == calculated_hash
+        version = trace_version(trace_data)
+        document = trace_document(trace_data, fieldset)
+        if fieldset is None:
+            trace_cache.set(decision_id, document, version)
+        return document, version
     
     @staticmethod
-    async def get_statistics() -> Dict[str, Any]:
-        """Get system statistics"""
-        db = get_database()
+    async def get_decision_documents(
+        decision_ids: List[str],
+        fieldset: Optional[FieldSet] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Retrieve many response-shaped traces, keyed by decision ID
         
-        # Total decisions
-        total = await db.decision_traces.count_documents({})
+        Full traces are taken from the trace cache where possible; the
+        rest are read with a single $in query. Missing IDs are absent
+        from the result.
+        """
+        found: Dict[str, Dict[str, Any]] = {}
+        wanted = list(dict.fromkeys(decision_ids))
         
-        # Decisions by risk level
-        pipeline = [
-            {"$group": {"_id": "$risk_level", "count": {"$sum": 1}}}
-        ]
-        risk_stats = await db.decision_traces.aggregate(pipeline).to_list(None)
+        if fieldset is None:
+            cached = await trace_cache.get_many(wanted)
+            for decision_id, (document, _) in cached.items():
+                found[decision_id] = document
+            wanted = [decision_id for decision_id in wanted if decision_id not in cached]
         
-        # Decisions by system
-        pipeline = [
-            {"$group": {"_id": "$source_system", "count": {"$sum": 1}}},
-            {"$sort": {"count": -1}},
-            {"$limit": 10}
-        ]
-        system_stats = await db.decision_traces.aggregate(pipeline).to_list(None)
+        if wanted:
+            db = get_database()
+            projection = fieldset.mongo_projection() if fieldset else None
+            cursor = db.decision_traces.find({"decision_id": {"$in": wanted}}, projection)
+            async for trace_data in cursor:
+                decision_id = trace_data["decision_id"]
+                document = trace_document(trace_data, fieldset)
+                if fieldset is None:
+                    trace_cache.set(decision_id, document, trace_version(trace_data))
+                found[decision_id] = document
         
-        return {
-            "total_decisions": total,
-            "by_risk_level": {item["_id"]: item["count"] for item in risk_stats},
-            "by_source_system": {item["_id"]: item["count"] for item in system_stats}
-        }
\ No newline at end of file
+        return found
+    
+    @staticmethod
+    async def get_cached_version(decision_id: str) -> Optional[str]:
+        """Version tag of a cached trace that is still current, without reading the full trace"""
+        cached = await trace_cache.get(decision_id)
+        return cached[1] if cached else None
+    
+    @staticmethod
+    async def verify_hash(decision_id: str) -> Optional[str]:
+        """
+        Verify decision trace integrity via hash
+        
+        Returns integrity.VALID, MISMATCH or LEGACY, or None if the trace
+        doesn't exist.
+        """
+        db = get_database()
+        
+        trace_data = await db.decision_traces.find_one({"decision_id": decision_id})
+        
+        if not trace_data:
+            return None
+        
+        return integrity.verify_document(trace_data)
+    
+    @staticmethod
+    async def get_statistics() -> Dict[str, Any]:
+        """Get system statistics from the incrementally maintained counters"""
+        return await StatisticsService.get_statistics()
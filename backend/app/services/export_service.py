@@ -0,0 +1,170 @@
+"""
+Streaming bulk export of decision traces
+"""
+
+import logging
+import time
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from prometheus_client import Counter, Histogram
+
+from app.core.config import settings
+from app.core.database import get_database
+from app.core.elasticsearch_client import get_es_client
+from app.core.pagination import to_millis
+from app.core.projection import FieldSet, es_source
+from app.core.search_indices import search_indices
+from app.core.serialization import trace_document
+from app.models.decision import RiskLevel
+from app.services.search_service import ES_SORT, MONGO_SORT, SORT_FIELDS, SearchService
+
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+EXPORTED_DOCUMENTS = Counter('export_documents_total', 'Traces streamed by exports', ['format', 'engine'])
+EXPORTED_BYTES = Counter('export_bytes_total', 'Bytes streamed by exports', ['format'])
+EXPORT_DURATION = Histogram('export_duration_seconds', 'Export duration', buckets=(1, 5, 15, 60, 300, 900, 3600))
+
+Page = Tuple[List[Dict[str, Any]], Tuple[int, str]]
+
+
+class ExportService:
+    """Service for exporting search results"""
+
+    @staticmethod
+    async def stream_export(
+        writer,
+        source_system: Optional[str] = None,
+        risk_level: Optional[RiskLevel] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        search_text: Optional[str] = None,
+        fieldset: Optional[FieldSet] = None,
+        page_size: int = settings.EXPORT_PAGE_SIZE
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream every trace matching the search filters through writer
+
+        Reads page by page in (timestamp, decision_id) descending order,
+        so memory is bounded by page_size whatever the export size.
+        Throughput is logged when the export ends, including when the
+        client disconnects early.
+        """
+        format_name = writer.extension
+        started = time.monotonic()
+        exported = 0
+        sent = 0
+
+        try:
+            chunk = writer.start()
+            if chunk:
+                sent += len(chunk)
+                yield chunk
+
+            pages = ExportService.iter_pages(
+                source_system, risk_level, start_date, end_date, search_text, fieldset, page_size
+            )
+            async for engine, docs in pages:
+                chunk = writer.write([trace_document(doc, fieldset) for doc in docs])
+                exported += len(docs)
+                sent += len(chunk)
+                EXPORTED_DOCUMENTS.labels(format=format_name, engine=engine).inc(len(docs))
+                EXPORTED_BYTES.labels(format=format_name).inc(len(chunk))
+                yield chunk
+
+            chunk = writer.finish()
+            if chunk:
+                sent += len(chunk)
+                EXPORTED_BYTES.labels(format=format_name).inc(len(chunk))
+                yield chunk
+        finally:
+            elapsed = time.monotonic() - started
+            EXPORT_DURATION.observe(elapsed)
+            logger.info(
+                f"Exported {exported} traces as {format_name} ({sent} bytes) in {elapsed:.1f}s "
+                f"({exported / elapsed if elapsed else 0:.0f} docs/s)"
+            )
+
+    @staticmethod
+    async def iter_pages(
+        source_system, risk_level, start_date, end_date, search_text, fieldset, page_size
+    ) -> AsyncIterator[Tuple[str, List[Dict[str, Any]]]]:
+        """
+        Yield (engine, documents) pages from Elasticsearch, or MongoDB when it fails
+
+        Both engines use the same sort, so if Elasticsearch fails part way
+        the export resumes from MongoDB right after the last page sent.
+        """
+        after = None
+        try:
+            es_client = get_es_client()
+            query = SearchService.build_es_query(source_system, risk_level, start_date, end_date, search_text)
+            index = search_indices(start_date, end_date)
+            pages = ExportService._elasticsearch_pages(es_client, index, query, fieldset, page_size)
+            async for docs, after in pages:
+                yield "elasticsearch", docs
+            return
+        except Exception as e:
+            if after is None:
+                logger.warning(f"Export falling back to MongoDB: {e}")
+            else:
+                logger.warning(f"Export resuming from MongoDB after {after}: {e}")
+
+        query = SearchService.build_mongo_query(source_system, risk_level, start_date, end_date, search_text)
+        async for docs, _ in ExportService._mongodb_pages(query, fieldset, page_size, after):
+            yield "mongodb", docs
+
+    @staticmethod
+    async def _elasticsearch_pages(es_client, index, query, fieldset, page_size) -> AsyncIterator[Page]:
+        """Scan a point-in-time snapshot with search_after"""
+        keep_alive = settings.EXPORT_PIT_KEEP_ALIVE
+        pit = await es_client.open_point_in_time(index=index, keep_alive=keep_alive, ignore_unavailable=True)
+        pit_id = pit["id"]
+        search_after = None
+
+        try:
+            while True:
+                response = await es_client.search(
+                    pit={"id": pit_id, "keep_alive": keep_alive},
+                    query=query,
+                    sort=ES_SORT,
+                    size=page_size,
+                    search_after=search_after,
+                    source=es_source(fieldset),
+                    track_total_hits=False
+                )
+                pit_id = response.get("pit_id", pit_id)
+
+                hits = response["hits"]["hits"]
+                if not hits:
+                    return
+                search_after = hits[-1]["sort"]
+                yield [hit["_source"] for hit in hits], (search_after[0], search_after[1])
+
+                if len(hits) < page_size:
+                    return
+        finally:
+            try:
+                await es_client.close_point_in_time(id=pit_id)
+            except Exception as e:
+                logger.warning(f"Failed to close point in time: {e}")
+
+    @staticmethod
+    async def _mongodb_pages(query, fieldset, page_size, after) -> AsyncIterator[Page]:
+        """Read a single sorted cursor in batches of page_size"""
+        db = get_database()
+        projection = fieldset.mongo_projection(keep=SORT_FIELDS) if fieldset else None
+
+        cursor = db.decision_traces.find(
+            SearchService.build_keyset_query(query, after), projection
+        ).sort(MONGO_SORT).batch_size(page_size)
+        if "$text" in query:
+            # Text matches come from the text index, so they are sorted in memory
+            cursor = cursor.allow_disk_use(True)
+
+        while True:
+            docs = await cursor.to_list(page_size)
+            if not docs:
+                return
+            yield docs, (to_millis(docs[-1]["timestamp"]), docs[-1]["decision_id"])
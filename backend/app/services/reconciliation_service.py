@@ -0,0 +1,226 @@
+"""
+MongoDB to Elasticsearch drift reconciliation
+"""
+
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.core.database import get_database
+from app.core.elasticsearch_client import get_es_client
+from app.core.pagination import to_millis
+from app.core.search_indices import search_indices, trace_index
+from app.services.decision_service import DecisionService
+from app.services.search_service import ES_SORT, MONGO_SORT, SearchService
+
+logger = logging.getLogger(__name__)
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def _to_epoch_millis(value: Any) -> Optional[int]:
+    """Normalize a stored timestamp to epoch milliseconds
+
+    MongoDB keeps millisecond precision while the search copy holds the
+    ISO string written at ingest, so both sides are compared at the
+    precision MongoDB can represent.
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return (value - EPOCH) // timedelta(milliseconds=1)
+
+
+class ReconciliationService:
+    """Service for detecting and repairing drift between MongoDB and Elasticsearch"""
+
+    @staticmethod
+    async def reconcile_window(
+        start: datetime,
+        end: datetime,
+        page_size: int = 5000,
+        reset: bool = False,
+        since: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """
+        Reconcile traces with timestamp in [start, end)
+
+        Walks both stores in keyset order (timestamp, decision_id
+        descending, served by the pagination index), comparing only hash
+        and updated_at. Documents missing from or differing in the search
+        index are re-pushed from MongoDB; search documents with no
+        MongoDB counterpart are deleted. Progress is checkpointed after
+        every page so an interrupted run resumes where it stopped.
+        Completed windows are skipped unless they were completed before
+        since, in which case they are scanned again.
+        """
+        db = get_database()
+        window_id = f"{start.isoformat()}/{end.isoformat()}"
+
+        checkpoint = None if reset else await db.reconciliation_checkpoints.find_one({"_id": window_id})
+        if checkpoint is not None and checkpoint["completed"] and since is not None:
+            if checkpoint.get("completed_at") is None or checkpoint["completed_at"] < since:
+                checkpoint = None
+        # Checkpoints written before keyset paging can't be resumed
+        if checkpoint is not None and "after" not in checkpoint:
+            checkpoint = None
+        if checkpoint is None:
+            checkpoint = {
+                "_id": window_id,
+                "start": start,
+                "end": end,
+                "after": None,
+                "scanned": 0,
+                "repushed": 0,
+                "deleted": 0,
+                "skipped": 0,
+                "completed": False,
+                "completed_at": None
+            }
+
+        if checkpoint["completed"]:
+            return checkpoint
+
+        blocked = await ReconciliationService._write_blocked(start, end)
+
+        while True:
+            query = SearchService.build_keyset_query(
+                {"timestamp": {"$gte": start, "$lt": end}}, checkpoint["after"]
+            )
+            cursor = db.decision_traces.find(
+                query,
+                {"_id": 0, "decision_id": 1, "timestamp": 1, "hash": 1, "updated_at": 1}
+            ).sort(MONGO_SORT).limit(page_size)
+            mongo_page = await cursor.to_list(None)
+
+            # The last page has no lower bound so trailing search-only documents are caught
+            upper = None
+            if len(mongo_page) == page_size:
+                upper = [to_millis(mongo_page[-1]["timestamp"]), mongo_page[-1]["decision_id"]]
+            es_page = await ReconciliationService._fetch_search_page(
+                start, end, checkpoint["after"], upper, page_size
+            )
+
+            repushed, deleted, skipped = await ReconciliationService._repair(mongo_page, es_page, blocked)
+
+            checkpoint["scanned"] += len(mongo_page)
+            checkpoint["repushed"] += repushed
+            checkpoint["deleted"] += deleted
+            checkpoint["skipped"] = checkpoint.get("skipped", 0) + skipped
+            if upper is None:
+                checkpoint["completed"] = True
+                checkpoint["completed_at"] = datetime.utcnow()
+            else:
+                checkpoint["after"] = upper
+
+            await db.reconciliation_checkpoints.replace_one(
+                {"_id": window_id}, checkpoint, upsert=True
+            )
+
+            if checkpoint["completed"]:
+                logger.info(
+                    f"Reconciled {window_id}: scanned={checkpoint['scanned']} "
+                    f"repushed={checkpoint['repushed']} deleted={checkpoint['deleted']} "
+                    f"skipped={checkpoint['skipped']}"
+                )
+                return checkpoint
+
+    @staticmethod
+    async def _write_blocked(start: datetime, end: datetime) -> Set[str]:
+        """Partitions in the window made read-only by scripts/maintain_search_indices.py"""
+        response = await get_es_client().indices.get_settings(
+            index=search_indices(start, end), name="index.blocks.write", ignore_unavailable=True
+        )
+        return {
+            index for index, item in response.body.items()
+            if item["settings"].get("index", {}).get("blocks", {}).get("write") == "true"
+        }
+
+    @staticmethod
+    async def _fetch_search_page(
+        start: datetime,
+        end: datetime,
+        after: Optional[List[Any]],
+        upper: Optional[List[Any]],
+        page_size: int
+    ) -> Dict[str, Dict[str, Any]]:
+        """Fetch hash and updated_at for search documents sorted after after, up to and including upper"""
+        es_client = get_es_client()
+
+        timestamp_range = {"gte": start.isoformat(), "lt": end.isoformat()}
+        query = {"bool": {"filter": [{"range": {"timestamp": timestamp_range}}]}}
+        if upper is not None:
+            # Keys at the bound's timestamp are cut off by decision_id below
+            query["bool"]["filter"].append({"range": {"timestamp": {"gte": upper[0], "format": "epoch_millis"}}})
+
+        documents = {}
+        search_after = after
+        while True:
+            response = await es_client.search(
+                index=search_indices(start, end),
+                ignore_unavailable=True,
+                query=query,
+                sort=ES_SORT,
+                source=["hash", "updated_at"],
+                size=page_size,
+                search_after=search_after
+            )
+            hits = response["hits"]["hits"]
+            for hit in hits:
+                if upper is not None and hit["sort"][0] == upper[0] and hit["sort"][1] < upper[1]:
+                    return documents
+                documents[hit["_id"]] = {**hit["_source"], "_index": hit["_index"]}
+            if len(hits) < page_size:
+                return documents
+            search_after = hits[-1]["sort"]
+
+    @staticmethod
+    async def _repair(
+        mongo_page: List[Dict[str, Any]],
+        es_page: Dict[str, Dict[str, Any]],
+        blocked: Set[str]
+    ) -> Tuple[int, int, int]:
+        """
+        Re-push drifted documents and delete orphans; returns (repushed, deleted, skipped)
+
+        Documents in write-blocked partitions can't be repaired and are
+        counted as skipped until the block is lifted.
+        """
+        db = get_database()
+
+        drifted = []
+        skipped = 0
+        for doc in mongo_page:
+            es_doc = es_page.pop(doc["decision_id"], None)
+            if (
+                es_doc is None
+                or es_doc.get("hash") != doc.get("hash")
+                or _to_epoch_millis(es_doc.get("updated_at")) != _to_epoch_millis(doc.get("updated_at"))
+            ):
+                if trace_index(doc["timestamp"]) in blocked:
+                    skipped += 1
+                else:
+                    drifted.append(doc["decision_id"])
+
+        # Whatever is left exists only in the search index
+        orphans = []
+        for decision_id, es_doc in es_page.items():
+            if es_doc["_index"] in blocked:
+                skipped += 1
+            else:
+                orphans.append((decision_id, es_doc["_index"]))
+
+        if drifted:
+            documents = await db.decision_traces.find({"decision_id": {"$in": drifted}}).to_list(None)
+            await DecisionService.index_documents(documents)
+
+        if orphans:
+            await get_es_client().bulk(operations=[
+                {"delete": {"_index": index, "_id": decision_id}}
+                for decision_id, index in orphans
+            ])
+
+        return len(drifted), len(orphans), skipped
@@ -0,0 +1,476 @@
+"""
+Rebuild the search index from MongoDB
+
+A reindex job rebuilds each trace partition (or the single trace index
+when partitioning is off) into a fresh staging index, then swaps it in
+behind the read alias without a gap. Each partition is split into
+timestamp slices read by concurrent cursors; every slice checkpoints
+after each acknowledged bulk request, so a crashed job resumes where it
+stopped.
+
+Traces the search index rejects (for example on a mapping conflict)
+don't stop the job; they are counted in failed, with a sample of the
+errors kept in failures.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.database import get_database
+from app.core.elasticsearch_client import (
+    ensure_trace_indices,
+    get_es_client,
+    trace_index_settings,
+    trace_mappings
+)
+from app.core.pagination import to_millis
+from app.core.search_indices import (
+    INTERVALS,
+    next_period,
+    partition_name,
+    period_start,
+    read_alias,
+    use_legacy_index
+)
+from app.services.decision_service import DecisionService
+from app.services.search_service import MONGO_SORT, SearchService
+
+logger = logging.getLogger(__name__)
+
+# Bulk item statuses worth retrying
+RETRYABLE_STATUSES = {429, 502, 503, 504}
+
+# Rejected traces kept on a job, most recent last
+MAX_RECORDED_FAILURES = 100
+
+# Traces written this long before a partition's load began are caught up after its swap
+CATCH_UP_MARGIN = timedelta(minutes=1)
+
+
+def split_range(start: datetime, end: datetime, count: int) -> List[Dict[str, Any]]:
+    """Split [start, end) into count contiguous slices"""
+    step = (end - start) / count
+    bounds = [start + step * i for i in range(count)] + [end]
+    return [
+        {"start": bounds[i], "end": bounds[i + 1], "after": None, "done": False}
+        for i in range(count)
+        if bounds[i] < bounds[i + 1]
+    ]
+
+
+class ReindexService:
+    """Service for resumable search index rebuilds"""
+
+    @staticmethod
+    async def create_job(
+        indices: Optional[List[str]] = None,
+        payload_mapping: Optional[str] = None,
+        slices: int = 8
+    ) -> Dict[str, Any]:
+        """
+        Record a new reindex job
+
+        Covers every partition between the oldest and newest trace, or
+        only the named indices. payload_mapping defaults to
+        ES_PAYLOAD_MAPPING.
+        """
+        db = get_database()
+        now = datetime.utcnow()
+        job_id = uuid.uuid4().hex
+        alias = read_alias()
+
+        oldest = await db.decision_traces.find_one({}, {"timestamp": 1}, sort=[("timestamp", 1)])
+        newest = await db.decision_traces.find_one({}, {"timestamp": 1}, sort=[("timestamp", -1)])
+
+        ranges = []
+        if oldest and settings.ES_PARTITION_INTERVAL in INTERVALS:
+            start = period_start(oldest["timestamp"])
+            while start <= newest["timestamp"]:
+                ranges.append((partition_name(start), start, next_period(start)))
+                start = next_period(start)
+        elif oldest:
+            ranges.append((alias, oldest["timestamp"], newest["timestamp"] + timedelta(milliseconds=1)))
+
+        if indices is not None:
+            ranges = [item for item in ranges if item[0] in indices]
+
+        periods = []
+        for index, start, end in ranges:
+            suffix = index[len(alias) + 1:] or "all"
+            periods.append({
+                "index": index,
+                # Outside the index pattern, so the index template doesn't apply
+                "staging": f"{alias}_reindex-{job_id[:8]}-{suffix}",
+                "start": start,
+                "end": end,
+                "status": "pending",
+                "load_started": None,
+                "loaded": 0,
+                "slices": split_range(start, end, slices)
+            })
+
+        es_client = get_es_client()
+        job = {
+            "_id": job_id,
+            "payload_mapping": payload_mapping or settings.ES_PAYLOAD_MAPPING,
+            # Partitions replacing a concrete index named like the read alias swap in together
+            "legacy": bool(
+                settings.ES_PARTITION_INTERVAL in INTERVALS
+                and await es_client.indices.exists(index=alias)
+                and not await es_client.indices.exists_alias(name=alias)
+            ),
+            "status": "pending",
+            "periods": periods,
+            "total": await db.decision_traces.estimated_document_count() if indices is None else None,
+            "loaded": 0,
+            "failed": 0,
+            "failures": [],
+            "docs_per_second": None,
+            "created_at": now,
+            "updated_at": now,
+            "completed_at": None,
+            "error": None
+        }
+        await db.reindex_jobs.insert_one(job)
+        return job
+
+    @staticmethod
+    async def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job's progress, without slice checkpoints"""
+        job = await get_database().reindex_jobs.find_one({"_id": job_id}, {"periods.slices": 0})
+        if not job:
+            return None
+        job["job_id"] = job.pop("_id")
+        return job
+
+    @staticmethod
+    async def run_job(job_id: str, concurrency: int, batch_size: int):
+        """
+        Run or resume a reindex job
+
+        At most concurrency slices are read at once across all
+        partitions. Each partition is swapped in as soon as it is
+        loaded; a legacy job swaps them all in together at the end.
+        """
+        db = get_database()
+        job = await db.reindex_jobs.find_one({"_id": job_id})
+        if not job or job["status"] == "completed":
+            return
+
+        await ReindexService._update(job_id, {"status": "running", "error": None})
+
+        # Only as many partitions are staged at once as their slices can keep busy
+        slices = max((len(period["slices"]) for period in job["periods"]), default=1)
+        partitions = asyncio.Semaphore(max(1, concurrency // slices))
+        semaphore = asyncio.Semaphore(concurrency)
+        progress = {"loaded": 0, "failed": 0, "started": time.monotonic()}
+
+        async def run_period(i: int):
+            async with partitions:
+                await ReindexService._run_period(job, i, semaphore, batch_size, progress)
+
+        try:
+            await asyncio.gather(*(run_period(i) for i in range(len(job["periods"]))))
+
+            if job["legacy"]:
+                await ReindexService._swap_legacy(job, batch_size)
+
+            await ReindexService._update(
+                job_id, {"status": "completed", "completed_at": datetime.utcnow()}
+            )
+            logger.info(f"Reindex job {job_id} completed: {progress['loaded']} traces loaded")
+            if progress["failed"]:
+                logger.warning(f"Reindex job {job_id}: {progress['failed']} traces were rejected by the search index")
+
+        except asyncio.CancelledError:
+            await ReindexService._update(job_id, {"status": "interrupted"})
+            raise
+        except Exception as e:
+            logger.error(f"Reindex job {job_id} failed: {e}", exc_info=True)
+            await ReindexService._update(job_id, {"status": "failed", "error": str(e)})
+
+    @staticmethod
+    async def _run_period(job: Dict[str, Any], i: int, semaphore: asyncio.Semaphore, batch_size: int, progress):
+        """Load one partition into its staging index and, unless legacy, swap it in"""
+        db = get_database()
+        es_client = get_es_client()
+        period = job["periods"][i]
+        staging = period["staging"]
+
+        if period["status"] == "pending":
+            if not await es_client.indices.exists(index=staging):
+                # Bulk load without replicas or refreshes; restored before the swap
+                await es_client.indices.create(
+                    index=staging,
+                    mappings=trace_mappings(job["payload_mapping"]),
+                    settings={**trace_index_settings(), "number_of_replicas": 0, "refresh_interval": "-1"}
+                )
+            if period["load_started"] is None:
+                period["load_started"] = datetime.utcnow()
+                await db.reindex_jobs.update_one(
+                    {"_id": job["_id"]}, {"$set": {f"periods.{i}.load_started": period["load_started"]}}
+                )
+
+            async def run_slice(j: int):
+                async with semaphore:
+                    await ReindexService._load_slice(job["_id"], i, j, staging, period["slices"][j], batch_size, progress)
+
+            await asyncio.gather(*(
+                run_slice(j) for j, slice_ in enumerate(period["slices"]) if not slice_["done"]
+            ))
+
+            await es_client.indices.put_settings(index=staging, settings={
+                "index.refresh_interval": trace_index_settings()["refresh_interval"],
+                "index.blocks.write": True
+            })
+            await es_client.indices.refresh(index=staging)
+            period["status"] = "loaded"
+            await db.reindex_jobs.update_one(
+                {"_id": job["_id"]}, {"$set": {f"periods.{i}.status": "loaded"}}
+            )
+
+        if period["status"] == "loaded" and not job["legacy"]:
+            if period["index"] == read_alias():
+                await ReindexService._swap_single(period)
+            else:
+                await ReindexService._swap_partition(period, batch_size)
+            await ReindexService._catch_up(period, batch_size)
+            period["status"] = "swapped"
+            await db.reindex_jobs.update_one(
+                {"_id": job["_id"]}, {"$set": {f"periods.{i}.status": "swapped"}}
+            )
+            logger.info(f"Reindexed {period['index']}")
+
+    @staticmethod
+    async def _load_slice(job_id: str, i: int, j: int, index: str, slice_: Dict[str, Any], batch_size: int, progress):
+        """
+        Copy one timestamp slice into index, checkpointing after each bulk request
+
+        The next page is read while the previous bulk request is in
+        flight; checkpoints still advance strictly in order.
+        """
+        db = get_database()
+        query = {"timestamp": {"$gte": slice_["start"], "$lt": slice_["end"]}}
+        after = tuple(slice_["after"]) if slice_["after"] else None
+        cursor = db.decision_traces.find(
+            SearchService.build_keyset_query(query, after)
+        ).sort(MONGO_SORT).batch_size(batch_size)
+
+        in_flight = None
+        while True:
+            documents = await cursor.to_list(batch_size)
+
+            if in_flight is not None:
+                count, last, failures = await in_flight
+                progress["loaded"] += count
+                progress["failed"] += len(failures)
+                elapsed = time.monotonic() - progress["started"]
+                await db.reindex_jobs.update_one(
+                    {"_id": job_id},
+                    {
+                        "$inc": {"loaded": count, f"periods.{i}.loaded": count, "failed": len(failures)},
+                        "$push": {"failures": {"$each": failures, "$slice": -MAX_RECORDED_FAILURES}},
+                        "$set": {
+                            f"periods.{i}.slices.{j}.after": [to_millis(last["timestamp"]), last["decision_id"]],
+                            "docs_per_second": round(progress["loaded"] / elapsed, 1) if elapsed else None,
+                            "updated_at": datetime.utcnow()
+                        }
+                    }
+                )
+
+            if not documents:
+                break
+            in_flight = asyncio.ensure_future(ReindexService._send(index, documents))
+
+        await db.reindex_jobs.update_one(
+            {"_id": job_id}, {"$set": {f"periods.{i}.slices.{j}.done": True}}
+        )
+
+    @staticmethod
+    async def _send(index: str, documents: List[Dict[str, Any]], max_retries: int = 5):
+        """
+        Bulk index documents, retrying throttled items
+
+        Returns (indexed count, last document, failures); failures
+        describes each trace the index rejected outright.
+        """
+        es_client = get_es_client()
+        pending = documents
+        failures = []
+
+        for attempt in range(max_retries + 1):
+            operations = []
+            for document in pending:
+                operations.append({"index": {"_index": index, "_id": document["decision_id"]}})
+                operations.append(DecisionService.to_es_document(document))
+            response = await es_client.bulk(operations=operations)
+
+            if not response.get("errors"):
+                return len(documents) - len(failures), documents[-1], failures
+
+            retry = []
+            for document, item in zip(pending, response["items"]):
+                error = item["index"].get("error")
+                if error is None:
+                    continue
+                if item["index"]["status"] in RETRYABLE_STATUSES:
+                    retry.append(document)
+                    continue
+                failures.append({
+                    "decision_id": document["decision_id"],
+                    "index": index,
+                    "status": item["index"]["status"],
+                    "error": error.get("reason") if isinstance(error, dict) else str(error)
+                })
+
+            if not retry:
+                return len(documents) - len(failures), documents[-1], failures
+            pending = retry
+            await asyncio.sleep(settings.ES_INDEXER_BACKOFF_BASE * 2 ** attempt)
+
+        raise RuntimeError(f"{len(pending)} traces still throttled after {max_retries} retries")
+
+    @staticmethod
+    async def _swap_partition(period: Dict[str, Any], batch_size: int):
+        """
+        Replace a partition with its loaded staging index
+
+        The staging index takes the partition's place in the read alias
+        in one atomic update, then is cloned back under the partition's
+        name so writes routed by timestamp find it. Each step checks
+        where an interrupted run stopped.
+        """
+        es_client = get_es_client()
+        alias, index, staging = read_alias(), period["index"], period["staging"]
+
+        # Swapped before an interruption
+        if not await es_client.indices.exists(index=staging):
+            return
+
+        if not await es_client.indices.exists_alias(name=alias, index=staging):
+            actions = [{"add": {"index": staging, "alias": alias}}]
+            if await es_client.indices.exists(index=index):
+                actions.append({"remove_index": {"index": index}})
+            await es_client.indices.update_aliases(actions=actions)
+
+        if await es_client.indices.exists(index=index):
+            if await es_client.indices.exists_alias(name=alias, index=index):
+                # A write since the swap recreated the partition from the template; fill it directly
+                await ReindexService._copy_range(index, period["start"], period["end"], batch_size)
+                await es_client.indices.delete(index=staging)
+                return
+        else:
+            # Cloning hard-links the staging index's segments, so it takes seconds
+            await es_client.indices.clone(
+                index=staging,
+                target=index,
+                settings={
+                    "index.number_of_replicas": settings.ES_PARTITION_REPLICAS,
+                    "index.blocks.write": None
+                },
+                wait_for_active_shards=1
+            )
+
+        await es_client.indices.update_aliases(actions=[
+            {"add": {"index": index, "alias": alias}},
+            {"remove_index": {"index": staging}}
+        ])
+
+    @staticmethod
+    async def _swap_single(period: Dict[str, Any]):
+        """Put the staging index behind the read alias in place of the unpartitioned index"""
+        es_client = get_es_client()
+        alias, staging = read_alias(), period["staging"]
+
+        if await es_client.indices.exists_alias(name=alias, index=staging):
+            return
+
+        await es_client.indices.put_settings(index=staging, settings={
+            "index.number_of_replicas": settings.ES_PARTITION_REPLICAS,
+            "index.blocks.write": None
+        })
+        if await es_client.indices.exists_alias(name=alias):
+            previous = list((await es_client.indices.get_alias(name=alias)).body)
+        else:
+            previous = [alias]
+        await es_client.indices.update_aliases(actions=[
+            {"add": {"index": staging, "alias": alias, "is_write_index": True}},
+            *({"remove_index": {"index": index}} for index in previous)
+        ])
+
+    @staticmethod
+    async def _swap_legacy(job: Dict[str, Any], batch_size: int):
+        """Replace a pre-partitioning index with every loaded partition at once"""
+        db = get_database()
+        es_client = get_es_client()
+        alias = read_alias()
+
+        if await es_client.indices.exists(index=alias) and not await es_client.indices.exists_alias(name=alias):
+            await es_client.indices.update_aliases(actions=[
+                {"remove_index": {"index": alias}},
+                *({"add": {"index": period["staging"], "alias": alias}} for period in job["periods"])
+            ])
+        for period in job["periods"]:
+            await ReindexService._swap_partition(period, batch_size)
+
+        # The template must exist before catch-up writes create any partition
+        use_legacy_index(False)
+        await ensure_trace_indices(es_client)
+
+        for i, period in enumerate(job["periods"]):
+            if period["status"] == "swapped":
+                continue
+            await ReindexService._catch_up(period, batch_size)
+            await db.reindex_jobs.update_one(
+                {"_id": job["_id"]}, {"$set": {f"periods.{i}.status": "swapped"}}
+            )
+
+        # Running processes keep writing to the old index name, now a multi-index alias,
+        # until they notice the migration (ES_LEGACY_CHECK_INTERVAL)
+        logger.warning(
+            f"{alias} is now partitioned; reconcile from the job's start to catch "
+            f"writes other processes made before switching to partitions"
+        )
+
+    @staticmethod
+    async def _catch_up(period: Dict[str, Any], batch_size: int):
+        """Re-index traces written or annotated since the partition's load began"""
+        since = period["load_started"] - CATCH_UP_MARGIN
+        query = {
+            "timestamp": {"$gte": period["start"], "$lt": period["end"]},
+            "$or": [{"created_at": {"$gte": since}}, {"updated_at": {"$gte": since}}]
+        }
+        cursor = get_database().decision_traces.find(query).batch_size(batch_size)
+        while True:
+            documents = await cursor.to_list(batch_size)
+            if not documents:
+                return
+            failed = await DecisionService.bulk_index(documents)
+            if failed:
+                logger.error(f"Catch-up indexing failed for {len(failed)} traces in {period['index']}")
+
+    @staticmethod
+    async def _copy_range(index: str, start: datetime, end: datetime, batch_size: int):
+        cursor = get_database().decision_traces.find(
+            {"timestamp": {"$gte": start, "$lt": end}}
+        ).batch_size(batch_size)
+        while True:
+            documents = await cursor.to_list(batch_size)
+            if not documents:
+                return
+            _, _, failures = await ReindexService._send(index, documents)
+            if failures:
+                logger.error(f"Indexing failed for {len(failures)} traces in {index}: {failures[0]['error']}")
+
+    @staticmethod
+    async def _update(job_id: str, fields: Dict[str, Any]):
+        db = get_database()
+        await db.reindex_jobs.update_one(
+            {"_id": job_id},
+            {"$set": {**fields, "updated_at": datetime.utcnow()}}
+        )
@@ -0,0 +1,393 @@
+"""
+Time-bucketed decision rollups
+
+decision_rollups holds one document per (granularity, bucket,
+source_system, risk_level) with the decision count, confidence
+sum/min/max and counts per output.decision. Ingest updates the minute,
+hour and day buckets incrementally, backfill() recomputes them from the
+stored traces, and timeseries() answers trend queries from the rollups,
+reading raw traces only for sub-minute range edges and edges whose
+minute rollups have expired.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import ReplaceOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from app.core.config import settings
+from app.core.database import get_database
+from app.services.statistics_service import escape_key, unescape_key
+
+logger = logging.getLogger(__name__)
+
+GRANULARITIES = {
+    "minute": timedelta(minutes=1),
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+}
+
+# Rollups that cover the partial edges of a coarser bucket
+FINER = {"day": "hour", "hour": "minute"}
+
+DUPLICATE_KEY = 11000
+
+RollupKey = Tuple[str, datetime, str, str]
+
+
+def truncate(value: datetime, granularity: str) -> datetime:
+    """Start of the bucket containing value"""
+    value = value.replace(second=0, microsecond=0)
+    if granularity in ("hour", "day"):
+        value = value.replace(minute=0)
+    if granularity == "day":
+        value = value.replace(hour=0)
+    return value
+
+
+def naive_utc(value: datetime) -> datetime:
+    """Naive UTC datetime, comparable with stored timestamps"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def ceil_bucket(value: datetime, granularity: str) -> datetime:
+    """Start of the first bucket at or after value"""
+    start = truncate(value, granularity)
+    return start if start == value else start + GRANULARITIES[granularity]
+
+
+def outcome_of(doc: Dict[str, Any]) -> str:
+    """The decision outcome a trace is counted under"""
+    decision = (doc.get("output") or {}).get("decision")
+    return "unknown" if decision is None else str(decision)
+
+
+class _Bucket:
+    """Running totals for one rollup document"""
+    __slots__ = ("count", "confidence_sum", "confidence_min", "confidence_max", "outcomes")
+
+    def __init__(self):
+        self.count = 0
+        self.confidence_sum = 0.0
+        self.confidence_min = None
+        self.confidence_max = None
+        self.outcomes: Dict[str, int] = defaultdict(int)
+
+    def add(self, count: int, confidence_sum: float, confidence_min: float, confidence_max: float,
+            outcomes: Dict[str, int]):
+        self.count += count
+        self.confidence_sum += confidence_sum
+        self.confidence_min = confidence_min if self.confidence_min is None else min(self.confidence_min, confidence_min)
+        self.confidence_max = confidence_max if self.confidence_max is None else max(self.confidence_max, confidence_max)
+        for outcome, outcome_count in outcomes.items():
+            self.outcomes[outcome] += outcome_count
+
+
+def _expires_at(granularity: str, bucket: datetime) -> Optional[datetime]:
+    # Only minute buckets expire; hour and day buckets are kept
+    if granularity != "minute":
+        return None
+    return bucket + timedelta(days=settings.ROLLUP_MINUTE_RETENTION_DAYS)
+
+
+def _key_filter(key: RollupKey) -> Dict[str, Any]:
+    granularity, bucket, source_system, risk_level = key
+    return {
+        "granularity": granularity,
+        "bucket": bucket,
+        "source_system": source_system,
+        "risk_level": risk_level,
+    }
+
+
+class RollupService:
+    """Service for time-bucketed decision rollups"""
+
+    @staticmethod
+    def accumulate(documents: Iterable[Dict[str, Any]]) -> Dict[RollupKey, _Bucket]:
+        """Rollup deltas for a set of traces, in every granularity"""
+        buckets: Dict[RollupKey, _Bucket] = defaultdict(_Bucket)
+        for doc in documents:
+            confidence = doc["confidence"]
+            outcome = {outcome_of(doc): 1}
+            for granularity in GRANULARITIES:
+                key = (granularity, truncate(doc["timestamp"], granularity), doc["source_system"], doc["risk_level"])
+                buckets[key].add(1, confidence, confidence, confidence, outcome)
+        return buckets
+
+    @staticmethod
+    async def record(documents: Iterable[Dict[str, Any]]):
+        """
+        Add newly stored traces to their rollups
+
+        One unordered bulk of upserts per call. Upserts that lose a race
+        to create the same bucket are retried once as plain updates.
+        Failures are logged; backfill() repairs the affected range.
+        """
+        operations = []
+        for key, bucket in RollupService.accumulate(documents).items():
+            update = {
+                "$inc": {
+                    "count": bucket.count,
+                    "confidence_sum": bucket.confidence_sum,
+                    **{f"outcomes.{escape_key(outcome)}": count for outcome, count in bucket.outcomes.items()}
+                },
+                "$min": {"confidence_min": bucket.confidence_min},
+                "$max": {"confidence_max": bucket.confidence_max},
+            }
+            expires_at = _expires_at(key[0], key[1])
+            if expires_at:
+                update["$setOnInsert"] = {"expires_at": expires_at}
+            operations.append(UpdateOne(_key_filter(key), update, upsert=True))
+
+        if not operations:
+            return
+
+        collection = get_database().decision_rollups
+        try:
+            await collection.bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            retry = [operations[error["index"]] for error in errors if error.get("code") == DUPLICATE_KEY]
+            if len(retry) < len(errors):
+                logger.error(f"Failed to update {len(errors) - len(retry)} decision rollups")
+            if retry:
+                try:
+                    await collection.bulk_write(retry, ordered=False)
+                except Exception as retry_error:
+                    logger.error(f"Failed to update decision rollups: {retry_error}")
+        except Exception as e:
+            logger.error(f"Failed to update decision rollups: {e}")
+
+    @staticmethod
+    async def backfill_day(day: datetime) -> int:
+        """
+        Recompute every rollup for one UTC day from the stored traces
+
+        Minute buckets come from a single $dateTrunc aggregation; hour and
+        day buckets are summed from them. Rollups are replaced in place and
+        only then are buckets with no traces left deleted, so readers never
+        see the day empty. The backfill is idempotent. Returns the number
+        of traces counted.
+        """
+        db = get_database()
+        start = truncate(day, "day")
+        end = start + GRANULARITIES["day"]
+
+        pipeline = [
+            {"$match": {"timestamp": {"$gte": start, "$lt": end}}},
+            {"$group": {
+                "_id": {
+                    "bucket": {"$dateTrunc": {"date": "$timestamp", "unit": "minute"}},
+                    "source_system": "$source_system",
+                    "risk_level": "$risk_level",
+                    "outcome": "$output.decision",
+                },
+                "count": {"$sum": 1},
+                "confidence_sum": {"$sum": "$confidence"},
+                "confidence_min": {"$min": "$confidence"},
+                "confidence_max": {"$max": "$confidence"},
+            }},
+        ]
+
+        buckets: Dict[RollupKey, _Bucket] = defaultdict(_Bucket)
+        total = 0
+        async for row in db.decision_traces.aggregate(pipeline, allowDiskUse=True):
+            group = row["_id"]
+            outcome = outcome_of({"output": {"decision": group.get("outcome")}})
+            total += row["count"]
+            for granularity in GRANULARITIES:
+                key = (granularity, truncate(group["bucket"], granularity), group["source_system"], group["risk_level"])
+                buckets[key].add(
+                    row["count"], row["confidence_sum"], row["confidence_min"], row["confidence_max"],
+                    {outcome: row["count"]}
+                )
+
+        operations = []
+        for key, bucket in buckets.items():
+            document = {
+                **_key_filter(key),
+                "count": bucket.count,
+                "confidence_sum": bucket.confidence_sum,
+                "confidence_min": bucket.confidence_min,
+                "confidence_max": bucket.confidence_max,
+                "outcomes": {escape_key(outcome): count for outcome, count in bucket.outcomes.items()},
+            }
+            expires_at = _expires_at(key[0], key[1])
+            if expires_at:
+                document["expires_at"] = expires_at
+            operations.append(ReplaceOne(_key_filter(key), document, upsert=True))
+        if operations:
+            await db.decision_rollups.bulk_write(operations, ordered=False)
+
+        # Drop rollups with no traces left
+        stale = []
+        cursor = db.decision_rollups.find(
+            {"granularity": {"$in": list(GRANULARITIES)}, "bucket": {"$gte": start, "$lt": end}},
+            {"granularity": 1, "bucket": 1, "source_system": 1, "risk_level": 1}
+        )
+        async for doc in cursor:
+            key = (doc["granularity"], doc["bucket"], doc["source_system"], doc["risk_level"])
+            if key not in buckets:
+                stale.append(doc["_id"])
+        if stale:
+            await db.decision_rollups.delete_many({"_id": {"$in": stale}})
+
+        return total
+
+    @staticmethod
+    def parse_interval(interval: str) -> timedelta:
+        """Parse an interval such as 15m, 6h or 7d; raises ValueError"""
+        units = {"m": "minutes", "h": "hours", "d": "days"}
+        number, unit = interval[:-1], interval[-1:]
+        if unit not in units or not number.isdigit() or int(number) < 1:
+            raise ValueError(f"Invalid interval: {interval} (use e.g. 1m, 15m, 1h, 1d)")
+        return timedelta(**{units[unit]: int(number)})
+
+    @staticmethod
+    def base_granularity(interval: timedelta) -> str:
+        """Coarsest stored granularity that evenly divides interval"""
+        for granularity in ("day", "hour", "minute"):
+            if interval % GRANULARITIES[granularity] == timedelta(0):
+                return granularity
+        raise ValueError("Interval must be a whole number of minutes")
+
+    @staticmethod
+    async def _rows(
+        start: datetime,
+        end: datetime,
+        granularity: str,
+        filters: Dict[str, Any]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Rollup rows covering exactly [start, end)
+
+        Whole buckets come from granularity's rollups and the partial
+        edges from the next finer ones. Edges rollups can't cover exactly
+        (sub-minute, or minutes whose rollups have expired) are counted
+        from the traces. Rows carry unescaped outcomes.
+        """
+        if start >= end:
+            return
+
+        whole_start, whole_end = ceil_bucket(start, granularity), truncate(end, granularity)
+        if whole_start >= whole_end:
+            whole_start = whole_end = end
+        else:
+            query = {"granularity": granularity, "bucket": {"$gte": whole_start, "$lt": whole_end}, **filters}
+            cursor = get_database().decision_rollups.find(query, {"_id": 0, "expires_at": 0})
+            async for rollup in cursor:
+                rollup["outcomes"] = {
+                    unescape_key(outcome): count for outcome, count in rollup.get("outcomes", {}).items()
+                }
+                yield rollup
+
+        retention = timedelta(days=settings.ROLLUP_MINUTE_RETENTION_DAYS)
+        for edge_start, edge_end in ((start, whole_start), (whole_end, end)):
+            finer = FINER.get(granularity)
+            if finer == "minute" and truncate(edge_start, "minute") + retention <= datetime.utcnow():
+                finer = None
+            if finer:
+                rows = RollupService._rows(edge_start, edge_end, finer, filters)
+            else:
+                rows = RollupService._trace_rows(edge_start, edge_end, filters)
+            async for row in rows:
+                yield row
+
+    @staticmethod
+    async def _trace_rows(
+        start: datetime,
+        end: datetime,
+        filters: Dict[str, Any]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Minute rollup rows for [start, end) computed from the stored traces"""
+        if start >= end:
+            return
+
+        pipeline = [
+            {"$match": {"timestamp": {"$gte": start, "$lt": end}, **filters}},
+            {"$group": {
+                "_id": {
+                    "bucket": {"$dateTrunc": {"date": "$timestamp", "unit": "minute"}},
+                    "source_system": "$source_system",
+                    "risk_level": "$risk_level",
+                    "outcome": "$output.decision",
+                },
+                "count": {"$sum": 1},
+                "confidence_sum": {"$sum": "$confidence"},
+                "confidence_min": {"$min": "$confidence"},
+                "confidence_max": {"$max": "$confidence"},
+            }},
+        ]
+        async for row in get_database().decision_traces.aggregate(pipeline):
+            group = row.pop("_id")
+            outcome = outcome_of({"output": {"decision": group.pop("outcome", None)}})
+            row.update(group)
+            row["outcomes"] = {outcome: row["count"]}
+            yield row
+
+    @staticmethod
+    async def timeseries(
+        start: datetime,
+        end: datetime,
+        interval: timedelta,
+        source_system: Optional[str] = None,
+        risk_level: Optional[str] = None,
+        group_by: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Decision counts and confidence per interval over [start, end)
+
+        Reads the coarsest rollup that divides interval and re-buckets
+        it; intervals are aligned to start truncated to that rollup.
+        Only data in [start, end) is counted: buckets cut by start or end
+        are filled from finer rollups or the traces, and their points are
+        flagged partial. group_by splits each point by source_system or
+        risk_level. Empty intervals are omitted. Raises ValueError if the
+        range would read too many rollups.
+        """
+        start, end = naive_utc(start), naive_utc(end)
+        granularity = RollupService.base_granularity(interval)
+        step = GRANULARITIES[granularity]
+        origin = truncate(start, granularity)
+        if (end - origin) / step > settings.ROLLUP_MAX_BUCKETS:
+            raise ValueError(
+                f"Range too large for {granularity} rollups; use a longer interval or a shorter range"
+            )
+
+        filters: Dict[str, Any] = {}
+        if source_system:
+            filters["source_system"] = source_system
+        if risk_level:
+            filters["risk_level"] = risk_level
+
+        points: Dict[Tuple[datetime, Optional[str]], _Bucket] = defaultdict(_Bucket)
+        async for rollup in RollupService._rows(start, end, granularity, filters):
+            point = origin + ((rollup["bucket"] - origin) // interval) * interval
+            group = rollup[group_by] if group_by else None
+            points[(point, group)].add(
+                rollup["count"], rollup["confidence_sum"], rollup["confidence_min"], rollup["confidence_max"],
+                rollup["outcomes"]
+            )
+
+        series = []
+        for (point, group), bucket in sorted(points.items(), key=lambda item: (item[0][0], item[0][1] or "")):
+            entry = {"bucket": point}
+            if group_by:
+                entry[group_by] = group
+            entry.update({
+                "count": bucket.count,
+                "avg_confidence": bucket.confidence_sum / bucket.count if bucket.count else None,
+                "min_confidence": bucket.confidence_min,
+                "max_confidence": bucket.confidence_max,
+                "outcomes": dict(bucket.outcomes),
+                # The interval extends past start or end; only the part inside was counted
+                "partial": point < start or point + interval > end,
+            })
+            series.append(entry)
+        return series
@@ -0,0 +1,166 @@
+"""
+Merkle sealing of decision hashes per time window
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from app.core import merkle
+from app.core.database import get_database
+
+logger = logging.getLogger(__name__)
+
+# Nodes are written in chunks to keep insert_many requests bounded
+NODE_INSERT_CHUNK = 10000
+
+# Leaf order; served by the (timestamp, decision_id) index read backwards.
+# Windows sealed before it was introduced have no leaf_order and used decision_id.
+LEAF_ORDER = [("timestamp", 1), ("decision_id", 1)]
+
+
+class SealService:
+    """Service for sealing time windows of traces under a Merkle root"""
+
+    @staticmethod
+    def window_id(start: datetime, end: datetime) -> str:
+        """Stable identifier for a sealing window"""
+        return f"{start.isoformat()}/{end.isoformat()}"
+
+    @staticmethod
+    async def seal_window(start: datetime, end: datetime) -> Optional[Dict[str, Any]]:
+        """
+        Seal traces with timestamp in [start, end) under one Merkle root
+
+        Leaves are the stored trace hashes in (timestamp, decision_id)
+        order, read from the keyset pagination index as a stream; the
+        tree is built as leaves arrive and its nodes written in chunks,
+        so memory doesn't grow with the window. Every tree node is stored
+        so inclusion proofs can be served with a single query. Windows
+        that are already sealed are returned as-is; empty windows are not
+        sealed.
+        """
+        db = get_database()
+        window_id = SealService.window_id(start, end)
+
+        existing = await db.merkle_seals.find_one({"_id": window_id})
+        if existing:
+            return existing
+
+        # Clear nodes left behind by an interrupted run before writing
+        await db.merkle_nodes.delete_many({"window_id": window_id})
+
+        cursor = db.decision_traces.find(
+            {"timestamp": {"$gte": start, "$lt": end}},
+            {"_id": 0, "decision_id": 1, "hash": 1}
+        ).sort(LEAF_ORDER).batch_size(NODE_INSERT_CHUNK)
+
+        builder = merkle.TreeBuilder()
+        chunk = []
+
+        async def write(nodes, decision_id: Optional[str] = None):
+            nonlocal chunk
+            for level, index, node in nodes:
+                document = {"window_id": window_id, "level": level, "index": index, "hash": node.hex()}
+                if level == 0:
+                    document["decision_id"] = decision_id
+                chunk.append(document)
+            if len(chunk) >= NODE_INSERT_CHUNK:
+                await db.merkle_nodes.insert_many(chunk, ordered=False)
+                chunk = []
+
+        async for leaf in cursor:
+            await write(builder.add_leaf(leaf["hash"]), leaf["decision_id"])
+
+        if not builder.leaf_count:
+            return None
+
+        root, depth, nodes = builder.finish()
+        await write(nodes)
+        if chunk:
+            await db.merkle_nodes.insert_many(chunk, ordered=False)
+
+        # The seal is written last; its presence marks the window as complete
+        seal = {
+            "_id": window_id,
+            "start": start,
+            "end": end,
+            "root": root.hex(),
+            "leaf_count": builder.leaf_count,
+            "leaf_order": "timestamp,decision_id",
+            "depth": depth,
+            "sealed_at": datetime.utcnow()
+        }
+        await db.merkle_seals.insert_one(seal)
+
+        logger.info(f"Sealed window {window_id}: {seal['leaf_count']} traces, root {seal['root']}")
+        return seal
+
+    @staticmethod
+    async def seal_closed_windows(
+        start: datetime,
+        window: timedelta,
+        grace: timedelta
+    ) -> List[Dict[str, Any]]:
+        """Seal every complete window from start up to now minus grace"""
+        cutoff = datetime.utcnow() - grace
+        seals = []
+
+        window_start = start
+        while window_start + window <= cutoff:
+            seal = await SealService.seal_window(window_start, window_start + window)
+            if seal:
+                seals.append(seal)
+            window_start += window
+
+        return seals
+
+    @staticmethod
+    async def get_inclusion_proof(decision_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Build an O(log n) inclusion proof for a sealed trace
+
+        Returns None if the trace has not been sealed yet.
+        """
+        db = get_database()
+
+        leaf = await db.merkle_nodes.find_one({"decision_id": decision_id, "level": 0})
+        if not leaf:
+            return None
+
+        seal = await db.merkle_seals.find_one({"_id": leaf["window_id"]})
+        if not seal:
+            return None
+
+        positions = merkle.sibling_positions(leaf["index"], seal["leaf_count"])
+
+        siblings = {}
+        if positions:
+            cursor = db.merkle_nodes.find(
+                {"window_id": leaf["window_id"], "$or": positions},
+                {"_id": 0, "level": 1, "index": 1, "hash": 1}
+            )
+            async for node in cursor:
+                siblings[node["level"]] = node
+
+        proof = []
+        for position in positions:
+            node = siblings[position["level"]]
+            proof.append({
+                "position": "left" if node["index"] < (leaf["index"] >> position["level"]) else "right",
+                "hash": node["hash"]
+            })
+
+        trace = await db.decision_traces.find_one({"decision_id": decision_id}, {"_id": 0, "hash": 1})
+
+        return {
+            "decision_id": decision_id,
+            "window_id": leaf["window_id"],
+            "window_start": seal["start"],
+            "window_end": seal["end"],
+            "leaf_index": leaf["index"],
+            "leaf_count": seal["leaf_count"],
+            "trace_hash": trace["hash"] if trace else None,
+            "root": seal["root"],
+            "proof": proof
+        }
@@ -2,12 +2,35 @@
 Search service using Elasticsearch
 """
 
-from typing import List, Optional
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
 
+import orjson
+
+from app.core.cache import TTLCache
+from app.core.config import settings
 from app.core.elasticsearch_client import get_es_client
 from app.core.database import get_database
-from app.models.decision import DecisionTrace, SearchResponse, RiskLevel
+from app.core.pagination import encode_cursor, from_millis, to_millis
+from app.core.payload_mapping import payload_search_fields
+from app.core.projection import FieldSet, es_source
+from app.core.search_cache import search_cache
+from app.core.search_indices import search_indices
+from app.core.serialization import trace_document
+from app.models.decision import RiskLevel, TotalMode
+from app.services.statistics_service import StatisticsService
+
+logger = logging.getLogger(__name__)
+
+# decision_id breaks timestamp ties so keyset pagination is exact
+SORT_FIELDS = ("timestamp", "decision_id")
+MONGO_SORT = [("timestamp", -1), ("decision_id", -1)]
+ES_SORT = [{"timestamp": {"order": "desc"}}, {"decision_id": {"order": "desc"}}]
+
+# Recent MongoDB counts per normalized filter, for total_mode=estimate
+_count_cache = TTLCache(settings.SEARCH_COUNT_CACHE_SIZE, settings.SEARCH_COUNT_CACHE_TTL)
 
 
 class SearchService:
@@ -21,31 +44,88 @@ class SearchService:
         end_date: Optional[datetime] = None,
         search_text: Optional[str] = None,
         limit: int = 20,
-        offset: int = 0
-    ) -> SearchResponse:
-        """Search decision traces with filters"""
+        offset: int = 0,
+        fieldset: Optional[FieldSet] = None,
+        after: Optional[Tuple[int, str]] = None,
+        total_mode: TotalMode = TotalMode.exact
+    ) -> Dict[str, Any]:
+        """
+        Search decision traces with filters; results are response-shaped documents
+        
+        Results are ordered by (timestamp, decision_id) descending. after is
+        a decoded cursor: the (timestamp ms, decision_id) of the last result
+        of the previous page. Pages are read with search_after or a range
+        predicate rather than an offset, so deep pages cost the same as the
+        first. The response's next_cursor resumes after its last result.
         
+        total_mode picks what total costs: exact counts every match,
+        estimate returns an approximate or cached count flagged by
+        total_relation, and none skips counting. has_more never depends
+        on the total.
+        
+        Responses are cached until the next write to the source system
+        they cover (see app.core.search_cache).
+        """
+        cache_key = None
+        if settings.SEARCH_CACHE_ENABLED:
+            cache_key = await search_cache.key_for({
+                "source_system": source_system,
+                "risk_level": risk_level.value if risk_level else None,
+                "start_date": start_date,
+                "end_date": end_date,
+                "search_text": search_text.strip() if search_text else None,
+                "limit": limit,
+                "offset": offset,
+                "after": after,
+                "total_mode": total_mode.value,
+                "fields": fieldset.include if fieldset else None,
+                "exclude": fieldset.exclude if fieldset else None,
+            })
+            cached = await search_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        result = await SearchService._search(
+            source_system, risk_level, start_date, end_date, search_text, limit, offset, fieldset, after,
+            total_mode
+        )
+        
+        if cache_key:
+            await search_cache.set(cache_key, result)
+        return result
+    
+    @staticmethod
+    async def _search(
+        source_system, risk_level, start_date, end_date, search_text, limit, offset, fieldset, after, total_mode
+    ) -> Dict[str, Any]:
         # Try Elasticsearch first, fall back to MongoDB
         try:
             es_client = get_es_client()
             return await SearchService._search_with_elasticsearch(
-                es_client, source_system, risk_level, start_date, end_date, search_text, limit, offset
+                es_client, source_system, risk_level, start_date, end_date, search_text, limit, offset, fieldset, after,
+                total_mode
             )
         except Exception as e:
             # Fall back to MongoDB search
+            logger.warning(f"Search falling back to MongoDB: {e}")
             return await SearchService._search_with_mongodb(
-                source_system, risk_level, start_date, end_date, search_text, limit, offset
+                source_system, risk_level, start_date, end_date, search_text, limit, offset, fieldset, after,
+                total_mode
             )
     
     @staticmethod
-    async def _search_with_mongodb(
-        source_system, risk_level, start_date, end_date, search_text, limit, offset
-    ):
-        """Fallback search using MongoDB"""
-        from app.core.database import get_database
-        db = get_database()
-        
+    def build_mongo_query(
+        source_system: Optional[str] = None,
+        risk_level: Optional[RiskLevel] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        search_text: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Build the MongoDB filter for search parameters"""
         query = {}
+        if search_text:
+            # Served by the decision_traces text index (see app.core.database)
+            query["$text"] = {"$search": search_text}
         if source_system:
             query["source_system"] = source_system
         if risk_level:
@@ -56,28 +136,28 @@ class SearchService:
                 query["timestamp"]["$gte"] = start_date
             if end_date:
                 query["timestamp"]["$lte"] = end_date
-        
-        cursor = db.decision_traces.find(query).sort("timestamp", -1).skip(offset).limit(limit)
-        results = []
-        async for doc in cursor:
-            doc.pop("_id", None)
-            results.append(DecisionTrace(**doc))
-        
-        total = await db.decision_traces.count_documents(query)
-        
-        return SearchResponse(
-            total=total,
-            results=results,
-            limit=limit,
-            offset=offset,
-            has_more=(offset + limit) < total
-        )
+        return query
     
     @staticmethod
-    async def _search_with_elasticsearch(
-        es_client, source_system, risk_level, start_date, end_date, search_text, limit, offset
-    ):
-        """Search using Elasticsearch"""
+    def build_keyset_query(query: Dict[str, Any], after: Optional[Tuple[int, str]]) -> Dict[str, Any]:
+        """Restrict a MongoDB filter to results sorted after a (timestamp ms, decision_id) key"""
+        if not after:
+            return query
+        timestamp = from_millis(after[0])
+        return {"$and": [query, {"$or": [
+            {"timestamp": {"$lt": timestamp}},
+            {"timestamp": timestamp, "decision_id": {"$lt": after[1]}}
+        ]}]}
+    
+    @staticmethod
+    def build_es_query(
+        source_system: Optional[str] = None,
+        risk_level: Optional[RiskLevel] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        search_text: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Build the Elasticsearch query for search parameters"""
         must_conditions = []
         
         if source_system:
@@ -95,70 +175,148 @@ class SearchService:
             must_conditions.append({
                 "multi_match": {
                     "query": search_text,
-                    "fields": ["output.*", "input_payload.*", "rules_triggered.rule_name"]
+                    "fields": [*payload_search_fields(), "rules_triggered.rule_name"]
                 }
             })
         
-        query = {
+        return {
             "bool": {
                 "must": must_conditions if must_conditions else [{"match_all": {}}]
             }
         }
+    
+    @staticmethod
+    async def count_mongodb(query: Dict[str, Any], total_mode: TotalMode) -> Tuple[Optional[int], Optional[str]]:
+        """Total for a MongoDB filter and its relation ("eq" or "approx")"""
+        if total_mode == TotalMode.none:
+            return None, None
+        
+        collection = get_database().decision_traces
+        if total_mode == TotalMode.exact:
+            return await collection.count_documents(query), "eq"
+        
+        # Collection metadata answers an unfiltered count without a scan
+        if not query:
+            return await collection.estimated_document_count(), "approx"
+        
+        key = orjson.dumps(query, option=orjson.OPT_SORT_KEYS)
+        total = _count_cache.get(key)
+        if total is None:
+            total = await collection.count_documents(query)
+            _count_cache.set(key, total)
+        return total, "approx"
+    
+    @staticmethod
+    async def _search_with_mongodb(
+        source_system, risk_level, start_date, end_date, search_text, limit, offset, fieldset, after, total_mode
+    ):
+        """Fallback search using MongoDB"""
+        db = get_database()
+        
+        query = SearchService.build_mongo_query(source_system, risk_level, start_date, end_date, search_text)
+        # Sort keys are always fetched so the next cursor can be built
+        projection = fieldset.mongo_projection(keep=SORT_FIELDS) if fieldset else None
+        
+        page_query = SearchService.build_keyset_query(query, after)
+        
+        # One extra row tells whether another page exists
+        cursor = db.decision_traces.find(page_query, projection).sort(MONGO_SORT)
+        if search_text:
+            # Text matches come from the text index, so they are sorted in memory
+            cursor = cursor.allow_disk_use(True)
+        if not after:
+            cursor = cursor.skip(offset)
+        docs, (total, total_relation) = await asyncio.gather(
+            cursor.limit(limit + 1).to_list(None),
+            SearchService.count_mongodb(query, total_mode)
+        )
+        
+        has_more = len(docs) > limit
+        docs = docs[:limit]
+        next_cursor = None
+        if has_more:
+            next_cursor = encode_cursor(to_millis(docs[-1]["timestamp"]), docs[-1]["decision_id"])
+        
+        results = [trace_document(doc, fieldset) for doc in docs]
+        
+        return {
+            "total": total,
+            "total_relation": total_relation,
+            "results": results,
+            "limit": limit,
+            "offset": offset,
+            "has_more": has_more,
+            "next_cursor": next_cursor,
+            "engine": "mongodb"
+        }
+    
+    @staticmethod
+    async def _search_with_elasticsearch(
+        es_client, source_system, risk_level, start_date, end_date, search_text, limit, offset, fieldset, after, total_mode
+    ):
+        """Search using Elasticsearch"""
+        query = SearchService.build_es_query(source_system, risk_level, start_date, end_date, search_text)
         
+        # Estimates stop counting at the threshold and report "gte" beyond it
+        track_total_hits = {
+            TotalMode.exact: True,
+            TotalMode.estimate: settings.SEARCH_TOTAL_ESTIMATE_THRESHOLD,
+            TotalMode.none: False,
+        }[total_mode]
+        
+        # One extra row tells whether another page exists
         response = await es_client.search(
-            index="decision_traces",
+            index=search_indices(start_date, end_date),
+            ignore_unavailable=True,
             query=query,
-            from_=offset,
-            size=limit,
-            sort=[{"timestamp": {"order": "desc"}}]
+            from_=None if after else offset,
+            size=limit + 1,
+            sort=ES_SORT,
+            search_after=list(after) if after else None,
+            source=es_source(fieldset),
+            track_total_hits=track_total_hits
         )
         
-        total = response["hits"]["total"]["value"]
-        results = []
-        for hit in response["hits"]["hits"]:
-            source = hit["_source"]
-            results.append(DecisionTrace(**source))
-        
-        return SearchResponse(
-            total=total,
-            results=results,
-            limit=limit,
-            offset=offset,
-            has_more=(offset + limit) < total
-        )
+        hits = response["hits"]["hits"]
+        has_more = len(hits) > limit
+        hits = hits[:limit]
+        next_cursor = encode_cursor(*hits[-1]["sort"]) if has_more else None
+        
+        hits_total = response["hits"].get("total")
+        results = [trace_document(hit["_source"], fieldset) for hit in hits]
+        
+        return {
+            "total": hits_total["value"] if hits_total else None,
+            "total_relation": hits_total["relation"] if hits_total else None,
+            "results": results,
+            "limit": limit,
+            "offset": offset,
+            "has_more": has_more,
+            "next_cursor": next_cursor,
+            "engine": "elasticsearch"
+        }
     
     @staticmethod
     async def aggregate_by_risk_level() -> dict:
-        """Aggregate decisions by risk level"""
-        db = get_database()
-        pipeline = [{"$group": {"_id": "$risk_level", "count": {"$sum": 1}}}]
-        result = await db.decision_traces.aggregate(pipeline).to_list(None)
-        return {item["_id"]: item["count"] for item in result}
+        """Decisions by risk level, from the statistics counters"""
+        return await StatisticsService.risk_distribution()
     
     @staticmethod
     async def aggregate_by_source_system() -> dict:
-        """Aggregate decisions by source system"""
-        db = get_database()
-        pipeline = [
-            {"$group": {"_id": "$source_system", "count": {"$sum": 1}}},
-            {"$sort": {"count": -1}},
-            {"$limit": 20}
-        ]
-        result = await db.decision_traces.aggregate(pipeline).to_list(None)
-        return {item["_id"]: item["count"] for item in result}
+        """Top 20 source systems by decisions, from the statistics counters"""
+        return await StatisticsService.system_distribution(limit=20)
     
     @staticmethod
-    async def get_recent_high_risk(limit: int = 10) -> List[DecisionTrace]:
-        """Get recent high-risk decisions"""
+    async def get_recent_high_risk(
+        limit: int = 10,
+        fieldset: Optional[FieldSet] = None
+    ) -> List[Dict[str, Any]]:
+        """Get recent high-risk decisions as response-shaped documents"""
         db = get_database()
+        projection = fieldset.mongo_projection() if fieldset else None
         cursor = db.decision_traces.find({
             "risk_level": {"$in": ["high", "critical"]}
-        }).sort("timestamp", -1).limit(limit)
-        
-        results = []
-        async for doc in cursor:
-            doc.pop("_id", None)
-            results.append(DecisionTrace(**doc))
+        }, projection).sort("timestamp", -1).limit(limit)
         
-        return results
+        return [trace_document(doc, fieldset) async for doc in cursor]
     
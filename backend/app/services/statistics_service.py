@@ -0,0 +1,170 @@
+"""
+Incrementally maintained decision statistics
+
+Totals by risk level and by source system live in a single document in
+the counters collection. Ingest adds to it with one $inc per insert
+call, so reading statistics is a single small document fetch instead of
+full-collection aggregations. rebuild() recomputes it from the traces
+if it ever drifts.
+"""
+
+import logging
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Optional
+
+from pymongo.errors import DuplicateKeyError
+
+from app.core.database import get_database
+
+logger = logging.getLogger(__name__)
+
+STATISTICS_ID = "decision_statistics"
+
+# A rebuild marker older than this was left by a reader that died mid-build
+REBUILD_STALE_AFTER = timedelta(minutes=10)
+
+
+def escape_key(value: str) -> str:
+    """Make a value usable as a MongoDB field name ('.' and a leading '$' are reserved)"""
+    escaped = value.replace("%", "%25").replace(".", "%2E")
+    if escaped.startswith("$"):
+        escaped = "%24" + escaped[1:]
+    return escaped
+
+
+def unescape_key(value: str) -> str:
+    return value.replace("%2E", ".").replace("%24", "$").replace("%25", "%")
+
+
+def _distribution(counts: Dict[str, int], limit: Optional[int] = None) -> Dict[str, int]:
+    # Largest first, like the $group/$sort aggregations this replaces
+    items = sorted(counts.items(), key=lambda item: item[1], reverse=True)
+    return {unescape_key(key): count for key, count in items[:limit] if count}
+
+
+class StatisticsService:
+    """Service for decision statistics counters"""
+
+    @staticmethod
+    def increments(documents: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+        """$inc fields for a set of newly stored traces"""
+        inc: Counter = Counter()
+        for doc in documents:
+            inc["total"] += 1
+            inc[f"by_risk_level.{escape_key(doc['risk_level'])}"] += 1
+            inc[f"by_source_system.{escape_key(doc['source_system'])}"] += 1
+        return dict(inc)
+
+    @staticmethod
+    async def record(documents: Iterable[Dict[str, Any]]):
+        """
+        Count newly stored traces
+
+        The traces are already stored, so a failure here is logged rather
+        than raised; rebuild() repairs any drift. Nothing is upserted: until
+        the counters exist, the first read builds them from the traces.
+        """
+        inc = StatisticsService.increments(documents)
+        if not inc:
+            return
+        try:
+            await get_database().counters.update_one(
+                {"_id": STATISTICS_ID}, {"$inc": inc}
+            )
+        except Exception as e:
+            logger.error(f"Failed to update statistics counters: {e}")
+
+    @staticmethod
+    async def rebuild() -> Dict[str, Any]:
+        """
+        Recompute the counters from decision_traces
+
+        Traces ingested while this runs may be counted twice or not at
+        all; run it when ingest is quiet, or run it again afterwards.
+        """
+        db = get_database()
+        pipeline = [
+            {"$facet": {
+                "by_risk_level": [{"$group": {"_id": "$risk_level", "count": {"$sum": 1}}}],
+                "by_source_system": [{"$group": {"_id": "$source_system", "count": {"$sum": 1}}}]
+            }}
+        ]
+        result = (await db.decision_traces.aggregate(pipeline, allowDiskUse=True).to_list(None))[0]
+
+        by_risk_level = {escape_key(item["_id"]): item["count"] for item in result["by_risk_level"]}
+        by_source_system = {escape_key(item["_id"]): item["count"] for item in result["by_source_system"]}
+        document = {
+            "total": sum(by_risk_level.values()),
+            "by_risk_level": by_risk_level,
+            "by_source_system": by_source_system,
+            "rebuilt_at": datetime.utcnow()
+        }
+        await db.counters.replace_one({"_id": STATISTICS_ID}, document, upsert=True)
+        return document
+
+    @staticmethod
+    async def get_counters() -> Dict[str, Any]:
+        """
+        The counters document, building it on first use
+
+        The first reader claims the build by inserting a marker document.
+        Readers that arrive while it runs get {"rebuilding": True} instead
+        of starting the same full-collection aggregation.
+        """
+        counters = get_database().counters
+        document = await counters.find_one({"_id": STATISTICS_ID})
+        if document is not None and not document.get("rebuilding"):
+            return document
+
+        now = datetime.utcnow()
+        if document is None:
+            try:
+                await counters.insert_one(
+                    {"_id": STATISTICS_ID, "rebuilding": True, "rebuild_started_at": now}
+                )
+            except DuplicateKeyError:
+                return {"rebuilding": True}
+        else:
+            claimed = await counters.update_one(
+                {
+                    "_id": STATISTICS_ID,
+                    "rebuilding": True,
+                    "rebuild_started_at": {"$lt": now - REBUILD_STALE_AFTER}
+                },
+                {"$set": {"rebuild_started_at": now}}
+            )
+            if not claimed.modified_count:
+                return {"rebuilding": True}
+
+        try:
+            return await StatisticsService.rebuild()
+        except Exception:
+            # Let the next reader try again
+            await counters.delete_one({"_id": STATISTICS_ID, "rebuilding": True})
+            raise
+
+    @staticmethod
+    async def risk_distribution() -> Dict[str, int]:
+        """Decisions per risk level"""
+        counters = await StatisticsService.get_counters()
+        return _distribution(counters.get("by_risk_level", {}))
+
+    @staticmethod
+    async def system_distribution(limit: int) -> Dict[str, int]:
+        """Decisions per source system, largest first"""
+        counters = await StatisticsService.get_counters()
+        return _distribution(counters.get("by_source_system", {}), limit)
+
+    @staticmethod
+    async def get_statistics() -> Dict[str, Any]:
+        """Total, per risk level and top 10 source systems; rebuilding is set while counters are built"""
+        counters = await StatisticsService.get_counters()
+        statistics = {
+            "total_decisions": counters.get("total", 0),
+            "by_risk_level": _distribution(counters.get("by_risk_level", {})),
+            "by_source_system": _distribution(counters.get("by_source_system", {}), 10)
+        }
+        if counters.get("rebuilding"):
+            statistics["rebuilding"] = True
+        return statistics
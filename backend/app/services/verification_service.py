@@ -0,0 +1,177 @@
+"""
+Bulk integrity verification of decision traces
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
+
+from app.core import integrity
+from app.core.background import get_process_pool
+from app.core.database import get_database
+
+logger = logging.getLogger(__name__)
+
+# Raw documents are handed to worker processes without being decoded here
+RAW_CODEC_OPTIONS = CodecOptions(document_class=RawBSONDocument)
+
+
+class VerificationService:
+    """Service for resumable bulk hash verification jobs"""
+
+    @staticmethod
+    def build_filter(
+        source_system: Optional[str] = None,
+        risk_level: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """Build the MongoDB filter for a verification job"""
+        query = {}
+        if source_system:
+            query["source_system"] = source_system
+        if risk_level:
+            query["risk_level"] = risk_level
+        if start_date or end_date:
+            query["timestamp"] = {}
+            if start_date:
+                query["timestamp"]["$gte"] = start_date
+            if end_date:
+                query["timestamp"]["$lte"] = end_date
+        return query
+
+    @staticmethod
+    async def create_job(filters: Dict[str, Any]) -> Dict[str, Any]:
+        """Record a new verification job for a set of filters"""
+        db = get_database()
+        now = datetime.utcnow()
+
+        job = {
+            "_id": uuid.uuid4().hex,
+            "filter": filters,
+            "status": "pending",
+            "total": await db.decision_traces.count_documents(VerificationService.build_filter(**filters)),
+            "checked": 0,
+            "mismatched": 0,
+            "legacy": 0,
+            "last_id": None,
+            "docs_per_second": None,
+            "created_at": now,
+            "updated_at": now,
+            "completed_at": None,
+            "error": None
+        }
+        await db.verification_jobs.insert_one(job)
+        return job
+
+    @staticmethod
+    async def get_job(job_id: str, mismatch_limit: int = 100) -> Optional[Dict[str, Any]]:
+        """Get a job's progress and the first mismatched decision IDs"""
+        db = get_database()
+
+        job = await db.verification_jobs.find_one({"_id": job_id})
+        if not job:
+            return None
+
+        cursor = db.verification_mismatches.find(
+            {"job_id": job_id}, {"_id": 0, "decision_id": 1}
+        ).limit(mismatch_limit)
+        job["mismatched_ids"] = [doc["decision_id"] async for doc in cursor]
+        # Jobs started before legacy traces were counted separately
+        job.setdefault("legacy", 0)
+        job["job_id"] = job.pop("_id")
+        job.pop("last_id", None)
+        return job
+
+    @staticmethod
+    async def run_job(job_id: str, batch_size: int, max_in_flight: int):
+        """
+        Run or resume a verification job
+
+        Streams raw documents in _id order from the last checkpoint and
+        fans hashing out across the process pool. Batches complete in
+        order, so the checkpoint only ever advances past fully checked
+        documents.
+        """
+        db = get_database()
+        job = await db.verification_jobs.find_one({"_id": job_id})
+        if not job or job["status"] == "completed":
+            return
+
+        query = VerificationService.build_filter(**job["filter"])
+        if job["last_id"] is not None:
+            query["_id"] = {"$gt": job["last_id"]}
+
+        await VerificationService._update(job_id, {"status": "running", "error": None})
+
+        loop = asyncio.get_running_loop()
+        pool = get_process_pool()
+        traces = db.decision_traces.with_options(codec_options=RAW_CODEC_OPTIONS)
+        in_flight: deque = deque()
+        checked = 0
+        started = time.monotonic()
+
+        async def complete_oldest():
+            nonlocal checked
+            mismatched, legacy, last_id, count = await in_flight.popleft()
+            checked += count
+            if mismatched:
+                await db.verification_mismatches.insert_many(
+                    [{"job_id": job_id, "decision_id": decision_id} for decision_id in mismatched]
+                )
+            elapsed = time.monotonic() - started
+            await db.verification_jobs.update_one(
+                {"_id": job_id},
+                {
+                    "$inc": {"checked": count, "mismatched": len(mismatched), "legacy": legacy},
+                    "$set": {
+                        "last_id": last_id,
+                        "docs_per_second": round(checked / elapsed, 1) if elapsed else None,
+                        "updated_at": datetime.utcnow()
+                    }
+                }
+            )
+
+        try:
+            cursor = traces.find(query).sort("_id", 1).batch_size(batch_size)
+            batch: List[bytes] = []
+
+            async for doc in cursor:
+                batch.append(doc.raw)
+                if len(batch) >= batch_size:
+                    in_flight.append(loop.run_in_executor(pool, integrity.verify_raw_batch, batch))
+                    batch = []
+                    if len(in_flight) >= max_in_flight:
+                        await complete_oldest()
+
+            if batch:
+                in_flight.append(loop.run_in_executor(pool, integrity.verify_raw_batch, batch))
+            while in_flight:
+                await complete_oldest()
+
+            await VerificationService._update(
+                job_id, {"status": "completed", "completed_at": datetime.utcnow()}
+            )
+            logger.info(f"Verification job {job_id} completed: {checked} documents checked")
+
+        except asyncio.CancelledError:
+            await VerificationService._update(job_id, {"status": "interrupted"})
+            raise
+        except Exception as e:
+            logger.error(f"Verification job {job_id} failed: {e}", exc_info=True)
+            await VerificationService._update(job_id, {"status": "failed", "error": str(e)})
+
+    @staticmethod
+    async def _update(job_id: str, fields: Dict[str, Any]):
+        db = get_database()
+        await db.verification_jobs.update_one(
+            {"_id": job_id},
+            {"$set": {**fields, "updated_at": datetime.utcnow()}}
+        )
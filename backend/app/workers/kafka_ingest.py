@@ -0,0 +1,368 @@
+"""
+Kafka consumer ingest worker
+
+Consumes decision traces from a Kafka topic, writes them to MongoDB and
+Elasticsearch in micro-batches and commits offsets only once both writes
+have succeeded. Each assigned partition is consumed by its own task,
+which starts from the partition's committed offset.
+
+Delivery is at least once, so every trace is stored under its topic,
+partition and offset (ingest_key); a batch stored again after a retry
+or redelivery resolves to the traces stored the first time.
+
+Run with:
+    python -m app.workers.kafka_ingest
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import signal
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Tuple
+
+from pymongo import ReplaceOne
+
+from app.core.config import settings
+from app.core.database import connect_db, close_db, get_database
+from app.core.elasticsearch_client import connect_elasticsearch, close_elasticsearch
+from app.services.decision_service import DecisionService
+
+logger = logging.getLogger(__name__)
+
+
+class Message(NamedTuple):
+    """A consumed record"""
+    topic: str
+    partition: int
+    offset: int
+    value: bytes
+
+
+class ConsumerTransport(ABC):
+    """Source of decision trace messages with per-partition offset commits"""
+
+    async def start(self):
+        """Connect to the broker"""
+
+    async def stop(self):
+        """Disconnect from the broker"""
+
+    @abstractmethod
+    def assigned_partitions(self) -> List[int]:
+        """Partitions currently assigned to this consumer"""
+
+    @abstractmethod
+    async def seek_to_committed(self, partition: int):
+        """Consume a partition from its last committed offset"""
+
+    @abstractmethod
+    async def fetch(self, partition: int, max_records: int, timeout: float) -> List[Message]:
+        """Fetch up to max_records messages from a partition, waiting at most timeout seconds"""
+
+    @abstractmethod
+    async def commit(self, partition: int, offset: int):
+        """Commit offset as the next message to consume from a partition"""
+
+
+class AIOKafkaTransport(ConsumerTransport):
+    """Kafka transport backed by aiokafka with manual offset commits"""
+
+    def __init__(self, topic: str, bootstrap_servers: str, group_id: str):
+        self.topic = topic
+        self.bootstrap_servers = bootstrap_servers
+        self.group_id = group_id
+        self._consumer = None
+
+    async def start(self):
+        from aiokafka import AIOKafkaConsumer
+
+        self._consumer = AIOKafkaConsumer(
+            self.topic,
+            bootstrap_servers=self.bootstrap_servers,
+            group_id=self.group_id,
+            enable_auto_commit=False,
+            auto_offset_reset="earliest"
+        )
+        await self._consumer.start()
+
+    async def stop(self):
+        if self._consumer:
+            await self._consumer.stop()
+
+    def assigned_partitions(self) -> List[int]:
+        return sorted(tp.partition for tp in self._consumer.assignment())
+
+    async def seek_to_committed(self, partition: int):
+        from aiokafka import TopicPartition
+
+        tp = TopicPartition(self.topic, partition)
+        offset = await self._consumer.committed(tp)
+        if offset is None:
+            await self._consumer.seek_to_beginning(tp)
+        else:
+            self._consumer.seek(tp, offset)
+
+    async def fetch(self, partition: int, max_records: int, timeout: float) -> List[Message]:
+        from aiokafka import TopicPartition
+
+        tp = TopicPartition(self.topic, partition)
+        records = await self._consumer.getmany(tp, timeout_ms=int(timeout * 1000), max_records=max_records)
+        return [
+            Message(topic=self.topic, partition=partition, offset=record.offset, value=record.value)
+            for record in records.get(tp, [])
+        ]
+
+    async def commit(self, partition: int, offset: int):
+        from aiokafka import TopicPartition
+
+        await self._consumer.commit({TopicPartition(self.topic, partition): offset})
+
+
+class InMemoryTransport(ConsumerTransport):
+    """In-memory broker stand-in for tests and local runs"""
+
+    def __init__(self, partitions: int = 1, topic: str = "decision-traces"):
+        self.topic = topic
+        self.logs: Dict[int, List[bytes]] = {partition: [] for partition in range(partitions)}
+        self.committed: Dict[int, int] = {partition: 0 for partition in range(partitions)}
+        self._positions: Dict[int, int] = dict(self.committed)
+
+    def produce(self, partition: int, value: bytes):
+        """Append a message to a partition"""
+        self.logs[partition].append(value)
+
+    def assigned_partitions(self) -> List[int]:
+        return sorted(self.logs)
+
+    async def seek_to_committed(self, partition: int):
+        self._positions[partition] = self.committed[partition]
+
+    async def fetch(self, partition: int, max_records: int, timeout: float) -> List[Message]:
+        position = self._positions[partition]
+        values = self.logs[partition][position:position + max_records]
+        if not values:
+            await asyncio.sleep(timeout)
+            return []
+        self._positions[partition] = position + len(values)
+        return [
+            Message(topic=self.topic, partition=partition, offset=position + i, value=value)
+            for i, value in enumerate(values)
+        ]
+
+    async def commit(self, partition: int, offset: int):
+        self.committed[partition] = offset
+
+
+class KafkaIngestWorker:
+    """Consumes decision traces and persists them in micro-batches"""
+
+    def __init__(
+        self,
+        transport: ConsumerTransport,
+        batch_size: int,
+        batch_timeout: float,
+        max_attempts: int = 5,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0
+    ):
+        self.transport = transport
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._tasks: Dict[int, asyncio.Task] = {}
+
+    async def run(self, stop_event: asyncio.Event):
+        """Consume every assigned partition in parallel until stop_event is set"""
+        await self.transport.start()
+        try:
+            while not stop_event.is_set():
+                self._sync_partitions(stop_event)
+                try:
+                    await asyncio.wait_for(stop_event.wait(), timeout=self.batch_timeout)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            # Partition tasks finish their in-flight batch before exiting
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+            self._tasks.clear()
+            await self.transport.stop()
+
+    def _sync_partitions(self, stop_event: asyncio.Event):
+        """Start tasks for newly assigned partitions and cancel revoked ones"""
+        assigned = set(self.transport.assigned_partitions())
+
+        for partition in list(self._tasks):
+            task = self._tasks[partition]
+            if task.done() and not task.cancelled() and task.exception():
+                logger.error(f"Partition {partition} consumer failed: {task.exception()}")
+            if partition not in assigned or task.done():
+                self._tasks.pop(partition).cancel()
+
+        for partition in assigned - set(self._tasks):
+            logger.info(f"Consuming partition {partition}")
+            self._tasks[partition] = asyncio.create_task(
+                self._consume_partition(partition, stop_event)
+            )
+
+    async def _consume_partition(self, partition: int, stop_event: asyncio.Event):
+        """Fetch, persist and commit micro-batches from one partition"""
+        # A task restarted after a failed commit re-reads its uncommitted batch
+        await self.transport.seek_to_committed(partition)
+        while not stop_event.is_set():
+            messages = await self.transport.fetch(partition, self.batch_size, self.batch_timeout)
+            if not messages:
+                continue
+
+            await self.process_batch(messages)
+            await self.transport.commit(partition, messages[-1].offset + 1)
+
+    async def process_batch(self, messages: List[Message]):
+        """
+        Persist a micro-batch, retrying until MongoDB and Elasticsearch both succeed
+
+        Records that can never be stored (invalid JSON or schema, or
+        rejected by MongoDB) are logged and skipped so they don't block
+        the partition. Traces whose write keeps failing are retried up to
+        max_attempts times, then moved to ingest_dead_letters.
+        """
+        pending = []
+        for message in messages:
+            try:
+                pending.append((message, json.loads(message.value)))
+            except ValueError as e:
+                logger.error(f"Skipping undecodable message {message.partition}:{message.offset}: {e}")
+
+        stored = []
+        attempt = 1
+        while pending:
+            batch_stored, failed = await self._with_retry(self._store, pending)
+            stored.extend(batch_stored)
+            if not failed:
+                break
+            if attempt >= self.max_attempts:
+                await self._with_retry(self._dead_letter, failed)
+                break
+            delay = min(self.backoff_base * (2 ** (attempt - 1)), self.backoff_max)
+            logger.warning(f"Storing {len(failed)} decision traces failed; retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            pending = [(message, item) for message, item, _ in failed]
+            attempt += 1
+
+        await self._with_retry(self._index, stored)
+
+    @staticmethod
+    def ingest_key(message: Message) -> str:
+        """Identity of a message across redeliveries"""
+        return f"{message.topic}:{message.partition}:{message.offset}"
+
+    async def _store(
+        self,
+        pending: List[Tuple[Message, Any]]
+    ) -> Tuple[List[dict], List[Tuple[Message, Any, str]]]:
+        """Store decoded messages; returns the stored documents and retryable failures"""
+        response, stored = await DecisionService.store_decision_traces_batch(
+            [item for _, item in pending],
+            [self.ingest_key(message) for message, _ in pending]
+        )
+        failed = []
+        for (message, item), result in zip(pending, response.results):
+            if result.status == "created":
+                continue
+            if result.retryable:
+                failed.append((message, item, result.error))
+            else:
+                logger.error(
+                    f"Skipping invalid decision trace {message.partition}:{message.offset}: {result.error}"
+                )
+        return stored, failed
+
+    async def _dead_letter(self, failed: List[Tuple[Message, Any, str]]):
+        """Set aside traces that could not be stored so the partition can move on"""
+        now = datetime.utcnow()
+        await get_database().ingest_dead_letters.bulk_write([
+            ReplaceOne(
+                {"_id": self.ingest_key(message)},
+                {
+                    "topic": message.topic,
+                    "partition": message.partition,
+                    "offset": message.offset,
+                    "value": message.value,
+                    "error": error,
+                    "failed_at": now
+                },
+                upsert=True
+            )
+            for message, _, error in failed
+        ], ordered=False)
+        logger.error(
+            f"Dead-lettered {len(failed)} decision traces after {self.max_attempts} attempts"
+        )
+
+    async def _index(self, documents: List[dict]) -> List[dict]:
+        # Only documents that failed are retried; indexing by decision_id is idempotent
+        while documents:
+            failed = await DecisionService.bulk_index(documents)
+            if len(failed) == len(documents):
+                raise RuntimeError(f"Bulk indexing failed for {len(failed)} traces")
+            documents = failed
+        return documents
+
+    async def _with_retry(self, operation, argument):
+        """Run operation until it succeeds, backing off exponentially"""
+        attempt = 0
+        while True:
+            try:
+                return await operation(argument)
+            except Exception as e:
+                delay = min(self.backoff_base * (2 ** attempt), self.backoff_max)
+                logger.warning(f"{operation.__name__} failed ({e}); retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                attempt += 1
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Consume decision traces from Kafka")
+    parser.add_argument("--topic", default=settings.KAFKA_INGEST_TOPIC)
+    parser.add_argument("--bootstrap-servers", default=settings.KAFKA_BOOTSTRAP_SERVERS)
+    parser.add_argument("--group-id", default=settings.KAFKA_CONSUMER_GROUP)
+    parser.add_argument("--batch-size", type=int, default=settings.KAFKA_BATCH_SIZE)
+    parser.add_argument("--batch-timeout", type=float, default=settings.KAFKA_BATCH_TIMEOUT)
+    parser.add_argument("--max-attempts", type=int, default=settings.KAFKA_MAX_ATTEMPTS)
+    return parser.parse_args()
+
+
+async def main(args):
+    """Run the worker until SIGINT or SIGTERM"""
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop_event.set)
+
+    await connect_db()
+    await connect_elasticsearch()
+
+    try:
+        worker = KafkaIngestWorker(
+            AIOKafkaTransport(args.topic, args.bootstrap_servers, args.group_id),
+            batch_size=args.batch_size,
+            batch_timeout=args.batch_timeout,
+            max_attempts=args.max_attempts
+        )
+        logger.info(f"Consuming decision traces from topic {args.topic}")
+        await worker.run(stop_event)
+    finally:
+        await close_db()
+        await close_elasticsearch()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    asyncio.run(main(parse_args()))
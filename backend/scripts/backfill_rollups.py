@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Backfill time-bucketed decision rollups from the stored traces
+"""
+
+import argparse
+import asyncio
+import sys
+import os
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.database import connect_db, close_db, get_database
+from app.services.rollup_service import RollupService, truncate
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--start", type=datetime.fromisoformat, default=None,
+                        help="First day to rebuild (ISO format, UTC; default: day of the oldest trace)")
+    parser.add_argument("--end", type=datetime.fromisoformat, default=None,
+                        help="Rebuild up to this time (ISO format, UTC; default: now)")
+    return parser.parse_args()
+
+
+async def backfill(args):
+    """Recompute rollups one day at a time"""
+    print("🚀 Backfilling decision rollups...")
+
+    await connect_db()
+
+    try:
+        start = args.start
+        if start is None:
+            oldest = await get_database().decision_traces.find_one(
+                {}, {"timestamp": 1}, sort=[("timestamp", 1)]
+            )
+            if not oldest:
+                print("⚠️  No decision traces to roll up")
+                return
+            start = oldest["timestamp"]
+        end = args.end or datetime.utcnow()
+
+        day = truncate(start, "day")
+        total = 0
+        while day < end:
+            counted = await RollupService.backfill_day(day)
+            total += counted
+            print(f"✅ {day.date()}: {counted} traces")
+            day += timedelta(days=1)
+
+        print(f"\n✨ Rollups rebuilt from {total} traces!")
+
+    except Exception as e:
+        print(f"❌ Error backfilling rollups: {e}")
+        raise
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(backfill(parse_args()))
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark canonical trace encodings used for hashing
+"""
+
+import argparse
+import hashlib
+import random
+import string
+import sys
+import os
+import timeit
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core import canonical
+
+
+PAYLOAD_SIZES = {
+    "1KB": 1_000,
+    "10KB": 10_000,
+    "100KB": 100_000,
+    "1MB": 1_000_000,
+}
+
+
+def random_value(rng: random.Random, depth: int):
+    """Random JSON value mixing the types seen in input payloads"""
+    kind = rng.random()
+    if depth < 3 and kind < 0.15:
+        return {random_key(rng): random_value(rng, depth + 1) for _ in range(rng.randint(1, 5))}
+    if depth < 3 and kind < 0.25:
+        return [random_value(rng, depth + 1) for _ in range(rng.randint(1, 5))]
+    if kind < 0.5:
+        return rng.uniform(-1e6, 1e6)
+    if kind < 0.7:
+        return rng.randint(-1_000_000, 1_000_000)
+    if kind < 0.75:
+        return rng.random() < 0.5
+    return "".join(rng.choices(string.ascii_letters, k=rng.randint(4, 24)))
+
+
+def random_key(rng: random.Random) -> str:
+    return "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 12)))
+
+
+def build_trace(target_bytes: int, seed: int = 42) -> dict:
+    """Build hashed trace fields with an input_payload of roughly target_bytes"""
+    rng = random.Random(seed)
+    payload = {}
+    while len(canonical.encode_v1(payload)) < target_bytes:
+        for _ in range(50):
+            payload[random_key(rng)] = random_value(rng, 0)
+
+    now = datetime.utcnow()
+    return {
+        "decision_id": "DEC_20240101_0000000000",
+        "source_system": "fraud_detection",
+        "input_payload": payload,
+        "rules_triggered": [
+            {"rule_id": "R001", "rule_name": "high_value_check", "condition": "amount > 1000",
+             "result": True, "metadata": None}
+        ],
+        "output": {"decision": "APPROVED", "score": 0.93, "flags": ["high_value"]},
+        "confidence": 0.95,
+        "risk_level": "medium",
+        "timestamp": now,
+        "created_at": now,
+        "metadata": {},
+    }
+
+
+def bench(encoder, trace: dict, number: int) -> float:
+    """Seconds per encode+hash"""
+    def run():
+        hashlib.sha256(encoder(trace)).hexdigest()
+    return min(timeit.repeat(run, number=number, repeat=5)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--min-time", type=float, default=0.2,
+                        help="Approximate seconds to spend per measurement")
+    args = parser.parse_args()
+
+    print("📊 Canonical encoding + SHA-256 per trace\n")
+    print(f"{'payload':>8} {'v1 (json.dumps)':>18} {'v2 (orjson)':>14} {'speedup':>9}")
+
+    for label, size in PAYLOAD_SIZES.items():
+        trace = build_trace(size)
+        probe = bench(canonical.encode_v1, trace, 1)
+        number = max(1, int(args.min_time / probe))
+
+        v1 = bench(canonical.encode_v1, trace, number)
+        v2 = bench(canonical.encode_v2, trace, number)
+        print(f"{label:>8} {v1 * 1e6:>15.1f} µs {v2 * 1e6:>11.1f} µs {v1 / v2:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Benchmark trace payload mappings: dynamic objects vs flattened
+
+Indexes the same synthetic traces, whose payload keys differ per
+source system, into a throwaway index per mapping. Reports indexing
+throughput, the number of mapped fields, index size, and search_text
+query latency. Traces the index rejects, such as those that would
+exceed index.mapping.total_fields.limit, are counted rather than fatal.
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import string
+import sys
+import os
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from elasticsearch import AsyncElasticsearch
+
+from app.core.config import settings
+from app.core.elasticsearch_client import trace_index_settings, trace_mappings
+from app.core.payload_mapping import PAYLOAD_MAPPINGS, payload_search_fields
+from app.services.decision_service import DecisionService
+
+WORDS = [
+    "approved", "declined", "review", "merchant", "electronics", "travel", "grocery",
+    "chargeback", "velocity", "mismatch", "overseas", "subscription", "refund", "premium",
+]
+
+
+def random_key(rng: random.Random) -> str:
+    return "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 12)))
+
+
+def random_value(rng: random.Random):
+    kind = rng.random()
+    if kind < 0.4:
+        return rng.choice(WORDS)
+    if kind < 0.7:
+        return rng.randint(0, 100_000)
+    if kind < 0.9:
+        return round(rng.uniform(0, 1), 4)
+    return rng.random() < 0.5
+
+
+def build_traces(count: int, systems: int, keys_per_system: int, seed: int = 42) -> list:
+    """Stored traces whose payload keys are drawn from a per-system key set"""
+    rng = random.Random(seed)
+    key_sets = [[random_key(rng) for _ in range(keys_per_system)] for _ in range(systems)]
+    start = datetime(2024, 1, 1)
+
+    traces = []
+    for i in range(count):
+        system = i % systems
+        keys = rng.sample(key_sets[system], min(20, keys_per_system))
+        now = start + timedelta(seconds=i)
+        traces.append({
+            "decision_id": f"DEC_BENCH_{i:012d}",
+            "source_system": f"system_{system}",
+            "input_payload": {
+                **{key: random_value(rng) for key in keys[:15]},
+                "details": {key: random_value(rng) for key in keys[15:]},
+            },
+            "rules_triggered": [
+                {"rule_id": "R001", "rule_name": "velocity_check", "condition": "count > 5",
+                 "result": True, "metadata": None}
+            ],
+            "output": {"decision": rng.choice(WORDS[:3]), "reason": " ".join(rng.sample(WORDS, 3))},
+            "confidence": rng.random(),
+            "risk_level": rng.choice(["low", "medium", "high", "critical"]),
+            "timestamp": now,
+            "hash": "0" * 64,
+            "hash_version": 2,
+            "annotation_summary": {"count": 0, "last_note": None},
+            "created_at": now,
+            "updated_at": now,
+        })
+    return traces
+
+
+def count_fields(properties: dict) -> int:
+    """Leaf fields in a mapping"""
+    total = 0
+    for field in properties.values():
+        if "properties" in field:
+            total += count_fields(field["properties"])
+        else:
+            total += 1
+    return total
+
+
+async def bench_mapping(es_client, mode: str, documents: list, args) -> dict:
+    index = f"benchmark_payload_{mode}"
+    await es_client.options(ignore_status=404).indices.delete(index=index)
+    await es_client.indices.create(
+        index=index,
+        mappings=trace_mappings(mode),
+        settings={**trace_index_settings(), "number_of_replicas": 0}
+    )
+
+    try:
+        rejected = 0
+        started = time.monotonic()
+        for offset in range(0, len(documents), args.batch_size):
+            operations = []
+            for document in documents[offset:offset + args.batch_size]:
+                operations.append({"index": {"_index": index, "_id": document["decision_id"]}})
+                operations.append(document)
+            response = await es_client.bulk(operations=operations)
+            if response.get("errors"):
+                rejected += sum(1 for item in response["items"] if item["index"].get("error"))
+        await es_client.indices.refresh(index=index)
+        index_seconds = time.monotonic() - started
+
+        mapping = await es_client.indices.get_mapping(index=index)
+        stats = await es_client.indices.stats(index=index, metric="store")
+
+        rng = random.Random(7)
+        fields = [*payload_search_fields(mode), "rules_triggered.rule_name"]
+        latencies = []
+        for _ in range(args.queries):
+            query = {"multi_match": {"query": rng.choice(WORDS), "fields": fields}}
+            started = time.monotonic()
+            await es_client.search(index=index, query=query, size=20, request_cache=False)
+            latencies.append(time.monotonic() - started)
+
+        quantiles = statistics.quantiles(latencies, n=20)
+        return {
+            "docs_per_second": len(documents) / index_seconds,
+            "rejected": rejected,
+            "fields": count_fields(mapping[index]["mappings"]["properties"]),
+            "size_mb": stats["_all"]["primaries"]["store"]["size_in_bytes"] / 1e6,
+            "p50_ms": statistics.median(latencies) * 1e3,
+            "p95_ms": quantiles[18] * 1e3,
+        }
+    finally:
+        if not args.keep:
+            await es_client.indices.delete(index=index)
+
+
+async def main(args):
+    print(
+        f"📊 Indexing {args.traces} traces from {args.systems} source systems "
+        f"({args.keys_per_system} payload keys each)\n"
+    )
+
+    # Search documents are prepared once, outside the timed section
+    documents = [
+        DecisionService.to_es_document(trace)
+        for trace in build_traces(args.traces, args.systems, args.keys_per_system)
+    ]
+
+    es_client = AsyncElasticsearch(hosts=[settings.ELASTICSEARCH_URL], verify_certs=False, request_timeout=120)
+    try:
+        print(f"{'mapping':>10} {'docs/s':>10} {'rejected':>9} {'fields':>8} {'size':>10} {'p50':>10} {'p95':>10}")
+        for mode in PAYLOAD_MAPPINGS:
+            result = await bench_mapping(es_client, mode, documents, args)
+            print(
+                f"{mode:>10} {result['docs_per_second']:>10.0f} {result['rejected']:>9} {result['fields']:>8} "
+                f"{result['size_mb']:>7.1f} MB {result['p50_ms']:>7.2f} ms {result['p95_ms']:>7.2f} ms"
+            )
+    finally:
+        await es_client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--traces", type=int, default=20000)
+    parser.add_argument("--systems", type=int, default=20)
+    parser.add_argument("--keys-per-system", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--keep", action="store_true",
+                        help="Keep the benchmark indices for inspection")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark search response serialization: pydantic models vs the fast path
+"""
+
+import argparse
+import json
+import sys
+import os
+import timeit
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi.encoders import jsonable_encoder
+
+from app.core.serialization import TraceJSONResponse, trace_document
+from app.models.decision import DecisionTrace, SearchResponse
+
+
+def stored_trace(i: int, es_source: bool) -> dict:
+    """A trace as stored in MongoDB, or as an Elasticsearch _source with ISO strings"""
+    now = datetime(2024, 1, 15, 12, 0, 0, 123000) + timedelta(seconds=i)
+    doc = {
+        "decision_id": f"DEC_20240115_{i:026d}",
+        "source_system": "fraud_detection",
+        "input_payload": {
+            "transaction_id": f"TXN{i}",
+            "amount": 5000 + i,
+            "merchant": "TechStore",
+            "location": "USA",
+            "history": [{"amount": j * 10.5, "merchant": f"M{j}"} for j in range(20)],
+        },
+        "rules_triggered": [
+            {"rule_id": f"R00{j}", "rule_name": "high_value_check", "condition": "amount > 1000",
+             "result": True, "metadata": None}
+            for j in range(3)
+        ],
+        "output": {"decision": "APPROVED", "flags": ["high_value"]},
+        "confidence": 0.95,
+        "risk_level": "medium",
+        "timestamp": now,
+        "hash": "0" * 64,
+        "hash_version": 2,
+        "annotation_summary": {
+            "count": 1,
+            "last_note": {"reviewer": "auditor", "note": "Looks fine", "timestamp": now, "tags": ["ok"]}
+        },
+        "created_at": now,
+        "updated_at": now,
+        "metadata": {},
+    }
+    if es_source:
+        for key in ("timestamp", "created_at", "updated_at"):
+            doc[key] = doc[key].isoformat()
+        doc["annotation_summary"]["last_note"]["timestamp"] = now.isoformat()
+    return doc
+
+
+def model_path(docs):
+    """Previous read path: build models, then FastAPI validates and encodes the response_model"""
+    response = SearchResponse(
+        total=len(docs), results=[DecisionTrace(**doc) for doc in docs],
+        limit=len(docs), offset=0, has_more=False
+    )
+    validated = SearchResponse(**response.dict())
+    return json.dumps(jsonable_encoder(validated)).encode()
+
+
+def fast_path(docs):
+    """Fast read path: shape stored documents and encode with orjson"""
+    content = {
+        "total": len(docs), "results": [trace_document(doc) for doc in docs],
+        "limit": len(docs), "offset": 0, "has_more": False
+    }
+    return TraceJSONResponse(content).body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--number", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"📊 Serializing a {args.page_size}-result search page\n")
+    print(f"{'source':>14} {'models':>12} {'fast path':>12} {'speedup':>9}")
+
+    for label, es_source in (("mongodb", False), ("elasticsearch", True)):
+        docs = [stored_trace(i, es_source) for i in range(args.page_size)]
+
+        # Both paths must produce the same response
+        assert json.loads(model_path(docs)) == json.loads(fast_path(docs))
+
+        slow = min(timeit.repeat(lambda: model_path(docs), number=args.number, repeat=5)) / args.number
+        fast = min(timeit.repeat(lambda: fast_path(docs), number=args.number, repeat=5)) / args.number
+        print(f"{label:>14} {slow * 1e3:>9.2f} ms {fast * 1e3:>9.2f} ms {slow / fast:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
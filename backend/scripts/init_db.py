@@ -13,6 +13,7 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from app.core.config import settings
+from app.core.database import ensure_text_index
 
 
 async def init_database():
@@ -45,8 +46,46 @@ async def init_database():
         await traces.create_index("risk_level")
         await traces.create_index("timestamp")
         await traces.create_index("hash")
-        await traces.create_index([("source_system", 1), ("timestamp", -1)])
-        await traces.create_index([("risk_level", 1), ("timestamp", -1)])
+        
+        # Stream ingest stores each record once, however often it is delivered
+        await traces.create_index(
+            "ingest_key", unique=True, partialFilterExpression={"ingest_key": {"$exists": True}}
+        )
+        
+        # Keyset pagination sorts on (timestamp, decision_id)
+        await traces.create_index([("timestamp", -1), ("decision_id", -1)])
+        await traces.create_index([("source_system", 1), ("timestamp", -1), ("decision_id", -1)])
+        await traces.create_index([("risk_level", 1), ("timestamp", -1), ("decision_id", -1)])
+        
+        # Superseded by the keyset indexes above, which share their prefix
+        existing = await traces.index_information()
+        for name in ("source_system_1_timestamp_-1", "risk_level_1_timestamp_-1"):
+            if name in existing:
+                await traces.drop_index(name)
+                print(f"✅ Dropped redundant index '{name}'")
+        
+        # Full-text search when Elasticsearch is unavailable
+        await ensure_text_index(db, rebuild=True)
+        
+        # Merkle seal indexes
+        await db.merkle_nodes.create_index(
+            [("window_id", 1), ("level", 1), ("index", 1)], unique=True
+        )
+        await db.merkle_nodes.create_index("decision_id", sparse=True)
+        
+        # Rollup indexes; only minute buckets carry expires_at
+        await db.decision_rollups.create_index(
+            [("granularity", 1), ("bucket", 1), ("source_system", 1), ("risk_level", 1)], unique=True
+        )
+        await db.decision_rollups.create_index("expires_at", expireAfterSeconds=0)
+        
+        # Annotation indexes; pages are read newest first per trace
+        await db.decision_annotations.create_index(
+            [("decision_id", 1), ("timestamp", -1), ("_id", -1)]
+        )
+        await db.decision_annotations.create_index(
+            [("job_id", 1), ("decision_id", 1)], sparse=True
+        )
         
         print("✅ Indexes created successfully")
         
@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 """
-Initialize Elasticsearch index with proper mapping
+Initialize Elasticsearch indices with proper mappings
 """
 
 import asyncio
@@ -12,6 +12,7 @@ from elasticsearch import AsyncElasticsearch
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from app.core.config import settings
+from app.core.elasticsearch_client import ANNOTATIONS_MAPPING, ensure_trace_indices
 
 
 async def init_elasticsearch():
@@ -30,58 +31,20 @@ async def init_elasticsearch():
         info = await es_client.info()
         print(f"✅ Connected to Elasticsearch version {info['version']['number']}")
         
-        index_name = settings.ELASTICSEARCH_INDEX
-        
-        # Check if index exists
-        exists = await es_client.indices.exists(index=index_name)
+        # Trace index, or index template and current partition
+        index_name = await ensure_trace_indices(es_client)
+        if index_name == settings.ELASTICSEARCH_INDEX:
+            print(f"✅ Index '{index_name}' ready")
+        else:
+            print(f"✅ Index template '{settings.ELASTICSEARCH_INDEX}' installed")
+            print(f"✅ Writing to partition '{index_name}' behind alias '{settings.ELASTICSEARCH_INDEX}'")
         
-        if exists:
-            print(f"⚠️  Index '{index_name}' already exists")
-            print("Keeping existing index")
+        # Annotations index
+        if await es_client.indices.exists(index="decision_annotations"):
+            print("⚠️  Index 'decision_annotations' already exists")
         else:
-            # Create index with mapping
-            mapping = {
-                "mappings": {
-                    "properties": {
-                        "decision_id": {"type": "keyword"},
-                        "source_system": {"type": "keyword"},
-                        "input_payload": {"type": "object", "enabled": True},
-                        "rules_triggered": {
-                            "type": "nested",
-                            "properties": {
-                                "rule_id": {"type": "keyword"},
-                                "rule_name": {"type": "text"},
-                                "condition": {"type": "text"},
-                                "result": {"type": "boolean"}
-                            }
-                        },
-                        "output": {"type": "object", "enabled": True},
-                        "confidence": {"type": "float"},
-                        "risk_level": {"type": "keyword"},
-                        "timestamp": {"type": "date"},
-                        "hash": {"type": "keyword"},
-                        "review_notes": {
-                            "type": "nested",
-                            "properties": {
-                                "reviewer": {"type": "keyword"},
-                                "note": {"type": "text"},
-                                "timestamp": {"type": "date"},
-                                "tags": {"type": "keyword"}
-                            }
-                        },
-                        "created_at": {"type": "date"},
-                        "updated_at": {"type": "date"}
-                    }
-                },
-                "settings": {
-                    "number_of_shards": 3,
-                    "number_of_replicas": 1,
-                    "refresh_interval": "5s"
-                }
-            }
-            
-            await es_client.indices.create(index=index_name, body=mapping)
-            print(f"✅ Created index '{index_name}'")
+            await es_client.indices.create(index="decision_annotations", body=ANNOTATIONS_MAPPING)
+            print("✅ Created index 'decision_annotations'")
         
         print("\n✨ Elasticsearch initialization complete!")
         
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Roll and compact time-partitioned search indices
+
+Points the write alias at the current partition and creates the next
+one ahead of time, so the first trace of a period doesn't wait for
+index creation. Partitions more than --read-only-after periods old are
+made read-only and force-merged to one segment. Traces in those
+partitions can no longer be annotated in the search index; their
+annotations are still stored and can be re-pushed with
+scripts/reconcile_search_index.py after lifting the block.
+
+Run from cron at least once per period.
+"""
+
+import argparse
+import asyncio
+import sys
+import os
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.config import settings
+from app.core.elasticsearch_client import (
+    connect_elasticsearch,
+    close_elasticsearch,
+    get_es_client,
+    roll_write_alias
+)
+from app.core.search_indices import (
+    index_pattern,
+    next_period,
+    partition_name,
+    partition_start,
+    partitioned,
+    period_start,
+    previous_period
+)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--read-only-after", type=int, default=settings.ES_PARTITION_READ_ONLY_AFTER,
+                        help="Periods after which a partition is made read-only and force-merged")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Report what would change without changing it")
+    return parser.parse_args()
+
+
+async def maintain(args):
+    """Roll the write alias and compact old partitions"""
+    print("🚀 Maintaining search indices...")
+
+    await connect_elasticsearch()
+
+    try:
+        if not partitioned():
+            print("⚠️  Search indices are not partitioned; nothing to do")
+            return
+
+        es_client = get_es_client()
+        now = datetime.utcnow()
+
+        upcoming = partition_name(next_period(period_start(now)))
+        if args.dry_run:
+            print(f"Would create '{upcoming}'")
+        else:
+            current = await roll_write_alias(es_client, now)
+            print(f"✅ Writing to '{current}'")
+            if not await es_client.indices.exists(index=upcoming):
+                await es_client.options(ignore_status=400).indices.create(index=upcoming)
+                print(f"✅ Created '{upcoming}'")
+
+        # Start of the oldest period still open for writes
+        cutoff = period_start(now)
+        for _ in range(args.read_only_after):
+            cutoff = previous_period(cutoff)
+
+        indices = await es_client.indices.get_settings(index=index_pattern(), name="index.blocks.write")
+        compacted = 0
+        for index in sorted(indices.body):
+            start = partition_start(index)
+            if start is None or start >= cutoff:
+                continue
+
+            blocks = indices[index]["settings"].get("index", {}).get("blocks", {})
+            if blocks.get("write") == "true":
+                continue
+
+            if args.dry_run:
+                print(f"Would make '{index}' read-only and force-merge it")
+                continue
+
+            await es_client.indices.put_settings(index=index, settings={"index.blocks.write": True})
+            # Merging a large partition can take much longer than the client timeout
+            await es_client.options(request_timeout=3600).indices.forcemerge(index=index, max_num_segments=1)
+            compacted += 1
+            print(f"✅ '{index}' read-only and merged to one segment")
+
+        print(f"\n✨ Search index maintenance complete! {compacted} partitions compacted")
+
+    except Exception as e:
+        print(f"❌ Error maintaining search indices: {e}")
+        raise
+    finally:
+        await close_elasticsearch()
+
+
+if __name__ == "__main__":
+    asyncio.run(maintain(parse_args()))
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Move embedded review notes into the append-only annotations collection
+
+Traces written before annotations had their own collection keep their
+notes in a review_notes array. This copies each note into
+decision_annotations and the decision_annotations search index,
+replaces the array with an annotation_summary and removes it. Notes are
+upserted on (decision_id, timestamp, reviewer, note), so the migration
+can be interrupted and run again.
+"""
+
+import argparse
+import asyncio
+import sys
+import os
+
+from pymongo import DESCENDING, UpdateOne
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.database import connect_db, close_db, get_database
+from app.core.elasticsearch_client import connect_elasticsearch, close_elasticsearch, get_es_client
+from app.core.search_indices import trace_index
+from app.services.annotation_service import (
+    ANNOTATIONS_INDEX,
+    annotation_es_document,
+    summary_es_document
+)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-size", type=int, default=200,
+                        help="Traces migrated per round")
+    return parser.parse_args()
+
+
+async def migrate_trace(db, trace):
+    """Move one trace's notes; returns its operations for the search bulk request"""
+    decision_id = trace["decision_id"]
+
+    upserts = [
+        UpdateOne(
+            {
+                "decision_id": decision_id,
+                "timestamp": note["timestamp"],
+                "reviewer": note["reviewer"],
+                "note": note["note"]
+            },
+            {"$setOnInsert": {"tags": note.get("tags", [])}},
+            upsert=True
+        )
+        for note in trace["review_notes"]
+    ]
+    await db.decision_annotations.bulk_write(upserts, ordered=False)
+
+    # Count from the collection so notes added since the last run are included
+    count = await db.decision_annotations.count_documents({"decision_id": decision_id})
+    notes = await db.decision_annotations.find({"decision_id": decision_id}).sort(
+        [("timestamp", DESCENDING), ("_id", DESCENDING)]
+    ).to_list(None)
+    latest = notes[0]
+    summary = {
+        "count": count,
+        "last_note": {
+            "reviewer": latest["reviewer"],
+            "note": latest["note"],
+            "timestamp": latest["timestamp"],
+            "tags": latest.get("tags", [])
+        }
+    }
+
+    await db.decision_traces.update_one(
+        {"_id": trace["_id"]},
+        {"$set": {"annotation_summary": summary}, "$unset": {"review_notes": ""}}
+    )
+
+    operations = []
+    for note in notes:
+        operations.append({"index": {"_index": ANNOTATIONS_INDEX, "_id": str(note["_id"])}})
+        operations.append(annotation_es_document(note))
+    operations.append({"update": {"_index": trace_index(trace["timestamp"]), "_id": decision_id}})
+    operations.append({"doc": {"annotation_summary": summary_es_document(summary), "review_notes": []}})
+    return operations
+
+
+async def migrate(args):
+    """Migrate every trace that still embeds review notes"""
+    print("🚀 Migrating embedded review notes...")
+
+    await connect_db()
+    await connect_elasticsearch()
+
+    try:
+        db = get_database()
+        es_client = get_es_client()
+        migrated = 0
+        failed = 0
+
+        while True:
+            traces = await db.decision_traces.find(
+                {"review_notes.0": {"$exists": True}},
+                {"decision_id": 1, "timestamp": 1, "review_notes": 1}
+            ).limit(args.batch_size).to_list(None)
+            if not traces:
+                break
+
+            operations = []
+            for trace in traces:
+                operations.extend(await migrate_trace(db, trace))
+
+            response = await es_client.bulk(operations=operations)
+            if response.get("errors"):
+                failed += sum(1 for item in response["items"] if next(iter(item.values())).get("error"))
+
+            migrated += len(traces)
+            print(f"✅ {migrated} traces migrated")
+
+        # Traces that never had notes get an empty summary
+        result = await db.decision_traces.update_many(
+            {"annotation_summary": {"$exists": False}},
+            {"$set": {"annotation_summary": {"count": 0, "last_note": None}}, "$unset": {"review_notes": ""}}
+        )
+        print(f"✅ {result.modified_count} traces without notes given an empty summary")
+
+        if failed:
+            print(f"⚠️  {failed} search index writes failed; run scripts/reconcile_search_index.py")
+        print("\n✨ Annotation migration complete!")
+
+    except Exception as e:
+        print(f"❌ Error migrating annotations: {e}")
+        raise
+    finally:
+        await close_elasticsearch()
+        await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(migrate(parse_args()))
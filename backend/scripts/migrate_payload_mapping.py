@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Rebuild existing trace partitions with the configured payload mapping
+
+A mapping can't be changed in place, so partitions whose payload
+mapping differs are rebuilt from MongoDB by a reindex job (see
+scripts/reindex_search.py) and swapped in behind the read alias. The
+current partition is skipped unless --include-current is given; it
+picks up the new mapping from the index template next period.
+
+Partitions created with derived fields excluded from _source are
+rebuilt too: partial updates such as annotations drop those fields.
+"""
+
+import argparse
+import asyncio
+import sys
+import os
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.config import settings
+from app.core.database import connect_db, close_db
+from app.core.elasticsearch_client import connect_elasticsearch, close_elasticsearch, get_es_client
+from app.core.payload_mapping import PAYLOAD_MAPPINGS
+from app.core.search_indices import partition_name, partition_start, partitioned, read_alias
+from app.services.reindex_service import ReindexService
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mapping", choices=PAYLOAD_MAPPINGS, default=settings.ES_PAYLOAD_MAPPING,
+                        help="Payload mapping to migrate to (default: ES_PAYLOAD_MAPPING)")
+    parser.add_argument("--include-current", action="store_true",
+                        help="Also rebuild the partition currently written to")
+    parser.add_argument("--batch-size", type=int, default=settings.REINDEX_BATCH_SIZE,
+                        help="Traces per bulk request")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="List the partitions that would be rebuilt")
+    return parser.parse_args()
+
+
+def payload_mapping_of(mapping: dict) -> str:
+    """Payload mapping an index was created with"""
+    payload = mapping["mappings"].get("properties", {}).get("input_payload", {})
+    return "flattened" if payload.get("type") == "flattened" else "dynamic"
+
+
+def needs_rebuild(mapping: dict, target: str) -> bool:
+    """Whether an index's mapping differs from the target payload mapping"""
+    if mapping["mappings"].get("_source", {}).get("excludes"):
+        return True
+    return payload_mapping_of(mapping) != target
+
+
+async def migrate(args):
+    """Rebuild every partition whose payload mapping differs from the target"""
+    print(f"🚀 Migrating trace partitions to the {args.mapping} payload mapping...")
+
+    await connect_db()
+    await connect_elasticsearch()
+
+    try:
+        if not partitioned():
+            print("⚠️  Search indices are not partitioned; rebuild them with scripts/reindex_search.py")
+            return
+
+        es_client = get_es_client()
+        current = partition_name(datetime.utcnow())
+        mappings = await es_client.indices.get_mapping(index=read_alias())
+
+        pending = []
+        for index in sorted(mappings.body):
+            if partition_start(index) is None or not needs_rebuild(mappings[index], args.mapping):
+                continue
+            if index == current and not args.include_current:
+                print(f"⚠️  Skipping current partition '{index}'")
+                continue
+            pending.append(index)
+
+        if args.dry_run:
+            for index in pending:
+                print(f"Would rebuild '{index}'")
+            return
+
+        if not pending:
+            print("✅ Every partition already uses this mapping")
+            return
+
+        job = await ReindexService.create_job(pending, args.mapping, settings.REINDEX_SLICES)
+        print(f"✅ Job {job['_id']}: {len(pending)} partitions to rebuild")
+        await ReindexService.run_job(job["_id"], settings.REINDEX_CONCURRENCY, args.batch_size)
+
+        job = await ReindexService.get_job(job["_id"])
+        if job["status"] != "completed":
+            print(f"❌ Job {job['job_id']} {job['status']}: {job['error']}")
+            print(f"   Resume with scripts/reindex_search.py --resume {job['job_id']}")
+            return
+
+        print(
+            f"\n✨ Payload mapping migration complete! {len(pending)} partitions rebuilt "
+            f"({job['loaded']} traces, {job['docs_per_second'] or 0:.0f} docs/s)"
+        )
+        if job.get("failed"):
+            print(f"⚠️  {job['failed']} traces were rejected by the search index; "
+                  f"list them with scripts/reindex_search.py --resume {job['job_id']}")
+
+    except Exception as e:
+        print(f"❌ Error migrating payload mapping: {e}")
+        raise
+    finally:
+        await close_elasticsearch()
+        await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(migrate(parse_args()))
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Rebuild the decision statistics counters from the stored traces
+"""
+
+import asyncio
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.database import connect_db, close_db
+from app.services.statistics_service import StatisticsService
+
+
+async def rebuild():
+    """Recompute the counters document"""
+    print("🚀 Rebuilding statistics counters...")
+
+    await connect_db()
+
+    try:
+        counters = await StatisticsService.rebuild()
+        print(f"✅ {counters['total']} decisions across "
+              f"{len(counters['by_source_system'])} source systems")
+        for risk_level, count in sorted(counters["by_risk_level"].items()):
+            print(f"   {risk_level}: {count}")
+
+        print("\n✨ Statistics counters rebuilt!")
+
+    except Exception as e:
+        print(f"❌ Error rebuilding statistics: {e}")
+        raise
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(rebuild())
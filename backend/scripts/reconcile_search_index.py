@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Reconcile the Elasticsearch copy of decision traces against MongoDB
+"""
+
+import argparse
+import asyncio
+import sys
+import os
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.reconciliation_service import ReconciliationService
+from app.core.database import connect_db, close_db
+from app.core.elasticsearch_client import connect_elasticsearch, close_elasticsearch
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--start", type=datetime.fromisoformat, required=True,
+                        help="Start of the range to reconcile (ISO format, UTC)")
+    parser.add_argument("--end", type=datetime.fromisoformat, default=None,
+                        help="End of the range to reconcile (ISO format, UTC; default: now)")
+    parser.add_argument("--window-hours", type=int, default=24,
+                        help="Size of each checkpointed time window")
+    parser.add_argument("--page-size", type=int, default=5000,
+                        help="Documents compared per page")
+    parser.add_argument("--reset", action="store_true",
+                        help="Ignore existing checkpoints and rescan every window")
+    parser.add_argument("--since", type=datetime.fromisoformat, default=None,
+                        help="Rescan windows last completed before this time (ISO format, UTC)")
+    return parser.parse_args()
+
+
+async def reconcile(args):
+    """Reconcile every window in the requested range"""
+    print("🚀 Reconciling search index against MongoDB...")
+
+    await connect_db()
+    await connect_elasticsearch()
+
+    try:
+        end = args.end or datetime.utcnow()
+        window = timedelta(hours=args.window_hours)
+        totals = {"scanned": 0, "repushed": 0, "deleted": 0, "skipped": 0}
+
+        window_start = args.start
+        while window_start < end:
+            window_end = min(window_start + window, end)
+            result = await ReconciliationService.reconcile_window(
+                window_start, window_end, page_size=args.page_size, reset=args.reset,
+                since=args.since
+            )
+            for key in totals:
+                totals[key] += result.get(key, 0)
+            print(f"✅ {window_start.isoformat()} → {window_end.isoformat()}: "
+                  f"{result['scanned']} scanned, {result['repushed']} re-pushed, {result['deleted']} deleted")
+            window_start = window_end
+
+        print(f"\n✨ Reconciliation complete!")
+        print(f"   - Scanned: {totals['scanned']}")
+        print(f"   - Re-pushed: {totals['repushed']}")
+        print(f"   - Deleted orphans: {totals['deleted']}")
+        if totals["skipped"]:
+            print(f"⚠️  {totals['skipped']} drifted traces are in read-only partitions; "
+                  f"lift index.blocks.write and rerun with --since to repair them")
+
+    except Exception as e:
+        print(f"❌ Error reconciling: {e}")
+        raise
+    finally:
+        await close_db()
+        await close_elasticsearch()
+
+
+if __name__ == "__main__":
+    asyncio.run(reconcile(parse_args()))
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Rebuild the Elasticsearch trace indices from MongoDB
+
+Each partition is loaded into a staging index by parallel cursors over
+timestamp slices, then swapped in behind the read alias. Searches keep
+working throughout. Traces written during the load are caught up after
+each swap.
+
+Also migrates a pre-partitioning decision_traces index to partitions
+when ES_PARTITION_INTERVAL is set. Running API and ingest processes
+switch to the partitions within ES_LEGACY_CHECK_INTERVAL seconds.
+
+Interrupted jobs resume from their last checkpoint with --resume.
+"""
+
+import argparse
+import asyncio
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.config import settings
+from app.core.database import connect_db, close_db
+from app.core.elasticsearch_client import connect_elasticsearch, close_elasticsearch
+from app.core.payload_mapping import PAYLOAD_MAPPINGS
+from app.services.reindex_service import ReindexService
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--resume", metavar="JOB_ID", default=None,
+                        help="Resume an interrupted or failed job")
+    parser.add_argument("--index", action="append", default=None,
+                        help="Only rebuild this partition (repeatable)")
+    parser.add_argument("--payload-mapping", choices=PAYLOAD_MAPPINGS, default=None,
+                        help="Payload mapping of the rebuilt indices (default: ES_PAYLOAD_MAPPING)")
+    parser.add_argument("--slices", type=int, default=settings.REINDEX_SLICES,
+                        help="Timestamp slices per partition, each read by its own cursor")
+    parser.add_argument("--concurrency", type=int, default=settings.REINDEX_CONCURRENCY,
+                        help="Slices read and bulk indexed at once")
+    parser.add_argument("--batch-size", type=int, default=settings.REINDEX_BATCH_SIZE,
+                        help="Traces per bulk request")
+    return parser.parse_args()
+
+
+def report_failures(job: dict):
+    """Print traces the search index rejected during a job"""
+    if not job.get("failed"):
+        return
+    print(f"⚠️  {job['failed']} traces were rejected by the search index; latest errors:")
+    for failure in job["failures"][-10:]:
+        print(f"   {failure['decision_id']} ({failure['index']}, {failure['status']}): {failure['error']}")
+
+
+async def report_progress(job_id: str, interval: float = 10.0):
+    while True:
+        await asyncio.sleep(interval)
+        job = await ReindexService.get_job(job_id)
+        swapped = sum(1 for period in job["periods"] if period["status"] == "swapped")
+        total = f"/{job['total']}" if job["total"] else ""
+        failed = f", {job['failed']} rejected" if job.get("failed") else ""
+        print(
+            f"   {job['loaded']}{total} traces{failed}, {swapped}/{len(job['periods'])} indices swapped, "
+            f"{job['docs_per_second'] or 0:.0f} docs/s"
+        )
+
+
+async def reindex(args):
+    """Run or resume a reindex job"""
+    print("🚀 Rebuilding search indices from MongoDB...")
+
+    await connect_db()
+    await connect_elasticsearch()
+
+    try:
+        if args.resume:
+            job_id = args.resume
+            if not await ReindexService.get_job(job_id):
+                print(f"❌ Reindex job {job_id} not found")
+                return
+        else:
+            job = await ReindexService.create_job(args.index, args.payload_mapping, args.slices)
+            job_id = job["_id"]
+            print(f"✅ Job {job_id}: {len(job['periods'])} indices to rebuild")
+
+        progress = asyncio.create_task(report_progress(job_id))
+        try:
+            await ReindexService.run_job(job_id, args.concurrency, args.batch_size)
+        finally:
+            progress.cancel()
+
+        job = await ReindexService.get_job(job_id)
+        if job["status"] != "completed":
+            print(f"❌ Job {job_id} {job['status']}: {job['error']}")
+            print(f"   Resume with --resume {job_id}")
+            return
+
+        print(f"\n✨ Reindex complete! {job['loaded']} traces ({job['docs_per_second'] or 0:.0f} docs/s)")
+        report_failures(job)
+        if job["legacy"]:
+            print(f"⚠️  Reconcile from the oldest trace once running processes have switched "
+                  f"to partitions (within {settings.ES_LEGACY_CHECK_INTERVAL:.0f}s)")
+
+    except Exception as e:
+        print(f"❌ Error rebuilding search indices: {e}")
+        raise
+    finally:
+        await close_elasticsearch()
+        await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(reindex(parse_args()))
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Seal closed time windows of decision traces under Merkle roots
+"""
+
+import argparse
+import asyncio
+import sys
+import os
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.config import settings
+from app.core.database import connect_db, close_db, get_database
+from app.services.seal_service import SealService
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--start", type=datetime.fromisoformat, default=None,
+                        help="First window start (ISO format, UTC; default: day of the oldest trace)")
+    parser.add_argument("--window-hours", type=int, default=settings.SEAL_WINDOW_HOURS,
+                        help="Size of each sealed window")
+    parser.add_argument("--grace-minutes", type=int, default=settings.SEAL_GRACE_MINUTES,
+                        help="How long after a window closes before it is sealed")
+    return parser.parse_args()
+
+
+async def seal(args):
+    """Seal every closed window"""
+    print("🚀 Sealing decision trace windows...")
+
+    await connect_db()
+
+    try:
+        start = args.start
+        if start is None:
+            oldest = await get_database().decision_traces.find_one(
+                {}, {"timestamp": 1}, sort=[("timestamp", 1)]
+            )
+            if not oldest:
+                print("⚠️  No decision traces to seal")
+                return
+            start = oldest["timestamp"].replace(hour=0, minute=0, second=0, microsecond=0)
+
+        seals = await SealService.seal_closed_windows(
+            start,
+            window=timedelta(hours=args.window_hours),
+            grace=timedelta(minutes=args.grace_minutes)
+        )
+
+        for item in seals:
+            print(f"✅ {item['_id']}: {item['leaf_count']} traces, root {item['root']}")
+
+        print(f"\n✨ {len(seals)} windows sealed!")
+
+    except Exception as e:
+        print(f"❌ Error sealing windows: {e}")
+        raise
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(seal(parse_args()))
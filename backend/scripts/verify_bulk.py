@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Verify the integrity hashes of many decision traces
+"""
+
+import argparse
+import asyncio
+import sys
+import os
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.background import shutdown_process_pool
+from app.core.config import settings
+from app.core.database import connect_db, close_db
+from app.services.verification_service import VerificationService
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--resume", metavar="JOB_ID", default=None,
+                        help="Resume an existing job from its last checkpoint")
+    parser.add_argument("--source-system", default=None)
+    parser.add_argument("--risk-level", default=None)
+    parser.add_argument("--start-date", type=datetime.fromisoformat, default=None)
+    parser.add_argument("--end-date", type=datetime.fromisoformat, default=None)
+    parser.add_argument("--batch-size", type=int, default=settings.VERIFY_BATCH_SIZE)
+    parser.add_argument("--max-in-flight", type=int, default=settings.VERIFY_MAX_IN_FLIGHT)
+    return parser.parse_args()
+
+
+async def report_progress(job_id: str):
+    """Print progress until the job stops running"""
+    while True:
+        await asyncio.sleep(5)
+        job = await VerificationService.get_job(job_id, mismatch_limit=0)
+        print(f"⏳ {job['checked']}/{job['total']} checked, "
+              f"{job['mismatched']} mismatched, {job['legacy']} legacy, "
+              f"{job['docs_per_second']} docs/sec")
+
+
+async def verify(args):
+    """Run a bulk verification job in this process"""
+    print("🚀 Verifying decision trace hashes...")
+
+    await connect_db()
+
+    try:
+        job_id = args.resume
+        if job_id is None:
+            job = await VerificationService.create_job({
+                "source_system": args.source_system,
+                "risk_level": args.risk_level,
+                "start_date": args.start_date,
+                "end_date": args.end_date
+            })
+            job_id = job["_id"]
+        print(f"📝 Job: {job_id}")
+
+        progress = asyncio.create_task(report_progress(job_id))
+        try:
+            await VerificationService.run_job(job_id, args.batch_size, args.max_in_flight)
+        finally:
+            progress.cancel()
+
+        job = await VerificationService.get_job(job_id)
+        print(f"\n✨ Verification {job['status']}!")
+        print(f"   - Checked: {job['checked']}/{job['total']}")
+        print(f"   - Mismatched: {job['mismatched']}")
+        print(f"   - Legacy (unverifiable): {job['legacy']}")
+        print(f"   - Throughput: {job['docs_per_second']} docs/sec")
+        for decision_id in job["mismatched_ids"]:
+            print(f"   ❌ {decision_id}")
+
+    except Exception as e:
+        print(f"❌ Error verifying: {e}")
+        raise
+    finally:
+        shutdown_process_pool()
+        await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(verify(parse_args()))
@@ -0,0 +1,46 @@
+"""
+Write-behind indexer retry tests
+"""
+
+import asyncio
+
+from app.core import es_indexer
+from app.core.es_indexer import ESIndexer, IndexOperation
+
+
+class FakeES:
+    """Bulk endpoint that throttles the first index write and rejects updates to missing documents"""
+
+    def __init__(self):
+        self.documents = {}
+        self.throttled = False
+
+    async def bulk(self, operations):
+        items = []
+        for header, body in zip(operations[::2], operations[1::2]):
+            action, meta = next(iter(header.items()))
+            if action == "index" and not self.throttled:
+                self.throttled = True
+                items.append({action: {"status": 429, "error": {"type": "es_rejected_execution_exception"}}})
+            elif action == "index":
+                self.documents[meta["_id"]] = dict(body)
+                items.append({action: {"status": 201}})
+            elif meta["_id"] not in self.documents:
+                items.append({action: {"status": 404, "error": {"type": "document_missing_exception"}}})
+            else:
+                self.documents[meta["_id"]].update(body["doc"])
+                items.append({action: {"status": 200}})
+        return {"errors": any("error" in next(iter(item.values())) for item in items), "items": items}
+
+
+def test_update_behind_a_throttled_index_write_is_retried(monkeypatch):
+    es = FakeES()
+    monkeypatch.setattr(es_indexer, "get_es_client", lambda: es)
+    indexer = ESIndexer(max_queue_size=10, batch_size=10, flush_interval=0.01, max_retries=3, backoff_base=0.001)
+
+    asyncio.run(indexer._flush([
+        IndexOperation("index", "traces", "DEC_1", {"annotation_summary": {"count": 0}}, 0.0),
+        IndexOperation("update", "traces", "DEC_1", {"doc": {"annotation_summary": {"count": 1}}}, 0.0),
+    ]))
+
+    assert es.documents == {"DEC_1": {"annotation_summary": {"count": 1}}}
@@ -0,0 +1,63 @@
+"""
+Tests for hash verification of stored traces
+"""
+
+from datetime import datetime
+
+import bson
+
+from app.core import canonical, integrity
+
+
+def make_trace(**overrides):
+    doc = {
+        "decision_id": "d-1",
+        "source_system": "loans",
+        "input_payload": {"amount": 100},
+        "rules_triggered": [],
+        "output": {"decision": "approve"},
+        "confidence": 0.9,
+        "risk_level": "low",
+        "timestamp": datetime(2024, 1, 1, 12, 0, 0),
+        "metadata": {},
+    }
+    doc.update(overrides)
+    doc["hash_version"] = canonical.CURRENT_VERSION
+    doc["hash"] = integrity.calculate_hash(integrity.hash_input(doc), doc["hash_version"])
+    return doc
+
+
+def test_valid_trace_verifies():
+    assert integrity.verify_document(make_trace()) == integrity.VALID
+
+
+def test_tampered_trace_is_a_mismatch():
+    doc = make_trace()
+    doc["confidence"] = 0.1
+    assert integrity.verify_document(doc) == integrity.MISMATCH
+
+
+def test_trace_without_hash_version_is_legacy():
+    doc = make_trace()
+    del doc["hash_version"]
+    doc["hash"] = "0" * 64
+    assert integrity.verify_document(doc) == integrity.LEGACY
+
+
+def test_raw_batch_keeps_legacy_out_of_mismatches():
+    tampered = make_trace(decision_id="d-2")
+    tampered["confidence"] = 0.1
+    legacy = make_trace(decision_id="d-3")
+    del legacy["hash_version"]
+    docs = [make_trace(), tampered, legacy]
+    for i, doc in enumerate(docs):
+        doc["_id"] = i
+
+    mismatched, legacy_count, last_id, count = integrity.verify_raw_batch(
+        [bson.encode(doc) for doc in docs]
+    )
+
+    assert mismatched == ["d-2"]
+    assert legacy_count == 1
+    assert last_id == 2
+    assert count == 3
@@ -0,0 +1,128 @@
+"""
+Kafka ingest worker tests against InMemoryTransport
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from app.models.decision import BatchIngestResponse, BatchItemResult
+from app.services.decision_service import DecisionService
+from app.workers.kafka_ingest import InMemoryTransport, KafkaIngestWorker
+
+
+class FakeStore:
+    """store_decision_traces_batch stand-in that keeps one trace per ingest_key"""
+
+    def __init__(self, unavailable=()):
+        self.traces = {}
+        self.unavailable = set(unavailable)
+
+    async def __call__(self, items, ingest_keys=None):
+        results, stored = [], []
+        for index, (item, key) in enumerate(zip(items, ingest_keys)):
+            if "source_system" not in item:
+                results.append(BatchItemResult(index=index, status="failed", error="invalid"))
+            elif item["source_system"] in self.unavailable:
+                results.append(BatchItemResult(index=index, status="failed", error="timeout", retryable=True))
+            else:
+                document = self.traces.setdefault(key, {**item, "decision_id": f"DEC_{key}", "ingest_key": key})
+                stored.append(document)
+                results.append(BatchItemResult(index=index, status="created", decision_id=document["decision_id"]))
+        succeeded = len(stored)
+        response = BatchIngestResponse(
+            total=len(items), succeeded=succeeded, failed=len(items) - succeeded, results=results
+        )
+        return response, stored
+
+
+@pytest.fixture
+def indexed(monkeypatch):
+    documents = []
+
+    async def bulk_index(batch):
+        documents.extend(batch)
+        return []
+
+    monkeypatch.setattr(DecisionService, "bulk_index", bulk_index)
+    return documents
+
+
+def trace(source_system="fraud_detection"):
+    return json.dumps({"source_system": source_system}).encode()
+
+
+async def run_until_committed(worker, transport, committed, timeout=5.0):
+    stop_event = asyncio.Event()
+    task = asyncio.create_task(worker.run(stop_event))
+    deadline = asyncio.get_running_loop().time() + timeout
+    while transport.committed != committed:
+        assert asyncio.get_running_loop().time() < deadline, f"committed {transport.committed}"
+        await asyncio.sleep(0.01)
+    stop_event.set()
+    await task
+
+
+def make_worker(transport):
+    return KafkaIngestWorker(transport, batch_size=10, batch_timeout=0.01, max_attempts=3, backoff_base=0.001)
+
+
+def test_stores_indexes_and_commits_each_partition(monkeypatch, indexed):
+    store = FakeStore()
+    monkeypatch.setattr(DecisionService, "store_decision_traces_batch", store)
+    transport = InMemoryTransport(partitions=2)
+    transport.produce(0, trace())
+    transport.produce(0, b"not json")
+    transport.produce(0, json.dumps({"risk_level": "low"}).encode())
+    transport.produce(1, trace())
+
+    asyncio.run(run_until_committed(make_worker(transport), transport, {0: 3, 1: 1}))
+
+    assert sorted(store.traces) == ["decision-traces:0:0", "decision-traces:1:0"]
+    assert sorted(doc["decision_id"] for doc in indexed) == ["DEC_decision-traces:0:0", "DEC_decision-traces:1:0"]
+
+
+def test_failed_commit_replays_batch_without_duplicates(monkeypatch, indexed):
+    store = FakeStore()
+    monkeypatch.setattr(DecisionService, "store_decision_traces_batch", store)
+
+    class FlakyCommitTransport(InMemoryTransport):
+        failures = 1
+
+        async def commit(self, partition, offset):
+            if self.failures:
+                self.failures -= 1
+                raise ConnectionError("commit failed")
+            await super().commit(partition, offset)
+
+    transport = FlakyCommitTransport()
+    transport.produce(0, trace())
+    transport.produce(0, trace())
+
+    asyncio.run(run_until_committed(make_worker(transport), transport, {0: 2}))
+
+    # The batch is read again from the committed offset and resolves to the same traces
+    assert len(store.traces) == 2
+    assert len(indexed) == 4
+    assert {doc["decision_id"] for doc in indexed} == {doc["decision_id"] for doc in store.traces.values()}
+
+
+def test_write_failures_are_retried_then_dead_lettered(monkeypatch, indexed):
+    store = FakeStore(unavailable={"legacy"})
+    monkeypatch.setattr(DecisionService, "store_decision_traces_batch", store)
+    dead_letters = []
+
+    async def dead_letter(failed):
+        dead_letters.extend(failed)
+
+    transport = InMemoryTransport()
+    transport.produce(0, trace())
+    transport.produce(0, trace("legacy"))
+    worker = make_worker(transport)
+    monkeypatch.setattr(worker, "_dead_letter", dead_letter)
+
+    asyncio.run(run_until_committed(worker, transport, {0: 2}))
+
+    assert list(store.traces) == ["decision-traces:0:0"]
+    assert [(message.offset, error) for message, _, error in dead_letters] == [(1, "timeout")]
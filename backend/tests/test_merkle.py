@@ -0,0 +1,27 @@
+"""
+Streaming Merkle tree builder tests
+"""
+
+import hashlib
+
+import pytest
+
+from app.core import merkle
+
+
+@pytest.mark.parametrize("leaf_count", [*range(1, 40), 1000, 1025])
+def test_tree_builder_matches_build_levels(leaf_count):
+    hashes = [hashlib.sha256(str(i).encode()).hexdigest() for i in range(leaf_count)]
+    levels = merkle.build_levels(hashes)
+
+    builder = merkle.TreeBuilder()
+    nodes = {}
+    for trace_hash in hashes:
+        nodes.update(((level, index), node) for level, index, node in builder.add_leaf(trace_hash))
+    root, depth, completed = builder.finish()
+    nodes.update(((level, index), node) for level, index, node in completed)
+
+    assert nodes == {(level, index): node for level, nodes_ in enumerate(levels) for index, node in enumerate(nodes_)}
+    assert root == levels[-1][0]
+    assert depth == len(levels) - 1
+    assert builder.leaf_count == leaf_count
@@ -0,0 +1,131 @@
+"""
+Rollup timeseries range tests
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.config import settings
+from app.services import rollup_service
+from app.services.rollup_service import RollupService, truncate
+from app.services.statistics_service import escape_key
+
+
+class FakeCursor:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for row in self.rows:
+            yield dict(row)
+
+
+class FakeRollups:
+    """Rollups built from traces, minus the minute buckets older than expired_before"""
+
+    def __init__(self, traces, expired_before):
+        self.documents = []
+        for (granularity, bucket, source_system, risk_level), totals in RollupService.accumulate(traces).items():
+            if granularity == "minute" and bucket < expired_before:
+                continue
+            self.documents.append({
+                "granularity": granularity,
+                "bucket": bucket,
+                "source_system": source_system,
+                "risk_level": risk_level,
+                "count": totals.count,
+                "confidence_sum": totals.confidence_sum,
+                "confidence_min": totals.confidence_min,
+                "confidence_max": totals.confidence_max,
+                "outcomes": {escape_key(outcome): count for outcome, count in totals.outcomes.items()},
+            })
+
+    def find(self, query, projection):
+        bucket = query["bucket"]
+        return FakeCursor(
+            doc for doc in self.documents
+            if doc["granularity"] == query["granularity"] and bucket["$gte"] <= doc["bucket"] < bucket["$lt"]
+        )
+
+
+class FakeTraces:
+    """Supports the minute $group pipeline used for edges rollups can't cover"""
+
+    def __init__(self, traces):
+        self.traces = traces
+        self.ranges = []
+
+    def aggregate(self, pipeline):
+        timestamp = pipeline[0]["$match"]["timestamp"]
+        self.ranges.append((timestamp["$gte"], timestamp["$lt"]))
+        rows = []
+        for doc in self.traces:
+            if timestamp["$gte"] <= doc["timestamp"] < timestamp["$lt"]:
+                rows.append({
+                    "_id": {
+                        "bucket": truncate(doc["timestamp"], "minute"),
+                        "source_system": doc["source_system"],
+                        "risk_level": doc["risk_level"],
+                        "outcome": doc["output"]["decision"],
+                    },
+                    "count": 1,
+                    "confidence_sum": doc["confidence"],
+                    "confidence_min": doc["confidence"],
+                    "confidence_max": doc["confidence"],
+                })
+        return FakeCursor(rows)
+
+
+class FakeDatabase:
+    def __init__(self, traces, expired_before):
+        self.decision_rollups = FakeRollups(traces, expired_before)
+        self.decision_traces = FakeTraces(traces)
+
+
+def make_traces(first, last, every):
+    traces = []
+    timestamp = first
+    while timestamp < last:
+        traces.append({
+            "timestamp": timestamp,
+            "source_system": "loans",
+            "risk_level": "low",
+            "confidence": 0.5,
+            "output": {"decision": "approve"},
+        })
+        timestamp += every
+    return traces
+
+
+@pytest.mark.parametrize("interval, minutes_expired", [
+    (timedelta(minutes=15), False),
+    (timedelta(hours=1), False),
+    (timedelta(hours=1), True),
+    (timedelta(days=1), False),
+    (timedelta(days=1), True),
+])
+def test_timeseries_counts_only_the_requested_range(monkeypatch, interval, minutes_expired):
+    now = datetime.utcnow().replace(microsecond=0)
+    first = truncate(now, "day") - timedelta(days=3)
+    traces = make_traces(first, first + timedelta(days=3), timedelta(seconds=37))
+    # With minutes_expired every minute rollup in the range is past retention
+    retention = timedelta(days=0 if minutes_expired else 14)
+    monkeypatch.setattr(settings, "ROLLUP_MINUTE_RETENTION_DAYS", retention.days)
+    database = FakeDatabase(traces, expired_before=now - retention)
+    monkeypatch.setattr(rollup_service, "get_database", lambda: database)
+
+    start = first + timedelta(hours=5, minutes=7, seconds=20)
+    end = first + timedelta(days=2, hours=3, minutes=41, seconds=5)
+    series = asyncio.run(RollupService.timeseries(start, end, interval))
+
+    assert sum(point["count"] for point in series) == sum(start <= doc["timestamp"] < end for doc in traces)
+    assert series[0]["partial"] and series[-1]["partial"]
+    assert not any(point["partial"] for point in series[1:-1])
+    # Only the sub-minute edges, or the minutes rollups no longer cover, are read from the traces
+    for range_start, range_end in database.decision_traces.ranges:
+        assert range_end - range_start < (timedelta(hours=1) if minutes_expired else timedelta(minutes=1))
@@ -0,0 +1,59 @@
+"""
+Trace cache revalidation tests
+"""
+
+import asyncio
+from datetime import datetime
+
+from app.core import trace_cache as trace_cache_module
+from app.core.trace_cache import TraceCache, trace_version
+
+
+class FakeCursor:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for row in self.rows:
+            yield row
+
+
+class FakeTraces:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def find(self, query, projection):
+        wanted = query["decision_id"]["$in"]
+        return FakeCursor(
+            {field: doc[field] for field in projection if field in doc}
+            for doc in self.documents.values() if doc["decision_id"] in wanted
+        )
+
+
+class FakeDatabase:
+    def __init__(self, documents):
+        self.decision_traces = FakeTraces(documents)
+
+
+def test_without_redis_entries_changed_elsewhere_are_dropped(monkeypatch):
+    stored = {
+        "DEC_1": {"decision_id": "DEC_1", "hash": "a", "updated_at": datetime(2024, 1, 1)},
+        "DEC_2": {"decision_id": "DEC_2", "hash": "b", "updated_at": datetime(2024, 1, 1)},
+    }
+    monkeypatch.setattr(trace_cache_module, "get_redis", lambda: None)
+    monkeypatch.setattr(trace_cache_module, "get_database", lambda: FakeDatabase(stored))
+
+    cache = TraceCache(maxsize=10, ttl=60)
+    for decision_id, doc in stored.items():
+        cache.set(decision_id, {"decision_id": decision_id}, trace_version(doc))
+
+    # Another process adds a review note to DEC_2
+    stored["DEC_2"]["updated_at"] = datetime(2024, 1, 2)
+
+    entries = asyncio.run(cache.get_many(["DEC_1", "DEC_2"]))
+
+    assert list(entries) == ["DEC_1"]
+    assert asyncio.run(cache.get("DEC_2")) is None